@@ -0,0 +1,76 @@
+"""Round trips and wall time of per-image vs. batched extraction, against the fake ``ee``.
+
+For every synthetic lake both modes of process_fire are run into separate
+folders; the script asserts that the output lines match (apart from the
+timing column) and that the batched mode needs ceil(ImageNum / chunk_size)
+requests instead of 2 * ImageNum + 4.
+
+    python bench_batched.py --lakes 10 --latency 0.05 --chunk-size 8
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import tempfile
+import time
+
+from bench_scheduler import synthetic_fires, synthetic_lakes
+from hls_extract import fake_ee
+
+
+def run(process_fire, task, **kwargs):
+    fake_ee.reset_stats()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        process_fire(task, **kwargs)
+    elapsed = time.perf_counter() - start_time
+    output_file_path = os.path.join(task[1], f"{task[0]}.txt")
+    lines = []
+    if os.path.exists(output_file_path):
+        with open(output_file_path) as file:
+            lines = [line.rsplit(' ', 1)[0] if line[:1].isdigit() else line.rstrip() for line in file]
+    return lines, fake_ee.round_trips(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lakes', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per getInfo() call')
+    parser.add_argument('--chunk-size', type=int, default=8)
+    args = parser.parse_args()
+
+    fake_ee.install(latency=args.latency)
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import WaterbodyIndex
+    lakes = synthetic_lakes(args.lakes)
+    waterbodies = WaterbodyIndex(lakes, 'Hylak_id')
+
+    print(f"{'Hylak_id':>9} {'images':>7} {'calls':>6} {'batched':>8} {'time':>7} {'batched':>8}")
+    totals = [0, 0, 0.0, 0.0]
+    with tempfile.TemporaryDirectory() as per_image_dir, tempfile.TemporaryDirectory() as batched_dir:
+        for hylak_id, start, end in synthetic_fires(lakes):
+            lines, calls, elapsed = run(process_fire, (hylak_id, per_image_dir, start, end),
+                                        waterbodies=waterbodies)
+            batched_lines, batched_calls, batched_elapsed = run(
+                process_fire, (hylak_id, batched_dir, start, end),
+                waterbodies=waterbodies, batched=True, chunk_size=args.chunk_size)
+
+            image_num = int(lines[0].split('ImageNum: ')[1]) if lines else 0
+            assert lines == batched_lines, f"{hylak_id}: outputs differ"
+            if image_num:
+                assert calls == 2 * image_num + 4, f"{hylak_id}: {calls} calls for {image_num} images"
+            assert batched_calls == max(1, math.ceil(image_num / args.chunk_size)), \
+                f"{hylak_id}: {batched_calls} batched calls for {image_num} images"
+
+            print(f"{hylak_id:>9} {image_num:>7} {calls:>6} {batched_calls:>8} "
+                  f"{elapsed:>6.2f}s {batched_elapsed:>7.2f}s")
+            for i, value in enumerate((calls, batched_calls, elapsed, batched_elapsed)):
+                totals[i] += value
+
+    print(f"{'total':>9} {'':>7} {totals[0]:>6} {totals[1]:>8} {totals[2]:>6.2f}s {totals[3]:>7.2f}s")
+    print(f"Round trips reduced {totals[0] / totals[1]:.1f}x, wall time {totals[2] / totals[3]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
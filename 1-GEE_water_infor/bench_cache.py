@@ -0,0 +1,97 @@
+"""Cold vs. warm reruns through the ResponseCache, against the fake ``ee``.
+
+Extracts --lakes synthetic lakes per-image and batched, first with an empty
+cache and then again with the cache reopened from disk. Asserts that the
+warm run makes no server call at all and writes the same output (apart from
+the timing column), then checks that a cache half that size evicts the
+least recently used responses and that an expired TTL sends requests to the
+server again.
+
+    python bench_cache.py --lakes 20 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from bench_scheduler import synthetic_fires, synthetic_lakes
+from hls_extract import fake_ee
+
+
+def run(process_fire, tasks, root, **kwargs):
+    # Into a new folder each time, since process_fire skips existing output files
+    folder = tempfile.mkdtemp(dir=root)
+    fake_ee.reset_stats()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for hylak_id, start, end in tasks:
+            process_fire((hylak_id, folder, start, end), **kwargs)
+    elapsed = time.perf_counter() - start_time
+    outputs = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name)) as file:
+            outputs[name] = [line.rsplit(' ', 1)[0] if line[:1].isdigit() else line.rstrip() for line in file]
+    return outputs, fake_ee.round_trips(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lakes', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per getInfo() call')
+    args = parser.parse_args()
+
+    fake_ee.install(latency=args.latency)
+    from hls_extract.cache import ResponseCache
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import WaterbodyIndex
+    lakes = synthetic_lakes(args.lakes)
+    waterbodies = WaterbodyIndex(lakes, 'Hylak_id')
+    tasks = synthetic_fires(lakes)
+
+    print(f"{'mode':>10} {'cold calls':>10} {'warm calls':>10} {'cold':>7} {'warm':>7} {'hit rate':>8} {'KB':>6}")
+    sizes = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for batched in (False, True):
+            mode = 'batched' if batched else 'per-image'
+            path = os.path.join(folder, f'{mode}.db')
+            uncached, _, _ = run(process_fire, tasks, folder, waterbodies=waterbodies, batched=batched)
+
+            results = []
+            for _ in ('cold', 'warm'):
+                cache = ResponseCache(path)  # Reopened from disk for the warm run
+                results.append((*run(process_fire, tasks, folder, waterbodies=waterbodies, batched=batched,
+                                     cache=cache), cache.stats()))
+                cache.close()
+            (cold, cold_calls, cold_time, _), (warm, warm_calls, warm_time, stats) = results
+
+            assert cold == uncached and warm == uncached, f"{mode}: cached outputs differ"
+            assert warm_calls == 0, f"{mode}: {warm_calls} server calls on a warm cache"
+            assert stats['misses'] == 0, f"{mode}: {stats}"
+            sizes[mode] = stats['bytes']
+            print(f"{mode:>10} {cold_calls:>10} {warm_calls:>10} {cold_time:>6.2f}s {warm_time:>6.2f}s "
+                  f"{stats['hit_rate']:>8.0%} {stats['bytes'] / 1024:>6.1f}")
+
+        # LRU: the responses of the first lakes are evicted, the last ones are still served from disk
+        fake_ee.configure()
+        cache = ResponseCache(os.path.join(folder, 'small.db'), max_bytes=sizes['per-image'] // 2)
+        run(process_fire, tasks, folder, waterbodies=waterbodies, cache=cache)
+        stats = cache.stats()
+        assert stats['evictions'] > 0 and stats['bytes'] <= cache.max_bytes, stats
+        _, calls, _ = run(process_fire, tasks[-1:], folder, waterbodies=waterbodies, cache=cache)
+        assert calls == 0, f"{calls} server calls for the most recently used lake"
+        _, calls, _ = run(process_fire, tasks[:1], folder, waterbodies=waterbodies, cache=cache)
+        assert calls > 0, "the least recently used lake was not evicted"
+        print(f"{cache.max_bytes / 1024:.1f} KB cache: {stats['evictions']} evictions, {stats['bytes'] / 1024:.1f} KB kept")
+
+        # TTL: every entry has expired, so the rerun goes back to the server
+        cache = ResponseCache(os.path.join(folder, 'batched.db'), ttl=0)
+        _, calls, _ = run(process_fire, tasks, folder, waterbodies=waterbodies, batched=True, cache=cache)
+        stats = cache.stats()
+        assert calls > 0 and stats['expired'] == stats['misses'] > 0, stats
+        print(f"TTL 0: {stats['expired']} expired entries refetched in {calls} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Waterbody lookup cost: per-task GeoDataFrame scan vs. WaterbodyIndex, and shapefile vs. Parquet cache load.
+
+Geometries are converted with the fake geemap shim, so the conversion times
+are a lower bound for the real geemap.geopandas_to_ee.
+
+    python bench_geometry_index.py --rows 200000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from hls_extract import fake_ee
+
+
+def synthetic_reaches(n, seed=0):
+    import geopandas as gpd
+    from shapely.geometry import Polygon
+
+    rng = random.Random(seed)
+    polygons = []
+    for _ in range(n):
+        x, y = rng.uniform(-180, 179), rng.uniform(-60, 70)
+        # Irregular 12-vertex polygons, roughly like a buffered reach
+        polygons.append(Polygon([(x + 0.01 * i + rng.uniform(0, 0.003), y + rng.uniform(0, 0.01) * (i % 2))
+                                 for i in range(12)]).convex_hull)
+    return gpd.GeoDataFrame({'reach_id': range(10_000_000, 10_000_000 + n)}, geometry=polygons, crs='EPSG:4326')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--simplify', type=float, default=0.001)
+    args = parser.parse_args()
+
+    fake_ee.install()
+    import geemap
+    import geopandas as gpd
+    from hls_extract.adapters import RIVER
+    from hls_extract.geometry_index import WaterbodyIndex, load_waterbodies
+
+    water_data = synthetic_reaches(args.rows)
+    rng = random.Random(1)
+    # Fires repeat waterbodies, as in reach_id_dates.csv
+    ids = [rng.choice(water_data['reach_id'].values[:args.lookups]) for _ in range(args.lookups)]
+
+    start_time = time.perf_counter()
+    for reach_id in ids:
+        geemap.geopandas_to_ee(water_data[water_data['reach_id'] == reach_id])
+    scan_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    index = WaterbodyIndex(water_data, 'reach_id')
+    build_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for reach_id in ids:
+        index.rows(reach_id)
+        index.ee_geometry(reach_id)
+    index_time = time.perf_counter() - start_time
+
+    print(f"rows={args.rows} lookups={args.lookups}")
+    print(f"  boolean scan + conversion: {scan_time:8.3f}s ({args.lookups / scan_time:10.0f} lookups/s)")
+    print(f"  index build:               {build_time:8.3f}s")
+    print(f"  index lookup (memoised):   {index_time:8.3f}s ({args.lookups / index_time:10.0f} lookups/s)")
+
+    with tempfile.TemporaryDirectory() as folder:
+        shapefile = os.path.join(folder, 'reaches.shp')
+        cache = os.path.join(folder, 'reaches.parquet')
+        water_data.to_file(shapefile)
+
+        start_time = time.perf_counter()
+        gpd.read_file(shapefile)
+        shapefile_time = time.perf_counter() - start_time
+
+        load_waterbodies(shapefile, RIVER, cache, args.simplify)  # writes the cache
+        start_time = time.perf_counter()
+        cached = load_waterbodies(shapefile, RIVER, cache, args.simplify)
+        cache_time = time.perf_counter() - start_time
+        assert len(cached) == args.rows
+
+        shapefile_size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder)
+                             if f.startswith('reaches.') and not f.endswith('.parquet'))
+        print(f"  shapefile load:            {shapefile_time:8.3f}s ({shapefile_size / 1e6:.1f} MB)")
+        print(f"  Parquet cache load:        {cache_time:8.3f}s ({os.path.getsize(cache) / 1e6:.1f} MB, "
+              f"simplify={args.simplify})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Ingest throughput of hls_extract.ingest on synthetic .txt outputs (1M lines by default).
+
+    python bench_ingest.py --lines 1000000 --workers 1 4
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+import pyarrow.dataset as ds
+
+from hls_extract.ingest import convert_folder
+
+
+def write_synthetic_outputs(folder, lines, lines_per_file=50, seed=0):
+    rng = random.Random(seed)
+    written = 0
+    waterbody_id = 10_000_000
+    while written < lines:
+        n = min(lines_per_file, lines - written)
+        with open(os.path.join(folder, f"{waterbody_id}.txt"), 'w') as file:
+            file.write(f"reach ID: {waterbody_id} ImageNum: {n}\n")
+            for i in range(n):
+                median = [round(rng.uniform(0, 0.3), 4) for _ in range(6)]
+                file.write(f"2021-07-01 2021-07-20 {waterbody_id} 2021-{5 + i // 28:02d}-{1 + i % 28:02d} "
+                           f"{median} {round(rng.uniform(0.5, 3), 2)}\n")
+        written += n
+        waterbody_id += 1
+    return waterbody_id - 10_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        input_folder = os.path.join(folder, 'River')
+        os.makedirs(input_folder)
+        start_time = time.perf_counter()
+        files = write_synthetic_outputs(input_folder, args.lines)
+        print(f"wrote {args.lines} lines in {files} files ({time.perf_counter() - start_time:.1f}s)")
+
+        for workers in args.workers:
+            output_folder = os.path.join(folder, f'dataset-{workers}')
+            start_time = time.perf_counter()
+            rows, skipped, _ = convert_folder(input_folder, output_folder, workers)
+            elapsed = time.perf_counter() - start_time
+            assert rows == args.lines and skipped == files
+            assert ds.dataset(output_folder).count_rows() == args.lines
+            size = sum(os.path.getsize(os.path.join(output_folder, f)) for f in os.listdir(output_folder))
+            peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+            print(f"workers={workers:>3}: {elapsed:6.2f}s, {rows / elapsed:10.0f} lines/s, "
+                  f"peak RSS {peak:.0f} MB, dataset {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Local raster backend (hls_extract.local) on synthetic HLS tiles.
+
+Writes two overlapping UTM tiles with --dates granules each (Fmask clouds,
+water disks with MNDWI > 0, a nodata strip), runs the windowed backend for
+--lakes waterbodies and checks a sample against a naive version that reads
+the full tiles and rasterises every polygon over the whole tile.
+
+    python bench_local.py --size 2048 --lakes 500 --workers 1 4
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import rasterio
+from rasterio.features import geometry_mask
+from rasterio.transform import Affine
+from rasterio.warp import transform_geom
+from shapely.geometry import Point, mapping, shape
+
+from hls_extract.local import (BAND_FILES, FMASK_NODATA, MAX_CLOUD, QA_BITS, TileIndex, fetch_medians_local,
+                               run_local)
+
+CRS = 'EPSG:32633'
+RES = 30
+OVERLAP = 64
+WATER = [0.04, 0.06, 0.05, 0.03, 0.01, 0.005]
+LAND = [0.05, 0.07, 0.08, 0.25, 0.2, 0.12]
+
+
+def tile_origins(size):
+    return {'T33TUN': (399960, 4600020), 'T33TVN': (399960 + (size - OVERLAP) * RES, 4600020)}
+
+
+def write_synthetic_tiles(folder, size, dates, lakes, seed=0):
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:size, 0:size]
+    for tile, (left, top) in tile_origins(size).items():
+        transform = Affine(RES, 0, left, 0, -RES, top)
+        x, y = left + (cols + 0.5) * RES, top - (rows + 0.5) * RES
+        water = np.zeros((size, size), dtype=bool)
+        for cx, cy, radius in lakes:
+            water |= (x - cx) ** 2 + (y - cy) ** 2 < radius ** 2
+        for k in range(dates):
+            stamp = (datetime(2021, 5, 10) + timedelta(days=8 * k)).strftime('%Y%j') + 'T100000'
+            prefix = os.path.join(folder, f"HLS.L30.{tile}.{stamp}.v2.0")
+            fmask = (rng.integers(0, 2, (size, size)) << 5).astype(np.uint8)  # Water bit, ignored by QA_BITS
+            for _ in range(rng.integers(0, 40)):
+                r, c, h, w = rng.integers(0, size, 2).tolist() + rng.integers(size // 20, size // 3, 2).tolist()
+                fmask[r:r + h, c:c + w] |= 1 << int(rng.choice([1, 3, 4]))
+            if k % 3 == 2:
+                fmask[:, :size // 8] = FMASK_NODATA
+            profile = dict(driver='GTiff', width=size, height=size, count=1, crs=CRS, transform=transform,
+                           tiled=True, blockxsize=256, blockysize=256, compress='deflate')
+            with rasterio.open(f"{prefix}.Fmask.tif", 'w', dtype='uint8', nodata=FMASK_NODATA, **profile) as dst:
+                dst.write(fmask, 1)
+            for band, water_value, land_value in zip(BAND_FILES, WATER, LAND):
+                value = np.where(water, water_value, land_value) + rng.normal(0, 0.005, (size, size))
+                data = np.round(value / 0.0001).astype(np.int16)
+                data[fmask == FMASK_NODATA] = -9999
+                with rasterio.open(f"{prefix}.{band}.tif", 'w', dtype='int16', nodata=-9999, **profile) as dst:
+                    dst.update_tags(scale_factor=0.0001, add_offset=0)
+                    dst.write(data, 1)
+
+
+def naive_medians(tiles, geometry, crs, size):
+    # Reference: full-tile reads and full-tile polygon masks, same-day granules averaged on one canvas
+    origins = tile_origins(size)
+    canvas_left, canvas_top = min(left for left, _ in origins.values()), 4600020
+    width = (max(left for left, _ in origins.values()) - canvas_left) // RES + size
+    polygon = shape(transform_geom(crs, CRS, geometry))
+    by_date = {}
+    for granules in tiles.by_tile.values():
+        for granule in granules:
+            by_date.setdefault(granule.date, []).append(granule)
+    records = []
+    for date in sorted(by_date):
+        total = np.zeros((len(BAND_FILES), size, width), dtype=np.float32)
+        count = np.zeros(total.shape, dtype=np.int32)
+        used = False
+        for granule in by_date[date]:
+            left, top = origins[granule.tile]
+            transform = Affine(RES, 0, left, 0, -RES, top)
+            inside = geometry_mask([mapping(polygon)], (size, size), transform, invert=True)
+            with rasterio.open(granule.paths['Fmask']) as src:
+                fmask = src.read(1)
+            valid = inside & (fmask != FMASK_NODATA)
+            clear = (fmask & QA_BITS) == 0
+            if not valid.any() or 1 - clear[valid].mean() >= MAX_CLOUD:
+                continue
+            used = True
+            bands = np.empty((len(BAND_FILES), size, size), dtype=np.float32)
+            for i, band in enumerate(BAND_FILES):
+                with rasterio.open(granule.paths[band]) as src:
+                    raw = src.read(1)
+                np.multiply(raw, 0.0001, out=bands[i], casting='unsafe')
+                bands[i] += 0
+                bands[i][raw == -9999] = np.nan
+            with np.errstate(invalid='ignore', divide='ignore'):
+                keep = (valid & clear & (bands[1] >= 0) & (bands[4] >= 0)
+                        & ((bands[1] - bands[4]) / (bands[1] + bands[4]) > 0))
+            bands[:, ~keep] = np.nan
+            col = (left - canvas_left) // RES
+            finite = np.isfinite(bands)
+            total[:, :, col:col + size] += np.where(finite, bands, 0)
+            count[:, :, col:col + size] += finite
+        if not used:
+            continue
+        inside = geometry_mask([mapping(polygon)], (size, width), Affine(RES, 0, canvas_left, 0, -RES, canvas_top),
+                               invert=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = (total / count)[:, inside]
+        values = values[:, np.isfinite(values).all(axis=0)]
+        records.append((date, [float(v) for v in np.median(values, axis=1)] if values.shape[1] else [None] * 6))
+    return records
+
+
+@contextlib.contextmanager
+def quiet():
+    # Worker processes inherit fd 1, so silence it at the OS level
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved = os.dup(1)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(devnull)
+        os.close(saved)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1024, help='Tile width in pixels (real HLS tiles: 3660)')
+    parser.add_argument('--dates', type=int, default=8)
+    parser.add_argument('--lakes', type=int, default=200)
+    parser.add_argument('--check', type=int, default=10, help='Lakes compared with the naive version')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    origins = tile_origins(args.size)
+    span = (max(left for left, _ in origins.values()) - 399960) + args.size * RES
+    lakes = [(399960 + rng.uniform(0.05, 0.95) * span, 4600020 - rng.uniform(0.05, 0.95) * args.size * RES,
+              rng.uniform(150, 1200)) for _ in range(args.lakes)]
+    geometries = [transform_geom(CRS, 'EPSG:4326', mapping(Point(cx, cy).buffer(radius * 0.8)))
+                  for cx, cy, radius in lakes]
+    fires = [('2021-07-01', '2021-07-10')]
+
+    with tempfile.TemporaryDirectory() as folder:
+        start_time = time.perf_counter()
+        write_synthetic_tiles(folder, args.size, args.dates, lakes)
+        tiles = TileIndex(folder)
+        print(f"wrote {len(tiles)} granules of {args.size}x{args.size} px ({time.perf_counter() - start_time:.1f}s)")
+
+        start_time = time.perf_counter()
+        with quiet():
+            checked = [fetch_medians_local(tiles, geometry, 'EPSG:4326', '2021-05-01', '2021-09-10')[2]
+                       for geometry in geometries[:args.check]]
+        windowed_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        for geometry, records in zip(geometries, checked):
+            expected = naive_medians(tiles, geometry, 'EPSG:4326', args.size)
+            assert [date for date, _ in expected] == [date for date, _, _ in records]
+            for (_, want), (_, got, _) in zip(expected, records):
+                assert (want[0] is None and got[0] is None) or np.allclose(want, got, atol=1e-6)
+        naive_time = time.perf_counter() - start_time
+        print(f"{args.check} lakes match the naive version: windowed {windowed_time:.2f}s, "
+              f"full-tile {naive_time:.2f}s ({naive_time / windowed_time:.0f}x)")
+
+        groups = [[(i, fires, geometry, 'EPSG:4326', False)] for i, geometry in enumerate(geometries)]
+        for workers in args.workers:
+            start_time = time.perf_counter()
+            with quiet():
+                results = list(run_local(groups, tiles, workers))
+            elapsed = time.perf_counter() - start_time
+            states = [state for _, state, _, _ in results]
+            dates = sum(len(block[3]) for _, _, blocks, _ in results for block in blocks)
+            print(f"workers={workers:>3}: {elapsed:6.2f}s, {len(results) / elapsed:7.1f} waterbodies/s, "
+                  f"{states.count('done')} done, {dates} dates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Per-fire rows vs. planned per-waterbody tasks with merged windows, against the fake ``ee``.
+
+Synthetic lakes get several fires each, some close enough for their +/- 2
+month windows to overlap. The per-row run reproduces the old behaviour
+(later fires on a lake are skipped once {id}.txt exists), the per-fire run
+queries every fire separately into its own folder, and the planned run must
+keep every fire with no more round trips than the per-fire run.
+
+    python bench_planning.py --lakes 10 --fires-per-lake 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from bench_scheduler import synthetic_lakes
+from hls_extract import fake_ee
+
+
+def synthetic_fire_rows(lakes, fires_per_lake, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for hylak_id in lakes['Hylak_id']:
+        fire_start = datetime(2021, rng.randint(2, 6), rng.randint(1, 28))
+        for _ in range(fires_per_lake):
+            rows.append({'Hylak_id': hylak_id, 'earliest_initialdat': fire_start.strftime('%Y-%m-%d'),
+                         'latest_finaldate': (fire_start + timedelta(days=5)).strftime('%Y-%m-%d')})
+            # Mostly overlapping +/- 2 month windows, sometimes a separate season
+            fire_start += timedelta(days=rng.choice([10, 30, 60, 150]))
+    return pd.DataFrame(rows)
+
+
+def fires_written(folder):
+    fires = set()
+    for root, _, names in os.walk(folder):
+        for name in names:
+            with open(os.path.join(root, name)) as file:
+                for line in file:
+                    parts = line.split(' ', 3)
+                    if line[:1].isdigit():
+                        fires.add((int(parts[2]), parts[0], parts[1]))
+    return fires
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lakes', type=int, default=10)
+    parser.add_argument('--fires-per-lake', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds per getInfo() call')
+    args = parser.parse_args()
+
+    fake_ee.install(latency=args.latency)
+    from hls_extract.adapters import LAKE
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import WaterbodyIndex
+    from hls_extract.planning import plan_summary, plan_tasks
+
+    lakes = synthetic_lakes(args.lakes)
+    waterbodies = WaterbodyIndex(lakes, 'Hylak_id')
+    wildfire_data = synthetic_fire_rows(lakes, args.fires_per_lake)
+    all_fires = set(zip(wildfire_data['Hylak_id'], wildfire_data['earliest_initialdat'],
+                        wildfire_data['latest_finaldate']))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ('per-row', 'per-fire', 'planned'):
+            os.makedirs(os.path.join(folder, name))
+        runs = {
+            'per-row': [(row.Hylak_id, os.path.join(folder, 'per-row'), row.earliest_initialdat,
+                         row.latest_finaldate) for row in wildfire_data.itertuples()],
+            'per-fire': [(row.Hylak_id, os.path.join(folder, 'per-fire', str(row.Index)), row.earliest_initialdat,
+                          row.latest_finaldate) for row in wildfire_data.itertuples()],
+            'planned': plan_tasks(wildfire_data, LAKE, os.path.join(folder, 'planned')),
+        }
+        for task in runs['per-fire']:
+            os.makedirs(task[1])
+        for name, tasks in runs.items():
+            fake_ee.reset_stats()
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for task in tasks:
+                    process_fire(task, waterbodies, batched=True)
+            elapsed = time.perf_counter() - start_time
+            queries = fake_ee.round_trips()
+            results[name] = (fires_written(os.path.join(folder, name)), queries, elapsed)
+
+    print(plan_summary(runs['planned']))
+    for name, (fires, queries, elapsed) in results.items():
+        print(f"{name:>8}: {len(fires):4d}/{len(all_fires)} fires written, {queries:4d} round trips, {elapsed:6.2f}s")
+    assert results['planned'][0] == results['per-fire'][0], "planned run lost fires"
+    assert results['planned'][1] <= results['per-fire'][1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""K shard processes vs. one process, against the fake ``ee``, then a merge.
+
+Writes a synthetic shapefile and fires CSV, runs the CLI once without
+sharding and then as --shards concurrent processes (``--shard i/K``, each
+into its own store), merges the shard stores and asserts that the merged
+store holds the same jobs and results as the single run. Then checks that
+merge reports a missing shard and duplicated waterbodies.
+
+    python bench_shards.py --lakes 60 --shards 4 --latency 0.05
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_planning import synthetic_fire_rows
+from bench_scheduler import synthetic_lakes
+from hls_extract.shards import main as shards_main
+from hls_extract.store import STATES, ResultStore
+
+RUN = """
+import sys
+from hls_extract import fake_ee
+fake_ee.install(latency=float(sys.argv[1]))
+from hls_extract.cli import main
+main(sys.argv[2:])
+"""
+
+
+def start(latency, argv, folder):
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([os.path.dirname(os.path.abspath(__file__)),
+                                                        os.environ.get('PYTHONPATH', '')])}
+    return subprocess.Popen([sys.executable, '-c', RUN, str(latency), 'lake', *argv], cwd=folder, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def contents(path):
+    store = ResultStore(path)
+    jobs = {state: store.job_ids([state]) for state in STATES}
+    results = [row[:-1] for row in store.results()]  # Without the timing column
+    store.close()
+    return jobs, results
+
+
+def run_seconds(path):
+    store = ResultStore(path)
+    seconds = sum(run['seconds'] for run in store.runs())
+    store.close()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lakes', type=int, default=60)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=4, help='Threads per process')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per getInfo() call')
+    args = parser.parse_args()
+
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    with tempfile.TemporaryDirectory() as folder:
+        lakes = synthetic_lakes(args.lakes)
+        gpd.GeoDataFrame(lakes.drop(columns='geometry'), geometry=[box(*bounds) for bounds in lakes['geometry']],
+                         crs='EPSG:4326').to_file(os.path.join(folder, 'lakes.shp'))
+        synthetic_fire_rows(lakes, 2).to_csv(os.path.join(folder, 'fires.csv'), index=False)
+        argv = ['--fires', 'fires.csv', '--shapefile', 'lakes.shp', '--batched', '--workers', str(args.workers)]
+
+        start_time = time.perf_counter()
+        start(args.latency, argv + ['--store', 'single.db'], folder).wait()
+        single = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        processes = [start(args.latency, argv + ['--store', 'results.db', '--shard', f'{i}/{args.shards}'], folder)
+                     for i in range(args.shards)]
+        assert all(process.wait() == 0 for process in processes)
+        sharded = time.perf_counter() - start_time
+
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            assert shards_main(['merge', '--store', 'results.db', '--fires', 'fires.csv']) == 0
+            assert contents('results.db') == contents('single.db'), "merged store differs from the single run"
+            single_run = run_seconds('single.db')
+            shard_run = max(run_seconds(f'results.shard-{i}-of-{args.shards}.db') for i in range(args.shards))
+
+            # One shard missing, and its waterbodies with it
+            print()
+            assert shards_main(['merge', '--store', 'partial.db', '--fires', 'fires.csv', '--shards',
+                                *[f'results.shard-{i}-of-{args.shards}.db' for i in range(1, args.shards)]]) == 1
+
+            # A rerun with a different shard count overlaps the first one
+            print()
+            start(args.latency, argv + ['--store', 'results.db', '--shard', '0/2'], folder).wait()
+            assert shards_main(['merge', '--store', 'results.db', '--overwrite']) == 1
+        finally:
+            os.chdir(cwd)
+
+    # Wall time includes each process' start-up (imports, shapefile); run time is the scheduler's
+    print(f"\n1 process: {single:.1f}s wall, {single_run:.1f}s run; {args.shards} shard processes: {sharded:.1f}s wall, "
+          f"slowest shard {shard_run:.1f}s run ({single_run / shard_run:.1f}x on {os.cpu_count()} CPUs)")
+
+
+if __name__ == "__main__":
+    main()
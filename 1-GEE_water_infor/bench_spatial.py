@@ -0,0 +1,112 @@
+"""Round trips of per-waterbody vs. tile-clustered extraction, against the fake ``ee``.
+
+Synthetic lakes are packed into --tiles HLS tiles (a few of them straddle a
+tile edge and fall back to the per-waterbody path), with fires in the same
+season. The per-waterbody run uses process_fire in batched mode; the
+clustered run looks the tiles up, plans clusters and reduces each one with
+reduceRegions. The script asserts identical outputs (apart from the timing
+column) and reports the requests of each run.
+
+    python bench_spatial.py --lakes 200 --tiles 4 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from bench_planning import fires_written
+from hls_extract import fake_ee
+
+
+def clustered_lakes(n, tiles, edge_fraction=0.05, seed=0):
+    rng = random.Random(seed)
+    cells = [(-120 + 3 * i, 40) for i in range(tiles)]
+    rows = []
+    for i in range(n):
+        tx, ty = rng.choice(cells)
+        size = rng.uniform(0.002, 0.02)
+        if rng.random() < edge_fraction:
+            x = tx + 1 - size / 2  # Across the edge: covered by two tiles
+        else:
+            x = rng.uniform(tx + 0.1, tx + 0.9)
+        y = rng.uniform(ty + 0.1, ty + 0.9)
+        rows.append({'Hylak_id': 1000 + i, 'Lake_area': rng.uniform(1, 100), 'geometry': (x, y, x + size, y + size)})
+    return pd.DataFrame(rows)
+
+
+def seasonal_fires(lakes, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for hylak_id in lakes['Hylak_id']:
+        month = rng.randint(6, 8)
+        rows.append({'Hylak_id': hylak_id, 'earliest_initialdat': f'2021-{month:02d}-{rng.randint(1, 20):02d}',
+                     'latest_finaldate': f'2021-{month:02d}-28'})
+    return pd.DataFrame(rows)
+
+
+def outputs(folder):
+    texts = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name)) as file:
+            texts[name] = [line.rsplit(' ', 1)[0] if line[:1].isdigit() else line.rstrip() for line in file]
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lakes', type=int, default=200)
+    parser.add_argument('--tiles', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per getInfo() call')
+    parser.add_argument('--max-members', type=int, default=100)
+    args = parser.parse_args()
+
+    fake_ee.install(latency=args.latency)
+    from hls_extract.adapters import LAKE
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import WaterbodyIndex
+    from hls_extract.planning import plan_tasks
+    from hls_extract.spatial import cluster_summary, lookup_tiles, plan_clusters, process_cluster
+
+    lakes = clustered_lakes(args.lakes, args.tiles)
+    waterbodies = WaterbodyIndex(lakes, 'Hylak_id')
+    wildfire_data = seasonal_fires(lakes)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ('per-waterbody', 'clustered'):
+            output_folder = os.path.join(folder, name)
+            os.makedirs(output_folder)
+            tasks = plan_tasks(wildfire_data, LAKE, output_folder)
+            fake_ee.reset_stats()
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if name == 'per-waterbody':
+                    for task in tasks:
+                        process_fire(task, waterbodies, batched=True)
+                else:
+                    clusters = plan_clusters(tasks, lookup_tiles(tasks, waterbodies), waterbodies,
+                                             args.max_members)
+                    lookups = fake_ee.round_trips()
+                    for cluster in clusters:
+                        process_cluster(cluster, waterbodies)
+            results[name] = (outputs(output_folder), fake_ee.round_trips(), time.perf_counter() - start_time)
+            fires = fires_written(output_folder)
+
+    print(cluster_summary(clusters))
+    for name, (_, calls, elapsed) in results.items():
+        print(f"{name:>14}: {calls:5d} round trips, {elapsed:6.2f}s")
+    print(f"{'':>14}  ({lookups} of them tile lookups)")
+    (texts, calls, elapsed), (clustered_texts, clustered_calls, clustered_elapsed) = results.values()
+    assert texts == clustered_texts, "clustered outputs differ"
+    assert clustered_calls < calls
+    print(f"{len(fires)} fires on {len(texts)} lakes written; requests reduced {calls / clustered_calls:.1f}x, "
+          f"wall time {elapsed / clustered_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
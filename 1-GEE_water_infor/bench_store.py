@@ -0,0 +1,66 @@
+"""Restart cost of a large run: stat() per .txt file vs. the ResultStore manifest.
+
+Builds a run of --tasks waterbodies with --done of them finished, both as
+{id}.txt files and in a ResultStore, then times how long each takes to work
+out which waterbodies are left, plus the commit rate of the store.
+
+    python bench_store.py --tasks 100000 --done 0.9
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from hls_extract.store import ResultStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=100_000)
+    parser.add_argument('--done', type=float, default=0.9, help='Fraction of finished waterbodies')
+    parser.add_argument('--dates', type=int, default=10, help='Dates stored per finished waterbody')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        output_folder = os.path.join(folder, 'txt')
+        os.makedirs(output_folder)
+        tasks = [(10_000_000 + i, output_folder, [('2021-05-01', '2021-05-10')]) for i in range(args.tasks)]
+        finished = tasks[:int(args.tasks * args.done)]
+
+        for task in finished:
+            open(os.path.join(output_folder, f"{task[0]}.txt"), 'w').close()
+
+        store = ResultStore(os.path.join(folder, 'results.db'))
+        store.add_jobs(tasks)
+        rows = [('2021-05-01', '2021-05-10', f'2021-04-{day + 1:02d}', [0.05, 0.06, 0.04, 0.02, 0.01, 0.005], 0.1)
+                for day in range(args.dates)]
+        start_time = time.perf_counter()
+        for task in finished:
+            store.commit(task[0], 'done', rows)
+        commit_time = time.perf_counter() - start_time
+        store.close()
+
+        start_time = time.perf_counter()
+        left_files = [task for task in tasks if not os.path.exists(os.path.join(task[1], f"{task[0]}.txt"))]
+        stat_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        store = ResultStore(os.path.join(folder, 'results.db'))
+        store.add_jobs(tasks)
+        register_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        left_store = store.remaining_tasks(tasks)
+        store_time = time.perf_counter() - start_time
+        assert len(left_files) == len(left_store) == args.tasks - len(finished)
+
+        print(f"tasks={args.tasks} finished={len(finished)} left={len(left_store)}")
+        print(f"  commits:             {len(finished) / commit_time:10.0f} waterbodies/s ({args.dates} dates each)")
+        print(f"  stat() every file:   {stat_time:8.3f}s")
+        print(f"  store re-register:   {register_time:8.3f}s (open + upsert of the planned jobs)")
+        print(f"  store remaining:     {store_time:8.3f}s")
+        print(f"  counts:              {store.counts()}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Overhead of hls_extract.telemetry on an extraction run, against the fake ``ee``.
+
+Runs process_fire over --lakes synthetic lakes, alternately without
+telemetry and with JSON-lines and Prometheus export, and reports the median
+wall time of each over --repeats runs. Since the difference is within the
+run-to-run noise, the overhead is also computed directly: the cost of one
+span, timed call and state count, measured in a tight loop, times the
+number of each recorded in the run, over the run's wall time. The script
+asserts that this is under 1% and that the exports hold every waterbody
+and request.
+
+    python bench_telemetry.py --lakes 20 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from bench_scheduler import synthetic_fires, synthetic_lakes
+from hls_extract import fake_ee
+
+
+def run(process_fire, tasks, folder, **kwargs):
+    output_folder = tempfile.mkdtemp(dir=folder)
+    fake_ee.reset_stats()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for hylak_id, start, end in tasks:
+            process_fire((hylak_id, output_folder, start, end), **kwargs)
+    return time.perf_counter() - start_time
+
+
+def unit_costs(telemetry, n=20000):
+    # Seconds per span, per timed call (around a no-op) and per state count
+    start_time = time.perf_counter()
+    for i in range(n):
+        with telemetry.span('bench', i):
+            pass
+    span = (time.perf_counter() - start_time) / n
+    timed = telemetry.timed(lambda obj: None)
+    start_time = time.perf_counter()
+    for _ in range(n):
+        timed(None)
+    call = (time.perf_counter() - start_time) / n
+    start_time = time.perf_counter()
+    for i in range(n):
+        telemetry.count_state('bench', i)
+    state = (time.perf_counter() - start_time) / n
+    return span, call, state
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lakes', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per getInfo() call')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--batched', action='store_true')
+    args = parser.parse_args()
+
+    fake_ee.install(latency=args.latency)
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import WaterbodyIndex
+    from hls_extract.telemetry import Telemetry
+
+    lakes = synthetic_lakes(args.lakes)
+    waterbodies = WaterbodyIndex(lakes, 'Hylak_id')
+    tasks = synthetic_fires(lakes)
+
+    times = {'off': [], 'on': []}
+    with tempfile.TemporaryDirectory() as folder:
+        jsonl, prom = os.path.join(folder, 'spans.jsonl'), os.path.join(folder, 'extract.prom')
+        for repeat in range(args.repeats):
+            times['off'].append(run(process_fire, tasks, folder, waterbodies=waterbodies, batched=args.batched))
+            if repeat == args.repeats - 1:
+                for path in (jsonl, prom):
+                    if os.path.exists(path):
+                        os.remove(path)
+            telemetry = Telemetry(jsonl, prom)
+            times['on'].append(run(process_fire, tasks, folder, waterbodies=waterbodies, batched=args.batched,
+                                   telemetry=telemetry))
+            telemetry.close()
+
+        # The exports of the last run
+        summary = telemetry.summary()
+        with open(jsonl) as file:
+            records = [json.loads(line) for line in file]
+        with open(prom) as file:
+            text = file.read()
+        span_cost, call_cost, state_cost = unit_costs(Telemetry(os.path.join(folder, 'unit.jsonl')))
+
+    calls = sum(h['count'] for h in summary['calls'].values())
+    spans = sum(h['count'] for h in summary['stages'].values())
+    states = sum(summary['waterbodies'].values())
+    assert states == args.lakes and calls == fake_ee.round_trips(), summary
+    assert sum('stage' in r for r in records) == spans and 'summary' in records[-1]
+    assert f'hls_extract_waterbodies_total{{state="done"}} {summary["waterbodies"].get("done", 0)}' in text
+
+    off, on = statistics.median(times['off']), statistics.median(times['on'])
+    overhead = spans * span_cost + calls * call_cost + states * state_cost
+    print(f"{args.lakes} lakes, {calls} EE calls, {spans} spans")
+    for stage, h in sorted(summary['stages'].items(), key=lambda item: -item[1]['sum']):
+        print(f"{stage:>12}: {h['sum']:7.3f}s in {h['count']} spans")
+    for kind, h in sorted(summary['calls'].items(), key=lambda item: -item[1]['sum']):
+        print(f"{kind:>12}: {h['sum']:7.3f}s in {h['count']} calls")
+    print(f"wall time: {off:.3f}s without, {on:.3f}s with telemetry ({on / off - 1:+.2%}, median of {args.repeats})")
+    print(f"per span {span_cost * 1e6:.1f} us, per call {call_cost * 1e6:.1f} us, per state {state_cost * 1e6:.1f} us"
+          f" -> {overhead * 1e3:.1f} ms = {overhead / on:.3%} of the run")
+    assert overhead / on < 0.01
+
+
+if __name__ == "__main__":
+    main()
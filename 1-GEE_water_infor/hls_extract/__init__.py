@@ -0,0 +1 @@
+"""Shared helpers for the HLS water extraction scripts (Lake-0-for.py, River-0-for.py)."""
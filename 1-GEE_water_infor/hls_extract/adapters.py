@@ -0,0 +1,26 @@
+"""What differs between lakes and river reaches: ID column, output header and size filter."""
+
+
+class WaterbodyAdapter:
+    def __init__(self, name, id_column, label, area_column=None, max_area=None,
+                 start_column='earliest_initialdat', end_column='latest_finaldate'):
+        self.name = name
+        self.id_column = id_column
+        self.label = label  # Written in the output header, e.g. "Hylak ID: 123 ImageNum: 4"
+        self.area_column = area_column
+        self.max_area = max_area
+        self.start_column = start_column
+        self.end_column = end_column
+
+    def skip(self, row):
+        # Waterbodies too large for a per-polygon median are left out
+        return self.max_area is not None and row[self.area_column] > self.max_area
+
+    def __repr__(self):
+        return f"WaterbodyAdapter({self.name!r}, id_column={self.id_column!r})"
+
+
+LAKE = WaterbodyAdapter('lake', 'Hylak_id', 'Hylak ID', area_column='Lake_area', max_area=900)
+RIVER = WaterbodyAdapter('river', 'reach_id', 'reach ID')
+
+ADAPTERS = {adapter.name: adapter for adapter in (LAKE, RIVER)}
@@ -0,0 +1,136 @@
+"""On-disk, content-addressed cache of ``getInfo()`` responses.
+
+Rerunning an extraction after changing the output format or a downstream
+step asks Earth Engine the same questions again. Here every response is
+stored in SQLite under the SHA-256 of the serialized expression graph and a
+hash of the waterbody geometry, so an identical request is answered from
+disk. Entries older than ``ttl`` seconds are treated as missing, and when
+the stored responses exceed ``max_bytes`` the least recently used ones are
+evicted. Errors are never cached.
+"""
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+import ee
+
+MAX_BYTES = 1 << 30
+EVICT_TO = 0.9  # Fraction of max_bytes left after an eviction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def get_info(obj):
+    # Uncached request, the default of the fetch functions
+    return obj.getInfo()
+
+
+def geometry_key(geometries):
+    """Hash of the waterbody geometries (shapely objects, or anything with a stable repr)."""
+    digest = hashlib.sha256()
+    for geometry in geometries:
+        digest.update(getattr(geometry, 'wkb', None) or repr(geometry).encode())
+    return digest.hexdigest()
+
+
+def cache_key(obj, geometry=''):
+    graph = ee.serializer.toJSON(obj)
+    return hashlib.sha256(f'{geometry}\n{graph}'.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=MAX_BYTES, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._stats = dict.fromkeys(('hits', 'misses', 'expired', 'evictions'), 0)
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Return ``(found, info)``; an expired entry is deleted and counts as a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._bytes -= row[1]
+                self._stats['expired'] += 1
+                row = None
+            if row is None:
+                self._stats['misses'] += 1
+                return False, None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._stats['hits'] += 1
+        return True, json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, info):
+        value = zlib.compress(json.dumps(info, separators=(',', ':')).encode(), 1)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                               (key, value, len(value), now, now))
+            self._bytes += len(value) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop the least recently used entries down to EVICT_TO of the limit, in one transaction
+        target = self.max_bytes * EVICT_TO
+        keys = []
+        cursor = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed")
+        for key, size in cursor:
+            if self._bytes <= target:
+                break
+            keys.append((key,))
+            self._bytes -= size
+        cursor.close()
+        self._conn.execute('BEGIN IMMEDIATE')
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+        self._conn.execute('COMMIT')
+        self._stats['evictions'] += len(keys)
+
+    def get_info(self, obj, geometry=''):
+        """``obj.getInfo()``, answered from the cache when the same request was made before."""
+        key = cache_key(obj, geometry)
+        found, info = self.get(key)
+        if not found:
+            info = obj.getInfo()  # Outside the lock, so threads still request in parallel
+            self.put(key, info)
+        return info
+
+    def bind(self, geometry):
+        """A ``get_info(obj)`` function for requests about one waterbody."""
+        return functools.partial(self.get_info, geometry=geometry)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, bytes=self._bytes)
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / requests if requests else 0.0
+        return stats
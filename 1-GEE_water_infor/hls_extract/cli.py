@@ -0,0 +1,169 @@
+"""Command line entry point shared by Lake-0-for.py, River-0-for.py and ``python -m hls_extract``."""
+import argparse
+import os
+import time
+
+import ee
+import pandas as pd
+from tqdm import tqdm
+
+from .adapters import ADAPTERS
+from .batched import CHUNK_SIZE
+from .cache import MAX_BYTES, ResponseCache, get_info
+from .extract import process_fire
+from .imagery import CLOUD_SCALE
+from .geometry_index import load_waterbodies
+from .planning import plan_summary, plan_tasks
+from .scheduler import run_tasks
+from .shards import parse_shard, shard_path, shard_tasks
+from .spatial import MAX_MEMBERS, cluster_summary, lookup_tiles, plan_clusters, process_cluster
+from .store import ResultStore
+from .telemetry import Telemetry
+
+
+def build_parser(adapter=None):
+    parser = argparse.ArgumentParser(description="Extract HLS band medians for waterbodies affected by fires.")
+    if adapter is None:
+        parser.add_argument('waterbody', choices=sorted(ADAPTERS), help='Waterbody type')
+    parser.add_argument('--fires', help='CSV with one row per fire (ID, start and end date)')
+    parser.add_argument('--shapefile', help='Waterbody polygons with the matching ID column')
+    parser.add_argument('--output', help='Folder for the per-waterbody .txt results')
+    parser.add_argument('--store', default=None,
+                        help='SQLite result store with a job manifest, used instead of --output')
+    parser.add_argument('--shard', default=None,
+                        help='Run only shard INDEX/COUNT of the waterbodies (0-based), into its own --store file')
+    parser.add_argument('--retry-failed', action='store_true', help='With --store, also rerun failed waterbodies')
+    parser.add_argument('--status', action='store_true', help='With --store, print job counts and exit')
+    parser.add_argument('--geometry-cache', default=None,
+                        help='Parquet file caching the shapefile geometries (created on first run)')
+    parser.add_argument('--simplify', type=float, default=None,
+                        help='Simplify polygons with this tolerance (in shapefile units) before caching')
+    parser.add_argument('--proxy', default=None, help='HTTP(S) proxy for Earth Engine, e.g. http://127.0.0.1:7890')
+    parser.add_argument('--project', default=None, help='Earth Engine cloud project')
+    parser.add_argument('--workers', type=int, default=8, help='Number of concurrent waterbodies')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Max task starts per second per worker')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries on quota/transient EE errors')
+    parser.add_argument('--backoff', type=float, default=2.0, help='Initial retry delay in seconds')
+    parser.add_argument('--batched', action='store_true', help='Fetch all dates of a waterbody in one request')
+    parser.add_argument('--cloud-scale', type=float, default=CLOUD_SCALE,
+                        help='Scale in metres of the cloud-fraction estimate; coarser is cheaper')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Dates per request in batched mode')
+    parser.add_argument('--clusters', action='store_true',
+                        help='Reduce waterbodies on the same HLS tile and season together with reduceRegions')
+    parser.add_argument('--max-cluster', type=int, default=MAX_MEMBERS, help='Waterbodies per cluster')
+    parser.add_argument('--metrics-jsonl', default=None, help='Append per-stage spans and EE errors to this file')
+    parser.add_argument('--metrics-prom', default=None,
+                        help='Prometheus textfile with stage/EE call histograms and waterbody counters')
+    parser.add_argument('--cache', default=None,
+                        help='SQLite cache of Earth Engine responses, reused by reruns with the same requests')
+    parser.add_argument('--cache-size-mb', type=float, default=MAX_BYTES / 2 ** 20,
+                        help='Evict the least recently used responses above this size')
+    parser.add_argument('--cache-ttl-days', type=float, default=None, help='Refetch responses older than this')
+    return parser
+
+
+def main(argv=None, adapter=None):
+    parser = build_parser(adapter)
+    args = parser.parse_args(argv)
+    adapter = adapter or ADAPTERS[args.waterbody]
+
+    shard = None
+    if args.shard:
+        if not args.store:
+            parser.error('--shard needs --store')
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        args.store = shard_path(args.store, *shard)
+    store = ResultStore(args.store) if args.store else None
+    if args.status:
+        if store is None:
+            parser.error('--status needs --store')
+        print(store.counts())
+        return None
+    if not args.fires or not args.shapefile or not (args.output or args.store):
+        parser.error('--fires, --shapefile and one of --output/--store are required')
+
+    if args.proxy:
+        os.environ['HTTP_PROXY'] = args.proxy
+        os.environ['HTTPS_PROXY'] = args.proxy
+
+    ee.Authenticate()
+    ee.Initialize(project=args.project)
+
+    wildfire_data = pd.read_csv(args.fires, low_memory=False)
+
+    output_folder = args.output
+    if output_folder and not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    waterbodies = load_waterbodies(args.shapefile, adapter, args.geometry_cache, args.simplify)
+
+    # One task per waterbody, carrying all of its fires
+    tasks = plan_tasks(wildfire_data, adapter, output_folder or '')
+    print(plan_summary(tasks))
+    if shard is not None:
+        planned = len(tasks)
+        tasks = shard_tasks(tasks, *shard)
+        print(f"Shard {args.shard}: {len(tasks)} of {planned} waterbodies -> {args.store}")
+    if store is not None:
+        store.add_jobs(tasks)
+        tasks = store.remaining_tasks(tasks, args.retry_failed)
+        print(f"{len(tasks)} waterbodies left, job states: {store.counts()}")
+
+    cache = None
+    if args.cache:
+        ttl = args.cache_ttl_days * 86400 if args.cache_ttl_days is not None else None
+        cache = ResponseCache(args.cache, int(args.cache_size_mb * 2 ** 20), ttl)
+
+    telemetry = Telemetry(args.metrics_jsonl, args.metrics_prom)
+
+    if args.clusters:
+        # Each task becomes a (label, tile, tasks) cluster of waterbodies
+        if store is None:
+            tasks = [task for task in tasks if not os.path.exists(os.path.join(task[1], f"{task[0]}.txt"))]
+        with telemetry.span('tiles'):
+            tiles = lookup_tiles(tasks, waterbodies, args.chunk_size,
+                                 telemetry.timed(get_info if cache is None else cache.get_info))
+        tasks = plan_clusters(tasks, tiles, waterbodies, args.max_cluster)
+        print(cluster_summary(tasks))
+
+        def process(cluster):
+            process_cluster(cluster, waterbodies, adapter, args.chunk_size, store, args.cloud_scale, cache,
+                            telemetry)
+    else:
+        def process(task):
+            process_fire(task, waterbodies, adapter, args.batched, args.chunk_size, store, args.cloud_scale, cache,
+                         telemetry)
+
+    started = time.time()
+    with tqdm(total=len(tasks)) as progress:
+        report = run_tasks(
+            process,
+            tasks,
+            workers=args.workers,
+            rate_limit=args.rate_limit,
+            max_retries=args.max_retries,
+            backoff=args.backoff,
+            progress=progress,
+        )
+
+    print(report)
+    for task, e in report.failed:
+        for member in task[2] if args.clusters else [task]:
+            telemetry.count_state('failed', member[0])
+            if store is not None:
+                store.commit(member[0], 'failed', error=str(e))
+    telemetry.close()
+    if cache is not None:
+        print(f"Response cache: {cache.stats()}")
+    if store is not None:
+        store.record_run(started, report.elapsed, len(tasks), report.done, len(report.failed), report.retries,
+                         args.shard)
+        print(f"Job states: {store.counts()}")
+    if report.interrupted or report.failed:
+        print("Some tasks did not finish; rerun to process the remaining waterbodies.")
+    else:
+        print("All tasks are completed.")
+    return report
@@ -0,0 +1,133 @@
+"""Per-waterbody extraction: band medians of every cloud-free date around a fire."""
+import os
+import time
+
+import ee
+
+from .adapters import LAKE
+from .batched import CHUNK_SIZE, fetch_medians
+from .cache import get_info as fetch_info
+from .imagery import CLOUD_SCALE, SELECTED_BANDS, build_collection, mosaic_by_date
+from .output import write_result
+from .planning import fire_blocks, fire_window, merge_windows
+from .scheduler import is_quota_error
+from .telemetry import NULL_TELEMETRY
+
+
+def fetch_per_image(image_collection, geometry, selectedBands, get_info=fetch_info):
+    # One getInfo() per image date and median: 2N + 4 round trips
+    raw_size = get_info(image_collection.size())
+
+    image_collection = mosaic_by_date(image_collection)
+
+    def is_image_collection_empty(image_collection):
+        try:
+            return get_info(image_collection.size()) == 0
+        except ee.EEException as e:
+            if is_quota_error(e):
+                raise  # Retried by the scheduler, never recorded as 'empty'
+            return True
+
+    if is_image_collection_empty(image_collection):
+        return raw_size, 0, []
+
+    image_num = get_info(image_collection.size())
+    records = []
+    for i in range(get_info(image_collection.size())):
+        start_time = time.time()
+        image = ee.Image(image_collection.toList(image_collection.size()).get(i)).clip(geometry)
+        date = get_info(image.get('date'))
+
+        result_median = image.select(selectedBands).reduceRegion(
+            reducer=ee.Reducer.median(),
+            geometry=geometry,
+            scale=30,
+            maxPixels=1e9,
+        )
+
+        a = get_info(result_median)
+        records.append((date, list(a.values()), time.time() - start_time))
+    return raw_size, image_num, records
+
+
+def unpack_task(args):
+    # (id, folder, [(start, end), ...]) from planning, or a single (id, folder, start, end) fire
+    if len(args) == 4:
+        waterbody_id, output_folder, fire_start_time, fire_end_time = args
+        return waterbody_id, output_folder, [(fire_start_time, fire_end_time)]
+    return args
+
+
+def extract_waterbody(waterbody_id, fires, waterbodies, adapter=LAKE, batched=False, chunk_size=CHUNK_SIZE,
+                      cloud_scale=CLOUD_SCALE, cache=None, telemetry=NULL_TELEMETRY):
+    """Return ``(state, blocks, error)`` for one waterbody and all of its fires.
+
+    ``state`` is 'done', 'empty' (no usable date), 'skipped' (filtered out by
+    the adapter) or 'failed' (non-transient EE error, message in ``error``).
+    ``blocks`` holds one ``(fire_start, fire_end, image_num, rows)`` per fire
+    with imagery, rows being ``(date, medians, seconds)``. Quota errors are
+    raised so the scheduler can back off and retry. With a ResponseCache
+    ``cache``, requests already answered for this geometry are read from disk.
+    Each step is timed as a span of ``telemetry``.
+    """
+    selectedBands = SELECTED_BANDS
+
+    # waterbodies is a WaterbodyIndex: positional lookup, geometry converted once per ID
+    with telemetry.span('lookup', waterbody_id):
+        filtered_gdf = waterbodies.rows(waterbody_id)
+        skip = adapter.skip(filtered_gdf.iloc[0])
+    if skip:
+        return 'skipped', [], None
+    with telemetry.span('geometry', waterbody_id):
+        geometry = waterbodies.ee_geometry(waterbody_id)
+    get_info = fetch_info if cache is None else cache.bind(waterbodies.geometry_key(waterbody_id))
+    get_info = telemetry.timed(get_info)
+
+    # Query each merged window once and fan the dates back out to the fires
+    windows = [fire_window(fire_start_time, fire_end_time) for fire_start_time, fire_end_time in fires]
+    records = []
+    for start_time, end_time in merge_windows(windows):
+        with telemetry.span('collection', waterbody_id):
+            image_collection = build_collection(geometry, start_time, end_time, cloud_scale)
+            mosaicked = mosaic_by_date(image_collection) if batched else None
+        try:
+            with telemetry.span('fetch', waterbody_id):
+                if batched:
+                    # One round trip per chunk of dates instead of 2N + 4
+                    raw_size, _, window_records = fetch_medians(
+                        image_collection, mosaicked, geometry, selectedBands, chunk_size, get_info=get_info)
+                else:
+                    raw_size, _, window_records = fetch_per_image(image_collection, geometry, selectedBands,
+                                                                  get_info)
+        except ee.ee_exception.EEException as e:
+            if is_quota_error(e):
+                raise  # Let the scheduler back off and retry
+            print("Error:", e)
+            return 'failed', [], str(e)
+        print(start_time, end_time, raw_size)
+        records += window_records
+
+    with telemetry.span('fan_out', waterbody_id):
+        blocks = fire_blocks(waterbody_id, fires, windows, records)
+    if not blocks:
+        print("The processed image collection is empty. Skipping.")
+        return 'empty', [], None
+    return 'done', blocks, None
+
+
+# Process fire-related data for a given lake or reach
+def process_fire(args, waterbodies, adapter=LAKE, batched=False, chunk_size=CHUNK_SIZE, store=None,
+                 cloud_scale=CLOUD_SCALE, cache=None, telemetry=NULL_TELEMETRY):
+    waterbody_id, output_folder, fires = unpack_task(args)
+    output_file_path = os.path.join(output_folder, f"{waterbody_id}.txt")
+    if store is None and os.path.exists(output_file_path):
+        return  # Skip if the file already exists; with a store only remaining jobs are scheduled
+
+    print(f"Processing fire index: {waterbody_id}")
+
+    state, blocks, error = extract_waterbody(waterbody_id, fires, waterbodies, adapter, batched, chunk_size,
+                                             cloud_scale, cache, telemetry)
+
+    with telemetry.span('write', waterbody_id):
+        write_result(waterbody_id, output_folder, adapter, state, blocks, error, store)
+    telemetry.count_state(state, waterbody_id)
@@ -0,0 +1,1178 @@
+"""Local stand-in for the ``ee`` (Earth Engine) module.
+
+Covers the part of the Earth Engine API used by the extraction scripts.
+Objects build a lazy expression graph, and nothing is computed until
+``getInfo()`` evaluates it against deterministic synthetic HLS L30 scenes.
+Each ``getInfo()`` counts as one server round trip and can be slowed down
+or failed on purpose, so schedulers and batching can be measured offline:
+
+    from hls_extract import fake_ee
+    fake_ee.install(latency=0.05, failure_rate=0.02, seed=0)
+
+    import ee        # -> this module
+    import geemap    # -> shim providing geopandas_to_ee()
+"""
+import json
+import math
+import random
+import sys
+import threading
+import time
+import types
+import warnings
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+
+class EEException(Exception):
+    pass
+
+
+ee_exception = types.SimpleNamespace(EEException=EEException)
+
+# Synthetic catalogue: HLS tiles are 1 degree cells whose footprints overlap
+# by TILE_MARGIN, revisited every REVISIT_DAYS (Landsat 8 + 9).
+TILE_MARGIN = 0.05
+REVISIT_DAYS = 8
+NATIVE_SCALE = 30
+BANDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+WATER_REFLECTANCE = [0.05, 0.05, 0.06, 0.04, 0.02, 0.01, 0.005]
+LAND_REFLECTANCE = [0.06, 0.07, 0.10, 0.12, 0.30, 0.22, 0.14]
+
+QUOTA_MESSAGES = [
+    'Too many concurrent aggregations.',
+    'Quota exceeded: too many requests, please retry later.',
+    'Computation timed out.',
+]
+
+
+def _crc(*parts):
+    return zlib.crc32('|'.join(str(p) for p in parts).encode())
+
+
+# ---------------------------------------------------------------------------
+# Backend: latency / failure injection and round-trip accounting
+# ---------------------------------------------------------------------------
+
+class _Backend:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configure()
+
+    def configure(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        with self.lock:
+            self.latency = latency
+            self.jitter = jitter
+            self.failure_rate = failure_rate
+            self.rng = random.Random(seed)
+            self.calls = Counter()
+            self.failures = 0
+
+    def request(self, node):
+        with self.lock:
+            self.calls[node.func or 'variable'] += 1
+            delay = self.latency * (1 + self.jitter * (2 * self.rng.random() - 1))
+            fail = self.rng.random() < self.failure_rate
+            message = self.rng.choice(QUOTA_MESSAGES)
+            if fail:
+                self.failures += 1
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise EEException(message)
+        evaluator = _Evaluator()
+        return _to_info(evaluator.eval(node))
+
+
+_backend = _Backend()
+
+
+def configure(latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+    """Set injected latency (seconds per call), jitter and failure rate; resets counters."""
+    _backend.configure(latency, jitter, failure_rate, seed)
+
+
+def round_trips():
+    """Total number of getInfo() calls since the last configure()/reset_stats()."""
+    with _backend.lock:
+        return sum(_backend.calls.values())
+
+
+def call_counts():
+    """getInfo() calls broken down by the outermost function of the request."""
+    with _backend.lock:
+        return Counter(_backend.calls)
+
+
+def injected_failures():
+    with _backend.lock:
+        return _backend.failures
+
+
+def reset_stats():
+    with _backend.lock:
+        _backend.calls = Counter()
+        _backend.failures = 0
+
+
+def Authenticate(*args, **kwargs):
+    pass
+
+
+def Initialize(*args, **kwargs):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Client side: expression graph
+# ---------------------------------------------------------------------------
+
+_trace = threading.local()
+
+
+class ComputedObject:
+    """A node of the expression graph; any method call adds a new node."""
+
+    def __init__(self, func, args=None, varName=None):
+        self.func = func
+        self.args = args or {}
+        self.varName = varName
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return ComputedObject(name, {'this': self, 'args': list(args), 'kwargs': kwargs})
+
+        method.__name__ = name
+        return method
+
+    def map(self, algorithm, *args, **kwargs):
+        # Trace the Python callback once with a placeholder variable, the
+        # same way the real client library does.
+        depth = getattr(_trace, 'depth', 0)
+        var = ComputedObject(None, varName=f'_MAPPING_VAR_{depth}')
+        _trace.depth = depth + 1
+        try:
+            body = algorithm(var)
+        finally:
+            _trace.depth = depth
+        return ComputedObject('map', {'this': self, 'var': var, 'body': body})
+
+    def getInfo(self):
+        return _backend.request(self)
+
+    def serialize(self):
+        return json.dumps(_encode(self), sort_keys=True, separators=(',', ':'))
+
+    def __repr__(self):
+        return f'ee.{self.func or self.varName}(...)'
+
+
+def _static(func, *args, **kwargs):
+    return ComputedObject(func, {'args': list(args), 'kwargs': kwargs})
+
+
+class _Namespace:
+    """Static constructors such as ee.Filter.eq or ee.Reducer.median."""
+
+    def __init__(self, prefix):
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return _static(f'{self._prefix}.{name}', *args, **kwargs)
+
+        return method
+
+    def __call__(self, *args, **kwargs):
+        if len(args) == 1 and not kwargs and isinstance(args[0], ComputedObject):
+            return args[0]
+        return _static(self._prefix, *args, **kwargs)
+
+
+def _cast(name, convert=False):
+    # Casting a computed object only changes its client-side type, except for
+    # types like Date whose server-side value needs an actual conversion.
+    def constructor(value=None, *args, **kwargs):
+        if isinstance(value, ComputedObject) and not args and not kwargs and not convert:
+            return value
+        return _static(name, value, *args, **kwargs)
+
+    constructor.__name__ = name
+    return constructor
+
+
+Image = _cast('Image')
+ImageCollection = _cast('ImageCollection', convert=True)
+List = _cast('List')
+Number = _cast('Number')
+String = _cast('String')
+Dictionary = _cast('Dictionary')
+Date = _cast('Date', convert=True)
+Feature = _cast('Feature')
+FeatureCollection = _cast('FeatureCollection', convert=True)
+Geometry = _Namespace('Geometry')
+Filter = _Namespace('Filter')
+Reducer = _Namespace('Reducer')
+Join = _Namespace('Join')
+
+
+def _encode(value):
+    if isinstance(value, ComputedObject):
+        if value.varName is not None:
+            return {'var': value.varName}
+        return {'func': value.func, 'args': _encode(value.args)}
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    return value
+
+
+def count_nodes(obj):
+    """Number of distinct sub-expressions, as the real serializer would emit them."""
+    seen = set()
+
+    def walk(value):
+        if isinstance(value, ComputedObject):
+            key = json.dumps(_encode(value), sort_keys=True)
+            if key in seen:
+                return
+            seen.add(key)
+            walk(value.args)
+        elif isinstance(value, dict):
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                walk(v)
+
+    walk(obj)
+    return len(seen)
+
+
+serializer = types.SimpleNamespace(
+    toJSON=lambda obj: obj.serialize() if isinstance(obj, ComputedObject) else json.dumps(_encode(obj)),
+    encode=_encode,
+)
+
+
+# ---------------------------------------------------------------------------
+# Server side: values
+# ---------------------------------------------------------------------------
+
+class _Geom:
+    """Union of axis-aligned parts, each identified by a stable key."""
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+
+    @property
+    def key(self):
+        return ';'.join(k for k, _ in self.parts)
+
+    def bounds(self):
+        xs0, ys0, xs1, ys1 = zip(*(b for _, b in self.parts))
+        return min(xs0), min(ys0), max(xs1), max(ys1)
+
+    def intersects(self, bounds):
+        x0, y0, x1, y1 = bounds
+        return any(b[0] <= x1 and b[2] >= x0 and b[1] <= y1 and b[3] >= y0 for _, b in self.parts)
+
+
+class _Feature:
+    def __init__(self, geom, props):
+        self.geom = geom
+        self.props = dict(props)
+
+
+class _Img:
+    """Band names, properties and a pixels(region, scale) closure."""
+
+    def __init__(self, bands, pixels, props=None):
+        self.bands = list(bands)
+        self._pixels = pixels
+        self._cache = {}
+        self.props = dict(props or {})
+
+    def pixels(self, region, scale):
+        key = (region.key, scale)
+        if key not in self._cache:
+            self._cache[key] = self._pixels(region, scale)
+        return self._cache[key]
+
+    def derive(self, bands, pixels):
+        return _Img(bands, pixels, self.props)
+
+
+class _Coll:
+    def __init__(self, items, kind='ImageCollection'):
+        self.items = list(items)
+        self.kind = kind
+
+
+class _Catalog:
+    """Unbounded asset collection; materialised once date and bounds are set."""
+
+    def __init__(self, asset_id, start=None, end=None, region=None):
+        self.asset_id = asset_id
+        self.start = start
+        self.end = end
+        self.region = region
+
+    def materialize(self):
+        if self.start is None or self.region is None:
+            raise EEException(
+                f'ImageCollection {self.asset_id}: collection query aborted after accumulating over 5000 elements.')
+        return _Coll(_scenes(self.asset_id, self.start, self.end, self.region))
+
+
+class _Date:
+    def __init__(self, millis):
+        self.millis = int(millis)
+
+    def dt(self):
+        return datetime.fromtimestamp(self.millis / 1000, tz=timezone.utc)
+
+
+class _Filter:
+    def __init__(self, pred=None, pair=None):
+        self.pred = pred
+        self.pair = pair
+
+
+class _Reducer:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, values):
+        if values.size == 0:
+            return None
+        if self.name == 'mean':
+            return float(np.mean(values))
+        if self.name == 'median':
+            return float(np.median(values))
+        if self.name == 'count':
+            return int(values.size)
+        if self.name == 'sum':
+            return float(np.sum(values))
+        if self.name == 'min':
+            return float(np.min(values))
+        if self.name == 'max':
+            return float(np.max(values))
+        if self.name == 'first':
+            return float(values[0])
+        raise EEException(f'Reducer.{self.name} is not supported by the fake backend.')
+
+
+class _Join:
+    def __init__(self, kind, key=None):
+        self.kind = kind
+        self.key = key
+
+
+def _to_millis(value):
+    if isinstance(value, _Date):
+        return value.millis
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        fmt = '%Y-%m-%d' if len(value) <= 10 else '%Y-%m-%dT%H:%M:%S'
+        dt = datetime.strptime(value[:19], fmt).replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1000)
+    raise EEException(f'Date: cannot parse {value!r}')
+
+
+def _props(element):
+    if isinstance(element, (_Img, _Feature)):
+        return element.props
+    if isinstance(element, dict):
+        return element
+    return {'item': element}
+
+
+def _region(value):
+    if isinstance(value, _Geom):
+        return value
+    if isinstance(value, _Feature):
+        return value.geom
+    if isinstance(value, _Coll):
+        return _Geom([p for f in value.items for p in _region(f).parts])
+    raise EEException(f'Expected a geometry, got {type(value).__name__}.')
+
+
+# ---------------------------------------------------------------------------
+# Synthetic HLS scenes
+# ---------------------------------------------------------------------------
+
+def _part_pixels(key, scale):
+    n = 9 + _crc('pixels', key) % 40
+    step = max(1, int(round((scale / NATIVE_SCALE) ** 2)))
+    return np.arange(0, n, step)
+
+
+def _tiles(region):
+    tiles = set()
+    for _, (x0, y0, x1, y1) in region.parts:
+        for tx in range(math.floor(x0 - TILE_MARGIN), math.floor(x1 + TILE_MARGIN) + 1):
+            for ty in range(math.floor(y0 - TILE_MARGIN), math.floor(y1 + TILE_MARGIN) + 1):
+                tiles.add((tx, ty))
+    return sorted(tiles)
+
+
+def _tile_bounds(tile):
+    tx, ty = tile
+    return tx - TILE_MARGIN, ty - TILE_MARGIN, tx + 1 + TILE_MARGIN, ty + 1 + TILE_MARGIN
+
+
+def _scene_image(tile, day):
+    tile_id = f'{tile[0]:+04d}{tile[1]:+03d}'
+    scene_id = f'HLS.L30.T{tile_id}.{day:%Y%j}T000000.v2.0'
+    bounds = _tile_bounds(tile)
+    cloud = (_crc('cloud', scene_id) % 1000 / 1000) ** 2
+
+    def pixels(region, scale):
+        values = {b: [] for b in BANDS + ['Fmask']}
+        masks = []
+        for key, part_bounds in region.parts:
+            idx = _part_pixels(key, scale)
+            n_full = 9 + _crc('pixels', key) % 40
+            water_rng = np.random.default_rng(_crc('water', key))
+            water = water_rng.random(n_full) < 0.5 + 0.45 * water_rng.random()
+            rng = np.random.default_rng(_crc(scene_id, key))
+            noise = rng.normal(1.0, 0.1, size=(len(BANDS), n_full))
+            fmask = ((rng.random(n_full) < cloud) << 1) \
+                | ((rng.random(n_full) < cloud / 3) << 3) \
+                | ((rng.random(n_full) < 0.01) << 4) \
+                | (water << 5)
+            for i, band in enumerate(BANDS):
+                base = np.where(water, WATER_REFLECTANCE[i], LAND_REFLECTANCE[i])
+                values[band].append((base * noise[i])[idx])
+            values['Fmask'].append(fmask[idx].astype(float))
+            inside = _Geom([(key, part_bounds)]).intersects(bounds)
+            masks.append(np.full(len(idx), inside))
+        mask = np.concatenate(masks)
+        return {b: (np.concatenate(v), mask) for b, v in values.items()}
+
+    props = {
+        'system:index': scene_id,
+        'system:time_start': int(day.timestamp() * 1000),
+        'CLOUD_COVERAGE': round(cloud * 100, 2),
+        'MGRS_TILE_ID': tile_id,
+    }
+    return _Img(BANDS + ['Fmask'], pixels, props)
+
+
+def _scenes(asset_id, start, end, region):
+    if 'HLS' not in asset_id:
+        raise EEException(f"Image collection '{asset_id}' not found.")
+    first = datetime.fromtimestamp(start / 1000, tz=timezone.utc)
+    last = datetime.fromtimestamp(end / 1000, tz=timezone.utc)
+    images = []
+    for tile in _tiles(region):
+        if not region.intersects(_tile_bounds(tile)):
+            continue
+        offset = _crc('orbit', tile[0]) % REVISIT_DAYS
+        day = first
+        while day < last:
+            if (day.toordinal() + offset) % REVISIT_DAYS == 0:
+                images.append(_scene_image(tile, day))
+            day += timedelta(days=1)
+    images.sort(key=lambda im: (im.props['system:time_start'], im.props['system:index']))
+    return images
+
+
+# ---------------------------------------------------------------------------
+# Server side: evaluation
+# ---------------------------------------------------------------------------
+
+_STATIC = {}
+_METHODS = {}
+
+
+def _static_impl(name):
+    def register(fn):
+        _STATIC[name] = fn
+        return fn
+    return register
+
+
+def _method_impl(types_, *names):
+    def register(fn):
+        for t in types_ if isinstance(types_, tuple) else (types_,):
+            for name in names:
+                _METHODS[(t, name)] = fn
+        return fn
+    return register
+
+
+def _free_vars(value):
+    if isinstance(value, ComputedObject):
+        cached = value.__dict__.get('_free')
+        if cached is None:
+            if value.varName is not None:
+                cached = frozenset([value.varName])
+            else:
+                cached = _free_vars(value.args)
+                if value.func == 'map':
+                    cached = cached - {value.args['var'].varName} | _free_vars(value.args['this'])
+            value.__dict__['_free'] = cached
+        return cached
+    if isinstance(value, dict):
+        return frozenset().union(*(_free_vars(v) for v in value.values()))
+    if isinstance(value, (list, tuple)):
+        return frozenset().union(*(_free_vars(v) for v in value))
+    return frozenset()
+
+
+class _Evaluator:
+    def __init__(self):
+        self.env = {}
+        self.memo = {}
+
+    def eval(self, value):
+        # Sub-expressions that do not depend on a mapping variable are
+        # computed once per request, like the real server does.
+        if isinstance(value, ComputedObject) and not _free_vars(value):
+            key = id(value)
+            if key not in self.memo:
+                self.memo[key] = (value, self._eval(value))
+            return self.memo[key][1]
+        return self._eval(value)
+
+    def _eval(self, value):
+        if isinstance(value, ComputedObject):
+            if value.varName is not None:
+                return self.env[value.varName]
+            if value.func == 'map':
+                return self._map(value)
+            if 'this' in value.args:
+                this = self.eval(value.args['this'])
+                fn = self._lookup(this, value.func)
+                return fn(this, *self.eval(value.args['args']), **self.eval(value.args['kwargs']))
+            if value.func not in _STATIC:
+                raise EEException(f'Unknown function: {value.func}')
+            return _STATIC[value.func](*self.eval(value.args['args']), **self.eval(value.args['kwargs']))
+        if isinstance(value, dict):
+            return {k: self.eval(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.eval(v) for v in value]
+        return value
+
+    def _lookup(self, this, name):
+        if isinstance(this, _Catalog) and name not in ('filterDate', 'filterBounds'):
+            this = this.materialize()
+        for cls in type(this).__mro__:
+            if (cls, name) in _METHODS:
+                return _METHODS[(cls, name)]
+        raise EEException(f'{type(this).__name__.strip("_")}.{name}: function not supported.')
+
+    def _map(self, node):
+        this = self.eval(node.args['this'])
+        if isinstance(this, _Catalog):
+            this = this.materialize()
+        var = node.args['var'].varName
+        saved = self.env.get(var)
+        out = []
+        try:
+            for element in (this.items if isinstance(this, _Coll) else this):
+                self.env[var] = element
+                out.append(self.eval(node.args['body']))
+        finally:
+            self.env[var] = saved
+        return _Coll(out, this.kind) if isinstance(this, _Coll) else out
+
+
+def _to_info(value):
+    if isinstance(value, _Img):
+        return {'type': 'Image', 'bands': [{'id': b} for b in value.bands], 'properties': _to_info(value.props)}
+    if isinstance(value, _Feature):
+        geometry = None if value.geom is None else _to_info(value.geom)
+        return {'type': 'Feature', 'geometry': geometry, 'properties': _to_info(value.props)}
+    if isinstance(value, _Coll):
+        return {'type': value.kind, 'features': [_to_info(v) for v in value.items]}
+    if isinstance(value, _Catalog):
+        return _to_info(value.materialize())
+    if isinstance(value, _Geom):
+        x0, y0, x1, y1 = value.bounds()
+        return {'type': 'Polygon', 'coordinates': [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]}
+    if isinstance(value, _Date):
+        return {'type': 'Date', 'value': value.millis}
+    if isinstance(value, dict):
+        return {k: _to_info(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_info(v) for v in value]
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, (_Filter, _Reducer, _Join)):
+        raise EEException(f'{type(value).__name__.strip("_")} cannot be fetched with getInfo().')
+    return value
+
+
+# --- constructors -----------------------------------------------------------
+
+@_static_impl('Image')
+def _image(value=None):
+    if isinstance(value, _Img):
+        return value
+    if isinstance(value, (int, float)):
+        return _constant(value)
+    raise EEException(f'Image: cannot load {value!r} in the fake backend.')
+
+
+def _constant(value):
+    def pixels(region, scale):
+        n = sum(len(_part_pixels(k, scale)) for k, _ in region.parts)
+        return {'constant': (np.full(n, float(value)), np.ones(n, bool))}
+    return _Img(['constant'], pixels)
+
+
+@_static_impl('ImageCollection')
+def _image_collection(value):
+    if isinstance(value, str):
+        return _Catalog(value)
+    if isinstance(value, _Catalog):
+        return value
+    if isinstance(value, _Coll):
+        return _Coll(value.items)
+    return _Coll(value)
+
+
+@_static_impl('List')
+def _list(value):
+    return list(value.items) if isinstance(value, _Coll) else list(value)
+
+
+@_static_impl('Number')
+def _number(value):
+    return value
+
+
+@_static_impl('String')
+def _string(value):
+    return str(value)
+
+
+@_static_impl('Dictionary')
+def _dictionary(value=None):
+    return dict(value or {})
+
+
+@_static_impl('Date')
+def _date(value, tz=None):
+    return _Date(_to_millis(value))
+
+
+@_static_impl('Feature')
+def _feature(geom=None, props=None):
+    if isinstance(geom, _Feature):
+        return geom
+    return _Feature(None if geom is None else _region(geom), props or {})
+
+
+@_static_impl('FeatureCollection')
+def _feature_collection(value):
+    if isinstance(value, _Coll):
+        return _Coll(value.items, 'FeatureCollection')
+    if isinstance(value, (_Feature, _Geom)):
+        value = [value]
+    return _Coll([v if isinstance(v, _Feature) else _Feature(v, {}) for v in value], 'FeatureCollection')
+
+
+@_static_impl('Geometry.Rectangle')
+def _rectangle(coords, proj=None, geodesic=None, key=None):
+    coords = [float(c) for c in coords]
+    key = key or ','.join(f'{c:.6f}' for c in coords)
+    return _Geom([(key, tuple(coords))])
+
+
+for _name in ('mean', 'median', 'count', 'sum', 'min', 'max', 'first'):
+    _STATIC[f'Reducer.{_name}'] = (lambda n: lambda *a, **k: _Reducer(n))(_name)
+
+
+def _compare(op):
+    def build(name, value):
+        def pred(element):
+            v = _props(element).get(name)
+            return v is not None and op(v, value)
+        return _Filter(pred)
+    return build
+
+
+_STATIC['Filter.eq'] = _compare(lambda a, b: a == b)
+_STATIC['Filter.neq'] = _compare(lambda a, b: a != b)
+_STATIC['Filter.lt'] = _compare(lambda a, b: a < b)
+_STATIC['Filter.lte'] = _compare(lambda a, b: a <= b)
+_STATIC['Filter.gt'] = _compare(lambda a, b: a > b)
+_STATIC['Filter.gte'] = _compare(lambda a, b: a >= b)
+_STATIC['Filter.inList'] = lambda name, values: _Filter(lambda e: _props(e).get(name) in values)
+
+
+@_static_impl('Filter.And')
+def _filter_and(*filters):
+    return _Filter(lambda e: all(f.pred(e) for f in filters))
+
+
+@_static_impl('Filter.equals')
+def _filter_equals(leftField=None, rightValue=None, rightField=None, leftValue=None):
+    if rightField is not None:
+        return _Filter(pair=lambda a, b: _props(a).get(leftField) == _props(b).get(rightField))
+    return _Filter(lambda e: _props(e).get(leftField) == rightValue)
+
+
+@_static_impl('Filter.maxDifference')
+def _filter_max_difference(difference, leftField=None, rightValue=None, rightField=None, leftValue=None):
+    def close(a, b):
+        return a is not None and b is not None and abs(a - b) <= difference
+    if rightField is not None:
+        return _Filter(pair=lambda a, b: close(_props(a).get(leftField), _props(b).get(rightField)))
+    return _Filter(lambda e: close(_props(e).get(leftField), rightValue))
+
+
+@_static_impl('Join.saveAll')
+def _join_save_all(matchesKey, ordering=None, ascending=True, measureKey=None, outer=False):
+    return _Join('saveAll', matchesKey)
+
+
+@_static_impl('Join.saveFirst')
+def _join_save_first(matchesKey, ordering=None, ascending=True, measureKey=None, outer=False):
+    return _Join('saveFirst', matchesKey)
+
+
+# --- images -----------------------------------------------------------------
+
+def _band_list(args):
+    if len(args) == 1 and isinstance(args[0], (list, tuple)):
+        return list(args[0])
+    return list(args)
+
+
+@_method_impl(_Img, 'select')
+def _select(img, *bands, **kwargs):
+    names = _band_list(bands) if bands else _band_list([kwargs.get('bandSelectors')])
+    new_names = kwargs.get('newNames') or names
+    missing = [b for b in names if b not in img.bands]
+    if missing:
+        raise EEException(f"Image.select: Pattern '{missing[0]}' did not match any bands.")
+
+    def pixels(region, scale):
+        src = img.pixels(region, scale)
+        return {new: src[old] for old, new in zip(names, new_names)}
+    return img.derive(new_names, pixels)
+
+
+@_method_impl(_Img, 'rename')
+def _rename(img, *names):
+    names = _band_list(names)
+
+    def pixels(region, scale):
+        src = img.pixels(region, scale)
+        return {new: src[old] for old, new in zip(img.bands, names)}
+    return img.derive(names, pixels)
+
+
+def _binary(op):
+    def apply(img, other):
+        if not isinstance(other, _Img):
+            other = _constant(other)
+
+        def pixels(region, scale):
+            a = img.pixels(region, scale)
+            b = other.pixels(region, scale)
+            out = {}
+            for i, band in enumerate(img.bands):
+                bv, bm = b[other.bands[i if len(other.bands) > 1 else 0]]
+                av, am = a[band]
+                out[band] = (op(av, bv).astype(float), am & bm)
+            return out
+        return img.derive(img.bands, pixels)
+    return apply
+
+
+for _name, _op in {
+    'bitwiseAnd': lambda a, b: a.astype(np.int64) & b.astype(np.int64),
+    'bitwiseOr': lambda a, b: a.astype(np.int64) | b.astype(np.int64),
+    'eq': np.equal, 'neq': np.not_equal, 'lt': np.less, 'lte': np.less_equal,
+    'gt': np.greater, 'gte': np.greater_equal,
+    'And': lambda a, b: (a != 0) & (b != 0), 'Or': lambda a, b: (a != 0) | (b != 0),
+    'add': np.add, 'subtract': np.subtract, 'multiply': np.multiply, 'divide': np.divide,
+}.items():
+    _METHODS[(_Img, _name)] = _binary(_op)
+
+
+@_method_impl(_Img, 'Not')
+def _not(img):
+    return _binary(lambda a, b: a == 0)(img, 0)
+
+
+@_method_impl(_Img, 'float', 'toFloat')
+def _to_float(img):
+    return img
+
+
+@_method_impl(_Img, 'updateMask')
+def _update_mask(img, mask):
+    def pixels(region, scale):
+        src = img.pixels(region, scale)
+        m = mask.pixels(region, scale)
+        out = {}
+        for i, band in enumerate(img.bands):
+            mv, mm = m[mask.bands[i if len(mask.bands) > 1 else 0]]
+            v, vm = src[band]
+            out[band] = (v, vm & mm & (mv != 0))
+        return out
+    return img.derive(img.bands, pixels)
+
+
+@_method_impl(_Img, 'normalizedDifference')
+def _normalized_difference(img, bands=None):
+    first, second = bands or img.bands[:2]
+
+    def pixels(region, scale):
+        src = img.pixels(region, scale)
+        (a, am), (b, bm) = src[first], src[second]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nd = (a - b) / (a + b)
+        # As in Earth Engine, a negative input masks the pixel
+        return {'nd': (nd, am & bm & (a >= 0) & (b >= 0) & np.isfinite(nd))}
+    return img.derive(['nd'], pixels)
+
+
+@_method_impl(_Img, 'expression')
+def _expression(img, expression, mapping=None):
+    mapping = mapping or {}
+
+    def pixels(region, scale):
+        arrays = {}
+        mask = None
+        for name, band_img in mapping.items():
+            v, m = band_img.pixels(region, scale)[band_img.bands[0]]
+            arrays[name] = v
+            mask = m if mask is None else mask & m
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = eval(expression, {'__builtins__': {}}, arrays)
+        return {'constant': (np.asarray(result, float), mask & np.isfinite(result))}
+    return img.derive(['constant'], pixels)
+
+
+@_method_impl(_Img, 'addBands')
+def _add_bands(img, other, names=None, overwrite=False):
+    added = [b for b in (names or other.bands)]
+    bands = [b for b in img.bands if overwrite is False or b not in added]
+    bands += [b for b in added if b not in bands]
+
+    def pixels(region, scale):
+        out = dict(img.pixels(region, scale))
+        extra = other.pixels(region, scale)
+        for b in added:
+            if overwrite or b not in out:
+                out[b] = extra[b]
+        return out
+    return img.derive(bands, pixels)
+
+
+@_method_impl(_Img, 'clip')
+def _clip(img, geometry):
+    _region(geometry)
+    return img.derive(img.bands, img.pixels)
+
+
+@_method_impl(_Img, 'set')
+@_method_impl(_Feature, 'set')
+def _set(element, *args):
+    updates = args[0] if len(args) == 1 else dict(zip(args[::2], args[1::2]))
+    copy = _Img(element.bands, element.pixels, element.props) if isinstance(element, _Img) \
+        else _Feature(element.geom, element.props)
+    copy.props.update(updates)
+    return copy
+
+
+@_method_impl((_Img, _Feature), 'get', 'getNumber', 'getString')
+def _get_property(element, name):
+    return element.props.get(name)
+
+
+@_method_impl(_Img, 'date')
+def _image_date(img):
+    return _Date(img.props['system:time_start'])
+
+
+@_method_impl((_Img, _Feature), 'copyProperties')
+def _copy_properties(element, source, properties=None, exclude=None):
+    props = {k: v for k, v in _props(source).items()
+             if (properties is None or k in properties) and not (exclude and k in exclude)}
+    return _set(element, {**props, **element.props})
+
+
+@_method_impl(_Feature, 'geometry')
+def _feature_geometry(feature, *args, **kwargs):
+    return feature.geom
+
+
+@_method_impl(_Feature, 'toDictionary')
+def _feature_to_dictionary(feature, properties=None):
+    return {k: v for k, v in feature.props.items() if properties is None or k in properties}
+
+
+def _reduce_pixels(img, reducer, region, scale):
+    src = img.pixels(region, scale)
+    out = {}
+    for band in sorted(img.bands):
+        values, mask = src[band]
+        out[band] = reducer(values[mask])
+    return out
+
+
+@_method_impl(_Img, 'reduceRegion')
+def _reduce_region(img, reducer=None, geometry=None, scale=None, maxPixels=None, bestEffort=None, **kwargs):
+    return _reduce_pixels(img, reducer, _region(geometry), scale or NATIVE_SCALE)
+
+
+@_method_impl(_Img, 'reduceRegions')
+def _reduce_regions(img, collection=None, reducer=None, scale=None, **kwargs):
+    out = []
+    for feature in collection.items:
+        result = _reduce_pixels(img, reducer, feature.geom, scale or NATIVE_SCALE)
+        if len(result) == 1:
+            result = {reducer.name: next(iter(result.values()))}
+        out.append(_Feature(feature.geom, {**feature.props, **result}))
+    return _Coll(out, 'FeatureCollection')
+
+
+# --- collections and lists ------------------------------------------------
+
+def _items(value):
+    if isinstance(value, _Catalog):
+        value = value.materialize()
+    return value.items if isinstance(value, _Coll) else value
+
+
+@_method_impl(_Catalog, 'filterDate')
+def _catalog_filter_date(cat, start, end=None):
+    start = _to_millis(start)
+    end = _to_millis(end) if end is not None else start + 86400000
+    return _Catalog(cat.asset_id, start, end, cat.region)
+
+
+@_method_impl(_Catalog, 'filterBounds')
+def _catalog_filter_bounds(cat, geometry):
+    return _Catalog(cat.asset_id, cat.start, cat.end, _region(geometry))
+
+
+@_method_impl(_Coll, 'filterDate')
+def _coll_filter_date(coll, start, end=None):
+    start = _to_millis(start)
+    end = _to_millis(end) if end is not None else start + 86400000
+    return _Coll([e for e in coll.items if start <= e.props.get('system:time_start', -1) < end], coll.kind)
+
+
+@_method_impl(_Coll, 'filterBounds')
+def _coll_filter_bounds(coll, geometry):
+    return coll
+
+
+@_method_impl((_Coll, list), 'size', 'length')
+def _size(value):
+    return len(_items(value))
+
+
+@_method_impl((_Coll, list), 'filter')
+def _filter(value, flt):
+    kept = [e for e in _items(value) if flt.pred(e)]
+    return _Coll(kept, value.kind) if isinstance(value, _Coll) else kept
+
+
+@_method_impl(_Coll, 'toList')
+def _to_list(coll, count, offset=0):
+    return coll.items[offset:offset + count]
+
+
+@_method_impl(_Coll, 'limit')
+def _limit(coll, maximum, prop=None, ascending=True):
+    items = coll.items
+    if prop is not None:
+        items = sorted(items, key=lambda e: _props(e).get(prop), reverse=not ascending)
+    return _Coll(items[:maximum], coll.kind)
+
+
+@_method_impl(_Coll, 'sort')
+def _sort(coll, prop, ascending=True):
+    return _Coll(sorted(coll.items, key=lambda e: _props(e).get(prop), reverse=not ascending), coll.kind)
+
+
+@_method_impl(_Coll, 'first')
+def _first(coll):
+    return coll.items[0] if coll.items else None
+
+
+@_method_impl(_Coll, 'aggregate_array')
+def _aggregate_array(coll, prop):
+    return [_props(e).get(prop) for e in _items(coll) if _props(e).get(prop) is not None]
+
+
+@_method_impl(_Coll, 'distinct')
+def _coll_distinct(coll, prop):
+    seen, kept = set(), []
+    for e in coll.items:
+        key = _props(e).get(prop)
+        if key not in seen:
+            seen.add(key)
+            kept.append(e)
+    return _Coll(kept, coll.kind)
+
+
+@_method_impl(_Coll, 'flatten')
+def _flatten(coll):
+    return _Coll([e for c in coll.items for e in _items(c)], coll.kind)
+
+
+@_method_impl(_Coll, 'reduce')
+def _reduce_collection(coll, reducer, parallelScale=None):
+    images = coll.items
+    if not images:
+        return _Img([], lambda region, scale: {})
+    bands = [f'{b}_{reducer.name}' for b in images[0].bands]
+
+    def pixels(region, scale):
+        out = {}
+        for band, name in zip(images[0].bands, bands):
+            stacks = [im.pixels(region, scale)[band] for im in images]
+            values = np.stack([np.where(m, v, np.nan) for v, m in stacks])
+            valid = ~np.isnan(values)
+            with warnings.catch_warnings(), np.errstate(all='ignore'):
+                warnings.simplefilter('ignore', RuntimeWarning)
+                if reducer.name == 'mean':
+                    result = np.nanmean(values, axis=0) if valid.any() else values[0]
+                elif reducer.name == 'median':
+                    result = np.nanmedian(values, axis=0) if valid.any() else values[0]
+                else:
+                    raise EEException(f'ImageCollection.reduce: Reducer.{reducer.name} not supported.')
+            out[name] = (np.nan_to_num(result), valid.any(axis=0))
+        return out
+    return _Img(bands, pixels)
+
+
+@_method_impl(list, 'get')
+def _list_get(items, index):
+    if not -len(items) <= index < len(items):
+        raise EEException(f'List.get: List index must be between {-len(items)} and {len(items) - 1}: {index}.')
+    return items[index]
+
+
+@_method_impl(list, 'distinct')
+def _list_distinct(items):
+    kept = []
+    for item in items:
+        if item not in kept:
+            kept.append(item)
+    return kept
+
+
+@_method_impl(list, 'slice')
+def _list_slice(items, start, end=None):
+    return items[start:end]
+
+
+@_method_impl(list, 'flatten')
+def _list_flatten(items):
+    return [e for sub in items for e in (sub if isinstance(sub, list) else [sub])]
+
+
+@_method_impl(dict, 'get')
+def _dict_get(d, key, defaultValue=None):
+    if key not in d:
+        if defaultValue is not None:
+            return defaultValue
+        raise EEException(f"Dictionary.get: Dictionary does not contain key: '{key}'.")
+    return d[key]
+
+
+@_method_impl(dict, 'set')
+def _dict_set(d, key, value):
+    return {**d, key: value}
+
+
+@_method_impl(dict, 'combine')
+def _dict_combine(d, other, overwrite=True):
+    return {**d, **other} if overwrite else {**other, **d}
+
+
+@_method_impl(dict, 'keys')
+def _dict_keys(d):
+    return sorted(d)
+
+
+@_method_impl(dict, 'values')
+def _dict_values(d, keys=None):
+    return [d[k] for k in (keys or sorted(d))]
+
+
+@_method_impl(_Join, 'apply')
+def _join_apply(join, primary, secondary, condition):
+    out = []
+    for p in _items(primary):
+        matches = [s for s in _items(secondary) if condition.pair(p, s)]
+        if not matches:
+            continue
+        value = matches if join.kind == 'saveAll' else matches[0]
+        out.append(_set(p, {join.key: value}))
+    return _Coll(out, primary.kind if isinstance(primary, _Coll) else 'ImageCollection')
+
+
+# --- dates ----------------------------------------------------------------
+
+_JODA = [('YYYY', '%Y'), ('yyyy', '%Y'), ('MM', '%m'), ('dd', '%d'), ('HH', '%H'), ('mm', '%M'), ('ss', '%S')]
+
+
+@_method_impl(_Date, 'format')
+def _date_format(date, fmt=None, tz=None):
+    fmt = fmt or "yyyy-MM-dd'T'HH:mm:ss"
+    for joda, strf in _JODA:
+        fmt = fmt.replace(joda, strf)
+    return date.dt().strftime(fmt.replace("'", ''))
+
+
+@_method_impl(_Date, 'millis')
+def _date_millis(date):
+    return date.millis
+
+
+@_method_impl(_Date, 'advance')
+def _date_advance(date, delta, unit, tz=None):
+    seconds = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}[unit]
+    return _Date(date.millis + delta * seconds * 1000)
+
+
+# ---------------------------------------------------------------------------
+# geemap shim and installation
+# ---------------------------------------------------------------------------
+
+def geopandas_to_ee(gdf, geodesic=None, date=None):
+    """Convert a (Geo)DataFrame into a FeatureCollection of bounding rectangles."""
+    features = []
+    for _, row in gdf.iterrows():
+        geom = row['geometry']
+        bounds = tuple(geom.bounds) if hasattr(geom, 'bounds') else tuple(geom)
+        props = {k: (v.item() if hasattr(v, 'item') else v) for k, v in row.items() if k != 'geometry'}
+        features.append(Feature(Geometry.Rectangle(list(bounds)), props))
+    return FeatureCollection(features)
+
+
+def install(latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+    """Register this module as ``ee`` (and a ``geemap`` shim) in sys.modules."""
+    configure(latency, jitter, failure_rate, seed)
+    sys.modules['ee'] = sys.modules[__name__]
+    sys.modules['geemap'] = types.SimpleNamespace(geopandas_to_ee=geopandas_to_ee)
+    return sys.modules[__name__]
@@ -0,0 +1,110 @@
+"""ID-keyed waterbody lookup with memoised Earth Engine geometries.
+
+process_fire used to scan the whole GeoDataFrame (``water_data[water_data[id] == id]``)
+and rebuild the GeoJSON for every task. The index maps each ID to its row
+positions once, converts a geometry only the first time it is requested,
+and can persist the (optionally simplified) polygons as WKB in a Parquet file
+so a restart does not reparse the shapefile.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import geopandas as gpd
+
+
+class WaterbodyIndex:
+    def __init__(self, water_data, id_column, max_cached=None):
+        self.water_data = water_data
+        self.id_column = id_column
+        self.positions = water_data.groupby(id_column, sort=False).indices
+        self.max_cached = max_cached
+        self._geometries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, waterbody_id):
+        return waterbody_id in self.positions
+
+    def rows(self, waterbody_id):
+        return self.water_data.iloc[self.positions[waterbody_id]]
+
+    def ee_geometry(self, waterbody_id):
+        with self._lock:
+            if waterbody_id in self._geometries:
+                self._geometries.move_to_end(waterbody_id)
+                return self._geometries[waterbody_id]
+        import geemap  # Not needed by the local backend
+
+        geometry = geemap.geopandas_to_ee(self.rows(waterbody_id))
+        with self._lock:
+            self._geometries[waterbody_id] = geometry
+            if self.max_cached is not None and len(self._geometries) > self.max_cached:
+                self._geometries.popitem(last=False)
+        return geometry
+
+    def ee_features(self, waterbody_ids):
+        # One FeatureCollection holding the rows of several waterbodies, not memoised
+        import geemap
+
+        positions = [position for waterbody_id in waterbody_ids for position in self.positions[waterbody_id]]
+        return geemap.geopandas_to_ee(self.water_data.iloc[positions])
+
+    def geometry_key(self, waterbody_id):
+        # Part of the response cache key, so edited or re-simplified polygons are fetched anew
+        from .cache import geometry_key
+
+        return geometry_key(self.rows(waterbody_id).geometry)
+
+
+def save_geometry_cache(water_data, path, columns, simplify=None, source=None):
+    # Keep only the columns the extraction needs, geometries as WKB
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    geometry = water_data.geometry
+    if simplify:
+        geometry = geometry.simplify(simplify, preserve_topology=True)
+    table = pa.Table.from_pandas(water_data[columns].reset_index(drop=True), preserve_index=False)
+    table = table.append_column('wkb', pa.array(geometry.to_wkb().tolist(), type=pa.binary()))
+    metadata = {
+        'crs': water_data.crs.to_wkt() if water_data.crs is not None else '',
+        'simplify': simplify or 0,
+        'source': os.path.abspath(source) if source else '',
+        'source_mtime': os.path.getmtime(source) if source else 0,
+    }
+    table = table.replace_schema_metadata({b'hls_extract': json.dumps(metadata).encode()})
+    pq.write_table(table, path, compression='zstd')
+
+
+def read_geometry_cache(path, source=None, simplify=None):
+    """Return the cached GeoDataFrame, or None if it is missing or stale."""
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(path):
+        return None
+    table = pq.read_table(path)
+    metadata = json.loads((table.schema.metadata or {}).get(b'hls_extract', b'{}'))
+    if source is not None and (metadata.get('source_mtime') != os.path.getmtime(source)
+                               or metadata.get('simplify') != (simplify or 0)):
+        return None
+    frame = table.drop(['wkb']).to_pandas()
+    geometry = gpd.GeoSeries.from_wkb(table.column('wkb').to_pylist(), crs=metadata.get('crs') or None)
+    return gpd.GeoDataFrame(frame, geometry=geometry)
+
+
+def load_waterbodies(shapefile, adapter, cache=None, simplify=None):
+    """Read the waterbody polygons (through the cache if given) and index them by ID."""
+    water_data = read_geometry_cache(cache, shapefile, simplify) if cache else None
+    if water_data is None:
+        water_data = gpd.read_file(shapefile)
+        if cache:
+            columns = [c for c in (adapter.id_column, adapter.area_column) if c is not None]
+            save_geometry_cache(water_data, cache, columns, simplify, source=shapefile)
+            water_data = read_geometry_cache(cache)
+        elif simplify:
+            water_data['geometry'] = water_data.geometry.simplify(simplify, preserve_topology=True)
+    return WaterbodyIndex(water_data, adapter.id_column)
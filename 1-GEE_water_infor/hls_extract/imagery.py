@@ -0,0 +1,188 @@
+"""Earth Engine building blocks for the HLS water extraction: masking,
+spectral indices, the filtered HLS collection and same-day averaging."""
+import ee
+
+HLS_COLLECTION = "NASA/HLS/HLSL30/v002"
+SELECTED_BANDS = ['B2_mean', 'B3_mean', 'B4_mean', 'B5_mean', 'B6_mean', 'B7_mean']
+# Fmask bits for cloud (1), cloud shadow (3) and snow/ice (4), tested in one bitwiseAnd
+QA_BITS = (1 << 1) | (1 << 3) | (1 << 4)
+# Scale of the cloud-fraction reduceRegion; 30 m reproduces the original per-pixel fraction
+CLOUD_SCALE = 30
+
+
+def maskHls(image):
+    # Mask clouds, cloud shadows, and snow in the HLS image
+    cloudsBitMask = (1 << 1)
+    cloudshadowBitMask = (1 << 3)
+    snowBitMask = (1 << 4)
+
+    qaMask = image.select('Fmask').bitwiseAnd(cloudsBitMask).eq(0) \
+        .And(image.select('Fmask').bitwiseAnd(cloudshadowBitMask).eq(0)) \
+        .And(image.select('Fmask').bitwiseAnd(snowBitMask).eq(0))
+    return image.updateMask(qaMask)
+
+
+# On ee.Image; indices.compute_indices gives the same five indices on NumPy/xarray arrays
+class IndexCalculator:
+    def ndvi(self, image):
+        # Calculate NDVI
+        ndvi = image.normalizedDifference(['B5', 'B4']).rename('ndvi')
+        return ndvi
+
+    def ndwi(self, image):
+        # Calculate NDWI
+        ndwi = image.normalizedDifference(['B3', 'B5']).rename('ndwi')
+        return ndwi
+
+    def mndwi(self, image):
+        # Calculate MNDWI
+        mndwi = image.normalizedDifference(['B3', 'B6']).rename('mndwi')
+        return mndwi
+
+    def evi(self, image):
+        # Calculate EVI
+        evi = image.expression(
+            '2.5 * ((NIR - RED) / (NIR + 6 * RED - 7.5 * BLUE + 1))', {
+                'NIR': image.select('B5'),
+                'RED': image.select('B4'),
+                'BLUE': image.select('B2')
+            }).float()
+        return evi.rename('evi')
+
+    def AWEIsh(self, image):
+        # Calculate AWEIsh
+        AWEIsh = image.expression(
+            'BLUE + 2.5 * GREEN - 1.5 * (NIR + SWIR1) - 0.25 * SWIR2', {
+                'BLUE': image.select('B2'),
+                'GREEN': image.select('B3'),
+                'NIR': image.select('B5'),
+                'SWIR1': image.select('B6'),
+                'SWIR2': image.select('B7')
+            }).float()
+        return AWEIsh.rename('AWEIsh')
+
+
+# Average images taken on the same date (original version, quadratic in the
+# number of images; kept as the reference for mosaic_by_date)
+def process_image_collection(image_collection):
+    def func_shf(image):
+        image = ee.Image(image)
+        date = ee.Date(image.get('system:time_start'))
+        dateString = date.format('YYYY-MM-dd')
+        return image.set('dateString', dateString)
+
+    grouped = image_collection.toList(image_collection.size()).map(func_shf)
+
+    distinctDates_list = []
+
+    def func_gdv(image):
+        dateString = ee.Image(image).get('dateString')
+        return dateString
+
+    distinctDates_list = grouped.map(func_gdv)
+
+    distinctDates = distinctDates_list.distinct()
+
+    def getMeanImageByDate(dateString):
+        imagesOnDate = grouped.filter(ee.Filter.eq('dateString', dateString))
+        meanImage = ee.ImageCollection(imagesOnDate).reduce(ee.Reducer.mean())
+        return meanImage.set('system:time_start', ee.Date(dateString).millis())
+
+    def func_ssk(dateString):
+        meanImage = getMeanImageByDate(dateString)
+        return meanImage.set('date', dateString)
+
+    meanImagesList = distinctDates.map(func_ssk)
+
+    try:
+        meanImages = ee.ImageCollection(meanImagesList)
+        return meanImages
+    except ee.EEException as e:
+        print(f"An error occurred during image collection processing: {e}")
+        return ee.ImageCollection([])
+
+
+# Average images taken on the same date, grouped with a join instead of a
+# per-date filter over the whole list (linear rather than quadratic)
+def mosaic_by_date(image_collection):
+    def set_date(image):
+        return image.set('date', ee.Date(image.get('system:time_start')).format('YYYY-MM-dd'))
+
+    dated = image_collection.map(set_date)
+    sameDay = ee.Join.saveAll('same_day').apply(
+        dated.distinct('date'), dated, ee.Filter.equals(leftField='date', rightField='date'))
+
+    def mean_of_day(image):
+        image = ee.Image(image)
+        meanImage = ee.ImageCollection(ee.List(image.get('same_day'))).reduce(ee.Reducer.mean())
+        return meanImage.set('system:time_start', ee.Date(image.get('date')).millis()).set('date', image.get('date'))
+
+    return ee.ImageCollection(sameDay.map(mean_of_day))
+
+
+def mask_water(image):
+    # QA-masked image restricted to water (MNDWI > 0), and the QA mask itself
+    qaMask = image.select('Fmask').bitwiseAnd(QA_BITS).eq(0)
+    masked = image.updateMask(qaMask)
+    water_mask = masked.normalizedDifference(['B3', 'B6']).gt(0).rename('water_mask')
+    return masked.addBands(water_mask).updateMask(water_mask), qaMask
+
+
+def build_collection(geometry, start_time, end_time, cloud_scale=CLOUD_SCALE):
+    # HLS images over the waterbody with < 50% cloud, QA-masked and water-masked,
+    # with the Fmask test computed once per image and reused for the cloud fraction
+    def prepare(image):
+        water, qaMask = mask_water(image)
+        cloudCoverage = qaMask.Not().reduceRegion(
+            reducer=ee.Reducer.mean(),
+            geometry=geometry,
+            scale=cloud_scale,
+            maxPixels=1e9,
+        )
+        return water.set('cloud_coverage', cloudCoverage.get('Fmask'))
+
+    return (
+        ee.ImageCollection(HLS_COLLECTION)
+        .filterDate(start_time, end_time)
+        .filterBounds(geometry)
+        .map(prepare)
+        .filter(ee.Filter.lt('cloud_coverage', 0.5))
+    )
+
+
+def build_collection_stepwise(geometry, start_time, end_time):
+    # Original builder, kept as the reference for bench_collection.py
+    def cal_cloud(image):
+        # Calculate cloud coverage
+        cloudsBitMask = (1 << 1)
+        cloudshadowBitMask = (1 << 3)
+        snowBitMask = (1 << 4)
+
+        qaMask = image.select('Fmask').bitwiseAnd(cloudsBitMask).eq(0) \
+            .And(image.select('Fmask').bitwiseAnd(cloudshadowBitMask).eq(0)) \
+            .And(image.select('Fmask').bitwiseAnd(snowBitMask).eq(0))
+        cloudMask = qaMask.lt(1)
+        cloudCoverage = cloudMask.reduceRegion(
+            reducer=ee.Reducer.mean(),
+            geometry=geometry,
+            scale=30,
+            maxPixels=1e9,
+        )
+        return image.set('cloud_coverage', cloudCoverage.get('Fmask'))
+
+    def calculateMNDWI(image):
+        # Calculate MNDWI and update mask
+        mndwi = image.normalizedDifference(['B3', 'B6'])
+        water_mask = mndwi.gt(0).rename('water_mask')
+        updated_image = image.addBands(water_mask)
+        return updated_image.updateMask(water_mask)
+
+    return (
+        ee.ImageCollection(HLS_COLLECTION)
+        .filterDate(start_time, end_time)
+        .filterBounds(geometry)
+        .map(cal_cloud)
+        .filter(ee.Filter.lt('cloud_coverage', 0.5))
+        .map(maskHls)
+        .map(calculateMNDWI)
+    )
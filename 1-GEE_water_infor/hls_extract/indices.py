@@ -0,0 +1,101 @@
+"""Spectral indices of imagery.IndexCalculator on NumPy / xarray band stacks.
+
+``compute_indices`` takes B2..B7 along the first axis (a raster stack, or
+the transposed median table) and computes ndvi, ndwi, mndwi, evi and AWEIsh
+in one pass over float32 chunks, reusing two scratch buffers so memory stays
+at about ``out`` plus ``chunk_size`` pixels. Masked (NaN) pixels, zero
+denominators and, for ndvi/ndwi/mndwi, negative inputs give NaN, as a masked
+pixel would in Earth Engine.
+
+``add_indices`` appends the five indices as columns of a median table
+(ResultStore results, the ingested Parquet dataset, SSC training data).
+"""
+import numpy as np
+
+from .store import BAND_COLUMNS
+
+INDEX_NAMES = ['ndvi', 'ndwi', 'mndwi', 'evi', 'AWEIsh']
+CHUNK_SIZE = 1 << 16
+
+
+def _normalized_difference(a, b, out, scratch):
+    np.subtract(a, b, out=out)
+    np.add(a, b, out=scratch)
+    np.divide(out, scratch, out=out)
+    # Earth Engine's normalizedDifference masks pixels where either input is negative
+    np.minimum(a, b, out=scratch)
+    np.copyto(out, np.nan, where=scratch < 0)
+
+
+def _compute_chunk(b2, b3, b4, b5, b6, b7, out, scratch):
+    ndvi, ndwi, mndwi, evi, aweish = out
+    _normalized_difference(b5, b4, ndvi, scratch)
+    _normalized_difference(b3, b5, ndwi, scratch)
+    _normalized_difference(b3, b6, mndwi, scratch)
+
+    # 2.5 * (NIR - RED) / (NIR + 6 * RED - 7.5 * BLUE + 1)
+    np.multiply(b4, 6, out=scratch)
+    np.add(scratch, b5, out=scratch)
+    np.multiply(b2, 7.5, out=evi)
+    np.subtract(scratch, evi, out=scratch)
+    np.add(scratch, 1, out=scratch)
+    np.subtract(b5, b4, out=evi)
+    np.multiply(evi, 2.5, out=evi)
+    np.divide(evi, scratch, out=evi)
+
+    # BLUE + 2.5 * GREEN - 1.5 * (NIR + SWIR1) - 0.25 * SWIR2
+    np.multiply(b3, 2.5, out=aweish)
+    np.add(aweish, b2, out=aweish)
+    np.add(b5, b6, out=scratch)
+    np.multiply(scratch, 1.5, out=scratch)
+    np.subtract(aweish, scratch, out=aweish)
+    np.multiply(b7, 0.25, out=scratch)
+    np.subtract(aweish, scratch, out=aweish)
+
+    np.copyto(out, np.nan, where=~np.isfinite(out))
+
+
+def compute_indices(bands, out=None, chunk_size=CHUNK_SIZE):
+    """Return a ``(5, ...)`` float32 array of INDEX_NAMES for a ``(6, ...)`` B2..B7 stack.
+
+    ``bands`` may also be an xarray DataArray with a 'band' dimension
+    labelled B2..B7; the result is then a DataArray with an 'index'
+    dimension. ``out`` can be a preallocated float32 array of the result
+    shape.
+    """
+    if hasattr(bands, 'dims'):
+        import xarray as xr
+
+        stack = bands.sel(band=BAND_COLUMNS).transpose('band', ...)
+        values = compute_indices(stack.values, out, chunk_size)
+        dims = ('index',) + stack.dims[1:]
+        coords = {name: coord for name, coord in stack.coords.items() if 'band' not in coord.dims}
+        return xr.DataArray(values, dims=dims, coords=dict(coords, index=INDEX_NAMES))
+
+    bands = np.asarray(bands)
+    if bands.shape[0] != len(BAND_COLUMNS):
+        raise ValueError(f"expected {len(BAND_COLUMNS)} bands (B2..B7) on axis 0, got shape {bands.shape}")
+    shape = bands.shape[1:]
+    if out is None:
+        out = np.empty((len(INDEX_NAMES),) + shape, dtype=np.float32)
+    flat_bands = bands.reshape(len(BAND_COLUMNS), -1)
+    flat_out = out.reshape(len(INDEX_NAMES), -1)
+
+    pixels = flat_bands.shape[1]
+    chunk = np.empty((len(BAND_COLUMNS), min(chunk_size, pixels)), dtype=np.float32)
+    scratch = np.empty(chunk.shape[1], dtype=np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for start in range(0, pixels, chunk_size):
+            stop = min(start + chunk_size, pixels)
+            n = stop - start
+            np.copyto(chunk[:, :n], flat_bands[:, start:stop], casting='unsafe')
+            _compute_chunk(*chunk[:, :n], flat_out[:, start:stop], scratch[:n])
+    return out
+
+
+def add_indices(frame, columns=BAND_COLUMNS):
+    """Append INDEX_NAMES columns computed from the B2..B7 ``columns`` of a DataFrame."""
+    values = compute_indices(frame[list(columns)].to_numpy(dtype=np.float32).T)
+    for name, index in zip(INDEX_NAMES, values):
+        frame[name] = index
+    return frame
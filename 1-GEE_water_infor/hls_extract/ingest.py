@@ -0,0 +1,161 @@
+"""Convert the per-waterbody .txt outputs into a typed Parquet dataset.
+
+Each data line looks like ``start end id date [b2, b3, b4, b5, b6, b7] seconds``;
+"Hylak ID:"/"reach ID:" headers, "Error:" lines and anything malformed are
+skipped. Files are parsed in batches by a process pool, and every batch is
+written straight to its own Parquet part, so memory stays bounded by
+``files_per_part`` however many files there are:
+
+    python -m hls_extract.ingest --input lake=HLS-image/Lake --input river=HLS-image/River --output reflectance
+
+gives ``reflectance/waterbody=lake/part-00000.parquet`` etc. with columns
+waterbody_id (int64), fire_start/fire_end/date (date32), B2..B7 and seconds
+(float32). With --indices the spectral indices of indices.INDEX_NAMES are
+appended as float32 columns.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .indices import INDEX_NAMES, compute_indices
+
+BAND_COLUMNS = ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+FILES_PER_PART = 2000
+
+SCHEMA = pa.schema(
+    [('waterbody_id', pa.int64()), ('fire_start', pa.date32()), ('fire_end', pa.date32()), ('date', pa.date32())]
+    + [(band, pa.float32()) for band in BAND_COLUMNS]
+    + [('seconds', pa.float32())]
+)
+INDEX_SCHEMA = pa.schema(list(SCHEMA) + [(name, pa.float32()) for name in INDEX_NAMES])
+
+
+def parse_line(line):
+    """Return ``(fire_start, fire_end, id, date, medians, seconds)`` or None for non-data lines."""
+    if not line[:1].isdigit():
+        return None
+    try:
+        fire_start, fire_end, waterbody_id, date, rest = line.split(' ', 4)
+        medians, seconds = rest.rsplit(' ', 1)
+        values = [float(value) for value in medians.strip('[]').split(',')]
+        if len(values) != len(BAND_COLUMNS):
+            return None
+        return fire_start, fire_end, int(waterbody_id), date, values, float(seconds)
+    except ValueError:
+        return None
+
+
+def parse_files(paths, indices=False):
+    """Parse a batch of files into a pyarrow Table; returns ``(table, skipped_lines)``."""
+    columns = {name: [] for name in ('waterbody_id', 'fire_start', 'fire_end', 'date', 'seconds')}
+    bands = []
+    skipped = 0
+    for path in paths:
+        with open(path) as file:
+            for line in file:
+                parsed = parse_line(line.rstrip('\n'))
+                if parsed is None:
+                    skipped += 1
+                    continue
+                fire_start, fire_end, waterbody_id, date, values, seconds = parsed
+                columns['fire_start'].append(fire_start)
+                columns['fire_end'].append(fire_end)
+                columns['waterbody_id'].append(waterbody_id)
+                columns['date'].append(date)
+                columns['seconds'].append(seconds)
+                bands.append(values)
+    band_array = np.array(bands, dtype=np.float32).reshape(-1, len(BAND_COLUMNS))
+    arrays = [
+        pa.array(columns['waterbody_id'], pa.int64()),
+        pa.array(columns['fire_start'], pa.string()).cast(pa.date32()),
+        pa.array(columns['fire_end'], pa.string()).cast(pa.date32()),
+        pa.array(columns['date'], pa.string()).cast(pa.date32()),
+    ]
+    arrays += [pa.array(band_array[:, i]) for i in range(len(BAND_COLUMNS))]
+    arrays.append(pa.array(columns['seconds'], pa.float32()))
+    if indices:
+        arrays += [pa.array(values) for values in compute_indices(band_array.T)]
+        return pa.Table.from_arrays(arrays, schema=INDEX_SCHEMA), skipped
+    return pa.Table.from_arrays(arrays, schema=SCHEMA), skipped
+
+
+def _convert_batch(job):
+    paths, part_path, indices = job
+    table, skipped = parse_files(paths, indices)
+    if table.num_rows:
+        pq.write_table(table, part_path, compression='zstd')
+    return table.num_rows, skipped
+
+
+def list_txt_files(folder):
+    with os.scandir(folder) as entries:
+        # .tmp-*.txt: temporary files left behind by a hard kill before write_text_atomic used .tmp
+        return sorted(entry.path for entry in entries
+                      if entry.name.endswith('.txt') and not entry.name.startswith('.tmp-') and entry.is_file())
+
+
+def convert_folder(input_folder, output_folder, workers=None, files_per_part=FILES_PER_PART, indices=False):
+    """Convert every .txt in ``input_folder``; returns ``(rows, skipped_lines, files)``.
+
+    The parts are written to a temporary folder next to ``output_folder``,
+    which then replaces it whole: a rerun with fewer parts leaves no stale
+    ``part-*.parquet`` behind, and an interrupted one leaves the old dataset
+    intact. Dot-prefixed folders are ignored by pyarrow datasets meanwhile.
+    """
+    output_folder = os.path.abspath(output_folder)
+    parent, name = os.path.split(output_folder)
+    os.makedirs(parent, exist_ok=True)
+    paths = list_txt_files(input_folder)
+    tmp_folder = tempfile.mkdtemp(dir=parent, prefix=f'.tmp-{name}-')
+    try:
+        jobs = [
+            (paths[i:i + files_per_part], os.path.join(tmp_folder, f"part-{i // files_per_part:05d}.parquet"), indices)
+            for i in range(0, len(paths), files_per_part)
+        ]
+        rows = skipped = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch_rows, batch_skipped in executor.map(_convert_batch, jobs):
+                rows += batch_rows
+                skipped += batch_skipped
+        if os.path.exists(output_folder):
+            old_folder = tempfile.mkdtemp(dir=parent, prefix=f'.old-{name}-')
+            os.replace(output_folder, os.path.join(old_folder, name))
+            os.replace(tmp_folder, output_folder)
+            shutil.rmtree(old_folder)
+        else:
+            os.replace(tmp_folder, output_folder)
+    except BaseException:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        raise
+    return rows, skipped, len(paths)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert extraction .txt outputs into a Parquet dataset.")
+    parser.add_argument('--input', action='append', required=True, metavar='NAME=FOLDER',
+                        help='Output folder of one waterbody type, e.g. lake=HLS-image/Lake (repeatable)')
+    parser.add_argument('--output', required=True, help='Dataset folder, partitioned by waterbody=NAME')
+    parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: all cores)')
+    parser.add_argument('--files-per-part', type=int, default=FILES_PER_PART)
+    parser.add_argument('--indices', action='store_true', help='Append ndvi, ndwi, mndwi, evi and AWEIsh columns')
+    args = parser.parse_args(argv)
+
+    for spec in args.input:
+        name, folder = spec.split('=', 1)
+        start_time = time.perf_counter()
+        rows, skipped, files = convert_folder(folder, os.path.join(args.output, f"waterbody={name}"),
+                                              args.workers, args.files_per_part, args.indices)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name}: {files} files, {rows} rows, {skipped} skipped lines in {elapsed:.1f}s "
+              f"({rows / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
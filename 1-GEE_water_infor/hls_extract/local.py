@@ -0,0 +1,349 @@
+"""Offline backend: the same extraction as extract.py, on local HLS L30 GeoTIFF tiles.
+
+Granules are found by their LP DAAC file names
+(``HLS.L30.T10SEG.2021152T184911.v2.0.B03.tif``, one file per band plus
+``Fmask``). For every waterbody and merged fire window the backend mirrors
+build_collection + mosaic_by_date + the median reduceRegion:
+
+* only the window around the polygon is read from each file;
+* Fmask cloud/shadow/snow bits give the cloud fraction (granules with >= 50%
+  are dropped) and the QA mask, MNDWI > 0 the water mask, all as NumPy masks;
+* granules of the same date are averaged pixel by pixel, then each band's
+  median is taken over the polygon.
+
+Results go through output.write_result, so the .txt files and the
+ResultStore look exactly like those of the Earth Engine path. Medians are
+computed on the native UTM grid, whereas Earth Engine resamples to
+EPSG:4326 at 30 m, so values can differ slightly at polygon edges.
+Waterbodies are grouped by the 1° cell of their centroid (about one MGRS
+tile) and the groups run in a process pool, so each worker reuses its open
+files:
+
+    python -m hls_extract.local lake --tiles /data/HLS --fires hylak_id_dates.csv \
+        --shapefile filtered_lakes.shp --output HLS-image/Lake --workers 16
+
+No Earth Engine account or ``ee`` package is needed.
+"""
+import argparse
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import rasterio
+import shapely
+from rasterio.features import geometry_mask
+from rasterio.transform import Affine
+from rasterio.warp import transform_geom
+from rasterio.windows import Window
+from shapely.geometry import box, mapping, shape
+from tqdm import tqdm
+
+from .adapters import ADAPTERS
+from .geometry_index import load_waterbodies
+from .output import write_result
+from .planning import fire_blocks, fire_window, merge_windows, plan_summary, plan_tasks
+from .store import ResultStore
+
+# Local file name of each band extracted by the Earth Engine path (B2_mean..B7_mean there)
+BAND_FILES = ['B02', 'B03', 'B04', 'B05', 'B06', 'B07']
+# Same Fmask bits as imagery.QA_BITS: cloud (1), cloud shadow (3) and snow/ice (4)
+QA_BITS = (1 << 1) | (1 << 3) | (1 << 4)
+FMASK_NODATA = 255
+MAX_CLOUD = 0.5
+MAX_OPEN = 64
+
+GRANULE_PATTERN = re.compile(
+    r'HLS\.L30\.(?P<tile>T\w{5})\.(?P<stamp>\d{7}T\d{6})\.v2\.0\.(?P<band>B\d{2}|Fmask)\.tif$')
+
+Granule = namedtuple('Granule', 'tile date stamp paths')
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+def open_dataset(path):
+    # Keep up to MAX_OPEN files open per process; groups of nearby waterbodies hit the same tiles
+    with _datasets_lock:
+        if path in _datasets:
+            _datasets.move_to_end(path)
+            return _datasets[path]
+        dataset = rasterio.open(path)
+        _datasets[path] = dataset
+        if len(_datasets) > MAX_OPEN:
+            _datasets.popitem(last=False)[1].close()
+        return dataset
+
+
+class TileIndex:
+    """Complete HLS L30 granules under a folder, by tile, with footprints read on first use."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        files = {}
+        for root, _, names in os.walk(folder):
+            for name in names:
+                match = GRANULE_PATTERN.search(name)
+                if match:
+                    files.setdefault((match['tile'], match['stamp']), {})[match['band']] = os.path.join(root, name)
+        self.by_tile = {}
+        for (tile, stamp), paths in sorted(files.items()):
+            if all(band in paths for band in BAND_FILES + ['Fmask']):
+                date = datetime.strptime(stamp[:7], '%Y%j').strftime('%Y-%m-%d')
+                self.by_tile.setdefault(tile, []).append(Granule(tile, date, stamp, paths))
+        self._footprints = {}
+
+    def __len__(self):
+        return sum(len(granules) for granules in self.by_tile.values())
+
+    def footprint(self, tile):
+        # (crs, bounds) of a tile, from the Fmask of its first granule
+        if tile not in self._footprints:
+            dataset = open_dataset(self.by_tile[tile][0].paths['Fmask'])
+            self._footprints[tile] = (dataset.crs, box(*dataset.bounds))
+        return self._footprints[tile]
+
+    def search(self, geometry, crs, start_time, end_time):
+        """Granules dated in ``[start_time, end_time)`` whose tile intersects ``geometry`` (GeoJSON in ``crs``)."""
+        found = []
+        projected = {}
+        for tile, granules in self.by_tile.items():
+            tile_crs, bounds = self.footprint(tile)
+            if tile_crs not in projected:
+                projected[tile_crs] = shape(transform_geom(crs, tile_crs, geometry))
+            if bounds.intersects(projected[tile_crs]):
+                found += [granule for granule in granules if start_time <= granule.date < end_time]
+        return found
+
+
+def read_window(dataset, col, row, width, height, fill):
+    # Windowed read of band 1 on a grid that may extend past the file; outside pixels get ``fill``
+    out = np.full((height, width), fill, dtype=dataset.dtypes[0])
+    col0, row0 = max(col, 0), max(row, 0)
+    col1, row1 = min(col + width, dataset.width), min(row + height, dataset.height)
+    if col0 < col1 and row0 < row1:
+        out[row0 - row:row1 - row, col0 - col:col1 - col] = dataset.read(
+            1, window=Window(col0, row0, col1 - col0, row1 - row0))
+    return out
+
+
+def polygon_grid(polygon, transform):
+    # 30 m grid covering the polygon, aligned to the tile's pixel edges
+    res = transform.a
+    minx, miny, maxx, maxy = polygon.bounds
+    left = transform.c + math.floor((minx - transform.c) / res) * res
+    top = transform.f - math.floor((transform.f - maxy) / res) * res
+    width = max(math.ceil((maxx - left) / res), 1)
+    height = max(math.ceil((top - miny) / res), 1)
+    return Affine(res, 0, left, 0, -res, top), width, height
+
+
+def granule_reflectance(granule, polygon, grid):
+    """Masked B2..B7 reflectance of one granule on ``grid`` (NaN where masked), or None.
+
+    None means the granule has no valid Fmask pixel in the polygon or is at
+    least MAX_CLOUD cloudy there, as with the cloud_coverage filter.
+    """
+    transform, width, height = grid
+    fmask_dataset = open_dataset(granule.paths['Fmask'])
+    col = round((transform.c - fmask_dataset.transform.c) / transform.a)
+    row = round((fmask_dataset.transform.f - transform.f) / transform.a)
+
+    inside = geometry_mask([mapping(polygon)], (height, width), transform, invert=True)
+    fmask = read_window(fmask_dataset, col, row, width, height, FMASK_NODATA)
+    valid = inside & (fmask != FMASK_NODATA)
+    if not valid.any():
+        return None
+    clear = (fmask & QA_BITS) == 0
+    if 1 - clear[valid].mean() >= MAX_CLOUD:
+        return None
+
+    bands = np.empty((len(BAND_FILES), height, width), dtype=np.float32)
+    for i, band in enumerate(BAND_FILES):
+        dataset = open_dataset(granule.paths[band])
+        nodata = dataset.nodata if dataset.nodata is not None else -9999
+        raw = read_window(dataset, col, row, width, height, nodata)
+        tags = dataset.tags()
+        scale = float(tags.get('scale_factor', dataset.scales[0]))
+        offset = float(tags.get('add_offset', dataset.offsets[0]))
+        np.multiply(raw, scale, out=bands[i], casting='unsafe')
+        bands[i] += offset
+        bands[i][raw == nodata] = np.nan
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mndwi = (bands[1] - bands[4]) / (bands[1] + bands[4])
+    # normalizedDifference masks a pixel when either band is negative, as SWIR often is over water
+    keep = valid & clear & (bands[1] >= 0) & (bands[4] >= 0) & (mndwi > 0)
+    bands[:, ~keep] = np.nan
+    return bands
+
+
+def fetch_medians_local(tiles, geometry, crs, start_time, end_time):
+    """Local counterpart of batched.fetch_medians: ``(raw_size, image_num, records)``.
+
+    ``records`` are ``(date, [B2..B7 medians], seconds)`` sorted by date; a
+    date without any unmasked pixel gets None medians, like an empty
+    reduceRegion.
+    """
+    by_date = {}
+    for granule in tiles.search(geometry, crs, start_time, end_time):
+        by_date.setdefault(granule.date, []).append(granule)
+
+    raw_size = 0
+    records = []
+    for date in sorted(by_date):
+        start = time.time()
+        # Same-day granules are averaged per pixel on a shared grid for each projection
+        sums = {}
+        for granule in by_date[date]:
+            tile_crs, _ = tiles.footprint(granule.tile)
+            if tile_crs not in sums:
+                polygon = shape(transform_geom(crs, tile_crs, geometry))
+                grid = polygon_grid(polygon, open_dataset(granule.paths['Fmask']).transform)
+                sums[tile_crs] = [polygon, grid, None, None]
+            polygon, grid, total, count = sums[tile_crs]
+            bands = granule_reflectance(granule, polygon, grid)
+            if bands is None:
+                continue
+            raw_size += 1
+            finite = np.isfinite(bands)
+            if total is None:
+                total, count = np.zeros_like(bands), np.zeros(bands.shape, dtype=np.int32)
+            total += np.where(finite, bands, 0)
+            count += finite
+            sums[tile_crs][2:] = total, count
+
+        pixels = []
+        for polygon, (transform, width, height), total, count in sums.values():
+            if total is None:
+                continue
+            inside = geometry_mask([mapping(polygon)], (height, width), transform, invert=True)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+            values = mean[:, inside]
+            pixels.append(values[:, np.isfinite(values).all(axis=0)])
+        if not pixels:
+            continue  # Every granule of the date was filtered out as cloudy
+        pixels = np.concatenate(pixels, axis=1)
+        if pixels.shape[1]:
+            medians = [float(value) for value in np.median(pixels, axis=1)]
+        else:
+            medians = [None] * len(BAND_FILES)
+        records.append((date, medians, time.time() - start))
+    return raw_size, len(records), records
+
+
+def extract_waterbody_local(waterbody_id, fires, geometry, crs, tiles, skip=False):
+    """extract.extract_waterbody on local tiles; ``geometry`` is GeoJSON in ``crs``."""
+    if skip:
+        return 'skipped', [], None
+
+    windows = [fire_window(fire_start_time, fire_end_time) for fire_start_time, fire_end_time in fires]
+    records = []
+    for start_time, end_time in merge_windows(windows):
+        raw_size, _, window_records = fetch_medians_local(tiles, geometry, crs, start_time, end_time)
+        print(start_time, end_time, raw_size)
+        records += window_records
+
+    blocks = fire_blocks(waterbody_id, fires, windows, records)
+    if not blocks:
+        print("The processed image collection is empty. Skipping.")
+        return 'empty', [], None
+    return 'done', blocks, None
+
+
+def local_jobs(tasks, waterbodies, adapter):
+    """``(id, fires, geometry, crs, skip)`` jobs for the planned tasks, grouped by 1° centroid cell."""
+    crs = waterbodies.water_data.crs
+    crs = crs.to_wkt() if crs is not None else 'EPSG:4326'
+    groups = {}
+    for waterbody_id, _, fires in tasks:
+        rows = waterbodies.rows(waterbody_id)
+        polygon = shapely.union_all(rows.geometry.values)
+        job = (waterbody_id, fires, mapping(polygon), crs, adapter.skip(rows.iloc[0]))
+        centroid = polygon.centroid
+        groups.setdefault((math.floor(centroid.x), math.floor(centroid.y)), []).append(job)
+    return list(groups.values())
+
+
+_tiles = None
+
+
+def _init_worker(tiles):
+    global _tiles
+    _tiles = tiles
+    # Handles inherited through fork share file offsets with the parent; open fresh ones
+    _datasets.clear()
+
+
+def _run_job(job):
+    # Like the scheduler: any error fails this waterbody only, not the rest of its group
+    try:
+        return extract_waterbody_local(*job[:4], _tiles, job[4])
+    except Exception as e:
+        print(f"Task {job[0]} failed: {e}")
+        return 'failed', [], str(e)
+
+
+def _run_group(jobs):
+    return [(job[0], *_run_job(job)) for job in jobs]
+
+
+def run_local(groups, tiles, workers=None):
+    """Run job groups in a process pool; yields ``(id, state, blocks, error)`` as groups finish."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tiles,)) as executor:
+        futures = [executor.submit(_run_group, group) for group in groups]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract HLS band medians from local GeoTIFF tiles.")
+    parser.add_argument('waterbody', choices=sorted(ADAPTERS), help='Waterbody type')
+    parser.add_argument('--tiles', required=True, help='Folder searched recursively for HLS L30 GeoTIFFs')
+    parser.add_argument('--fires', required=True, help='CSV with one row per fire (ID, start and end date)')
+    parser.add_argument('--shapefile', required=True, help='Waterbody polygons with the matching ID column')
+    parser.add_argument('--output', help='Folder for the per-waterbody .txt results')
+    parser.add_argument('--store', default=None, help='SQLite result store, used instead of --output')
+    parser.add_argument('--retry-failed', action='store_true', help='With --store, also rerun failed waterbodies')
+    parser.add_argument('--geometry-cache', default=None, help='Parquet file caching the shapefile geometries')
+    parser.add_argument('--simplify', type=float, default=None, help='Simplify polygons before caching')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+    if not (args.output or args.store):
+        parser.error('one of --output/--store is required')
+    adapter = ADAPTERS[args.waterbody]
+
+    tiles = TileIndex(args.tiles)
+    print(f"{len(tiles)} granules in {len(tiles.by_tile)} tiles")
+    waterbodies = load_waterbodies(args.shapefile, adapter, args.geometry_cache, args.simplify)
+    output_folder = args.output or ''
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+
+    tasks = plan_tasks(pd.read_csv(args.fires, low_memory=False), adapter, output_folder)
+    print(plan_summary(tasks))
+    store = ResultStore(args.store) if args.store else None
+    if store is not None:
+        store.add_jobs(tasks)
+        tasks = store.remaining_tasks(tasks, args.retry_failed)
+    else:
+        tasks = [task for task in tasks if not os.path.exists(os.path.join(output_folder, f"{task[0]}.txt"))]
+
+    with tqdm(total=len(tasks)) as progress:
+        for waterbody_id, state, blocks, error in run_local(local_jobs(tasks, waterbodies, adapter), tiles,
+                                                            args.workers):
+            write_result(waterbody_id, output_folder, adapter, state, blocks, error, store)
+            progress.update(1)
+    if store is not None:
+        print(f"Job states: {store.counts()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Result writers shared by the Earth Engine and local backends: atomic {id}.txt files or a ResultStore."""
+import os
+import tempfile
+
+
+def write_text_atomic(path, text):
+    # Write to a temporary file in the same folder and rename it into place,
+    # so an interrupted run never leaves a truncated result behind. Not .txt, so
+    # a leftover from a hard kill is never mistaken for a result.
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.tmp-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def format_line(fire_start_time, fire_end_time, waterbody_id, date, median, iteration_time):
+    return f"{fire_start_time} {fire_end_time} {waterbody_id} {date} {median} {round(iteration_time, 2)}\n"
+
+
+def format_text(adapter, waterbody_id, blocks):
+    # Legacy {id}.txt layout: an "ID: ... ImageNum: ..." header per fire, then one line per date
+    output_string = ""
+    for fire_start_time, fire_end_time, image_num, rows in blocks:
+        output_string += f"{adapter.label}: " + str(waterbody_id) + " ImageNum: " + str(image_num) + "\n"
+        for date, median, iteration_time in rows:
+            output_string += format_line(fire_start_time, fire_end_time, waterbody_id, date, median, iteration_time)
+    return output_string
+
+
+def write_result(waterbody_id, output_folder, adapter, state, blocks, error=None, store=None):
+    # Commit to the store, or write {id}.txt (an "Error:" line for failures, nothing for empty/skipped)
+    output_file_path = os.path.join(output_folder, f"{waterbody_id}.txt")
+    if store is not None:
+        rows = [(fire_start_time, fire_end_time, date, median, iteration_time)
+                for fire_start_time, fire_end_time, _, block_rows in blocks
+                for date, median, iteration_time in block_rows]
+        store.commit(waterbody_id, state, rows, error)
+        print(f"Stored {len(rows)} dates for {waterbody_id} ({state})")
+    elif state == 'failed':
+        write_text_atomic(output_file_path, "Error: " + error + "\n")
+    elif state == 'done':
+        write_text_atomic(output_file_path, format_text(adapter, waterbody_id, blocks))
+        print(f"Output saved to {output_file_path}")
@@ -0,0 +1,79 @@
+"""Group fires by waterbody and merge their imagery windows.
+
+hylak_id_dates.csv / reach_id_dates.csv hold one row per fire, but results are
+keyed on the waterbody ID, so a second fire on the same lake used to be
+skipped once the first had written ``{id}.txt``. Planning turns the rows into
+one task per waterbody carrying all of its fires; process_fire then queries
+the HLS collection once per merged (union of overlapping) +/- 2 month window
+and writes one block per fire.
+"""
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+
+WINDOW_MONTHS = 2
+
+
+def fire_window(fire_start_time, fire_end_time, months=WINDOW_MONTHS):
+    # Imagery window: the fire period padded by two months on each side
+    start_time = (datetime.strptime(fire_start_time, '%Y-%m-%d') - relativedelta(months=months)).strftime('%Y-%m-%d')
+    end_time = (datetime.strptime(fire_end_time, '%Y-%m-%d') + relativedelta(months=months)).strftime('%Y-%m-%d')
+    return start_time, end_time
+
+
+def merge_windows(windows):
+    """Union of overlapping or touching ``(start, end)`` date windows, sorted by start."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def fire_blocks(waterbody_id, fires, windows, records):
+    """Fan the dates fetched for the merged windows back out to the fires.
+
+    ``records`` are ``(date, medians, seconds)``; returns one
+    ``(fire_start, fire_end, image_num, rows)`` block per fire with imagery,
+    dropping dates whose medians are missing or all zero.
+    """
+    blocks = []
+    for (fire_start_time, fire_end_time), (start_time, end_time) in zip(fires, windows):
+        fire_records = [record for record in records if start_time <= record[0] < end_time]
+        if not fire_records:
+            continue
+
+        rows = []
+        for date, values, iteration_time in fire_records:
+            try:
+                median = [round(value, 4) for value in values]
+            except TypeError:
+                continue
+
+            print(fire_start_time, fire_end_time, waterbody_id, date, median, round(iteration_time, 2))
+            if "[0, 0, 0, 0, 0, 0]" in median:
+                continue
+            rows.append((date, median, iteration_time))
+        blocks.append((fire_start_time, fire_end_time, len(fire_records), rows))
+    return blocks
+
+
+def group_fires(wildfire_data, adapter):
+    """Map each waterbody ID (in first-seen order) to its distinct ``(start, end)`` fires."""
+    grouped = {}
+    columns = [adapter.id_column, adapter.start_column, adapter.end_column]
+    for waterbody_id, start, end in wildfire_data[columns].itertuples(index=False):
+        grouped.setdefault(waterbody_id, {})[(start, end)] = None
+    return {waterbody_id: list(fires) for waterbody_id, fires in grouped.items()}
+
+
+def plan_tasks(wildfire_data, adapter, output_folder):
+    return [(waterbody_id, output_folder, fires) for waterbody_id, fires in group_fires(wildfire_data, adapter).items()]
+
+
+def plan_summary(tasks):
+    fires = sum(len(task[2]) for task in tasks)
+    windows = sum(len(merge_windows([fire_window(*fire) for fire in task[2]])) for task in tasks)
+    return f"{fires} fires on {len(tasks)} waterbodies -> {windows} imagery queries"
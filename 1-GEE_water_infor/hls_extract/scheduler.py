@@ -0,0 +1,170 @@
+"""Bounded-concurrency scheduler for per-waterbody extraction tasks.
+
+Each task is one ``process_fire(args, ...)`` call. Tasks run on a thread pool
+with at most ``workers * 2`` futures in flight, each worker can be throttled
+to ``rate_limit`` task starts per second, and quota/transient Earth Engine
+errors are retried with exponential backoff. Ctrl-C (or SIGTERM) stops
+submitting new tasks and waits for the running ones, so every output file
+that exists afterwards is complete.
+"""
+import random
+import re
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import ee
+
+# Whole words only, so IDs such as 14295 or "Band B429" do not look like HTTP 429
+_QUOTA_PATTERN = re.compile(
+    r'\b(?:quota|too many|rate limit|rate exceeded|429|50[234]|timed out|deadline exceeded|'
+    r'service unavailable|internal error)\b', re.IGNORECASE)
+
+
+def is_quota_error(exc):
+    # Earth Engine errors worth retrying: server-side throttling and transient failures.
+    # Other EEExceptions (bad band names, invalid geometries, ...) fail the same way every time
+    return isinstance(exc, ee.EEException) and _QUOTA_PATTERN.search(str(exc)) is not None
+
+
+def is_retryable(exc):
+    if isinstance(exc, (ConnectionError, TimeoutError, socket.timeout)):
+        return True
+    return is_quota_error(exc)
+
+
+class RateLimiter:
+    """Per-worker throttle: each thread starts at most ``rate`` calls per second."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._local = threading.local()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        next_time = getattr(self._local, 'next_time', now)
+        if next_time > now:
+            time.sleep(next_time - now)
+            now = next_time
+        self._local.next_time = now + self.interval
+
+
+class TaskReport:
+    def __init__(self):
+        self.done = 0
+        self.failed = []
+        self.retries = 0
+        self.skipped = 0
+        self.interrupted = False
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f"TaskReport(done={self.done}, failed={len(self.failed)}, retries={self.retries}, "
+                f"skipped={self.skipped}, interrupted={self.interrupted}, elapsed={self.elapsed:.2f}s)")
+
+
+def run_tasks(func, tasks, workers=8, rate_limit=None, max_retries=5, backoff=2.0, max_backoff=120.0,
+              retryable=is_retryable, progress=None):
+    """Run ``func(task)`` for every task and return a :class:`TaskReport`.
+
+    Retries sleep ``backoff * 2**attempt`` seconds (with jitter, capped at
+    ``max_backoff``) inside the worker, which keeps the slot busy and so
+    slows the whole run down while the server is throttling us.
+    """
+    report = TaskReport()
+    limiter = RateLimiter(rate_limit)
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def attempt(task):
+        for n in range(max_retries + 1):
+            if stop.is_set():
+                return False
+            limiter.wait()
+            try:
+                func(task)
+                return True
+            except Exception as e:
+                if n == max_retries or not retryable(e):
+                    raise
+                with lock:
+                    report.retries += 1
+                delay = min(max_backoff, backoff * 2 ** n) * (0.5 + random.random() / 2)
+                print(f"Retrying {_label(task)} in {delay:.1f}s after error: {e}")
+                if stop.wait(delay):
+                    return False
+        return False
+
+    def collect(future):
+        task = futures.pop(future)
+        if future.cancelled():
+            report.skipped += 1
+            return
+        try:
+            if future.result():
+                report.done += 1
+            else:
+                report.skipped += 1
+        except Exception as e:
+            print(f"Task {_label(task)} failed: {e}")
+            report.failed.append((task, e))
+        if progress is not None:
+            progress.update(1)
+
+    start = time.perf_counter()
+    previous_handler = _install_sigterm_handler()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {}
+    try:
+        for task in tasks:
+            while len(futures) >= workers * 2:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future)
+            futures[executor.submit(attempt, task)] = task
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                collect(future)
+    except KeyboardInterrupt:
+        print("Interrupted: waiting for running tasks to finish, pending tasks are left for the next run.")
+        report.interrupted = True
+        stop.set()
+        for future in list(futures):
+            future.cancel()
+        wait(futures)
+        for future in list(futures):
+            collect(future)
+    finally:
+        executor.shutdown(wait=True)
+        _restore_sigterm_handler(previous_handler)
+        report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _label(task):
+    return task[0] if isinstance(task, tuple) else task
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _install_sigterm_handler():
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is not threading.main_thread():
+        return None
+    return signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+
+def _restore_sigterm_handler(previous):
+    if previous is not None:
+        signal.signal(signal.SIGTERM, previous)
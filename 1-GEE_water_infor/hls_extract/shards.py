@@ -0,0 +1,158 @@
+"""Split a run over several machines or processes, and merge their result stores.
+
+Every waterbody belongs to shard ``crc32(id) % K``, so any node planning the
+same fires CSV picks the same waterbodies without coordination. A node runs
+its shard with ``--store results.db --shard 3/8``, which writes
+``results.shard-3-of-8.db`` (its own job manifest, results and run log).
+Once the shards are done, their stores are merged:
+
+    python -m hls_extract.shards merge --store results.db --fires hylak_id_dates.csv --waterbody lake
+
+merge looks for ``results.shard-*-of-K.db``, reports the throughput of each
+shard, shards that are missing, waterbodies done in more than one shard and,
+with --fires, planned waterbodies that no shard has. It exits with status 1
+when shards or waterbodies are missing or duplicated.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import zlib
+
+from .adapters import ADAPTERS
+from .store import STATES, ResultStore, _plain
+
+_SHARD_PATTERN = re.compile(r'\.shard-(\d+)-of-(\d+)$')
+
+
+def shard_of(waterbody_id, shards):
+    # Stable across processes and machines, unlike hash()
+    return zlib.crc32(str(_plain(waterbody_id)).encode()) % shards
+
+
+def parse_shard(text):
+    """``'3/8'`` -> ``(3, 8)``; shards are numbered from 0."""
+    match = re.fullmatch(r'(\d+)/(\d+)', text.strip())
+    if not match or not int(match.group(1)) < int(match.group(2)):
+        raise ValueError(f"Expected a shard as INDEX/COUNT with 0 <= INDEX < COUNT, got {text!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def shard_tasks(tasks, shard, shards):
+    return [task for task in tasks if shard_of(task[0], shards) == shard]
+
+
+def shard_path(path, shard, shards):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard-{shard}-of-{shards}{ext}"
+
+
+def find_shards(path):
+    """``{(shard, count): path}`` of the shard stores next to ``path``."""
+    stem, ext = os.path.splitext(path)
+    found = {}
+    for candidate in glob.glob(glob.escape(stem) + '.shard-*-of-*' + glob.escape(ext)):
+        match = _SHARD_PATTERN.search(os.path.splitext(candidate)[0])
+        if match:
+            found[int(match.group(1)), int(match.group(2))] = candidate
+    return found
+
+
+class MergeReport:
+    def __init__(self):
+        self.shards = []  # (label, counts, seconds, finished per second)
+        self.missing_shards = []
+        self.duplicates = []
+        self.missing_ids = []
+        self.counts = {}
+
+    @property
+    def ok(self):
+        return not (self.missing_shards or self.duplicates or self.missing_ids)
+
+    def __str__(self):
+        lines = [f"{'shard':>8} {'jobs':>7} " + ' '.join(f'{state:>7}' for state in STATES)
+                 + f" {'seconds':>9} {'per s':>7}"]
+        for label, counts, seconds, rate in self.shards:
+            lines.append(f"{label:>8} {sum(counts.values()):>7} " + ' '.join(f'{counts[s]:>7}' for s in STATES)
+                         + f" {seconds:>9.1f} {rate:>7.2f}")
+        lines.append(f"{'merged':>8} {sum(self.counts.values()):>7} "
+                     + ' '.join(f'{self.counts.get(s, 0):>7}' for s in STATES))
+        for name, values in (('missing shards', self.missing_shards), ('duplicate IDs', self.duplicates),
+                             ('missing IDs', self.missing_ids)):
+            if values:
+                lines.append(f"{len(values)} {name}: {', '.join(str(v) for v in values[:20])}"
+                             + (' ...' if len(values) > 20 else ''))
+        return '\n'.join(lines)
+
+
+def merge_shards(paths, into, expected_ids=None):
+    """Merge the shard stores ``{(shard, count): path}`` into a new store at ``into``."""
+    report = MergeReport()
+    counts = {count for _, count in paths}
+    for count in sorted(counts):
+        report.missing_shards += [f"{shard}/{count}" for shard in range(count) if (shard, count) not in paths]
+
+    merged = ResultStore(into)
+    try:
+        for (shard, count), path in sorted(paths.items()):
+            store = ResultStore(path)
+            shard_counts = store.counts()
+            runs = store.runs()
+            store.close()
+            seconds = sum(run['seconds'] for run in runs)
+            finished = sum(shard_counts[state] for state in STATES if state != 'pending')
+            report.shards.append((f"{shard}/{count}", shard_counts, seconds, finished / seconds if seconds else 0.0))
+            report.duplicates += merged.merge(path)
+        report.counts = merged.counts()
+        if expected_ids is not None:
+            report.missing_ids = sorted(set(map(_plain, expected_ids)) - merged.job_ids())
+    finally:
+        merged.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the result stores written with --shard.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    merge = subparsers.add_parser('merge', help='Merge results.shard-*-of-K.db into results.db')
+    merge.add_argument('--store', required=True, help='Merged store; shards are found next to it')
+    merge.add_argument('--shards', nargs='+', default=None, help='Shard stores (default: found next to --store)')
+    merge.add_argument('--fires', default=None, help='Fires CSV of the run, to report waterbodies no shard has')
+    merge.add_argument('--waterbody', choices=sorted(ADAPTERS), default='lake', help='Waterbody type of --fires')
+    merge.add_argument('--overwrite', action='store_true', help='Replace an existing merged store')
+    args = parser.parse_args(argv)
+
+    if args.shards:
+        paths = {}
+        for path in args.shards:
+            match = _SHARD_PATTERN.search(os.path.splitext(path)[0])
+            if not match:
+                parser.error(f"{path} is not named like results.shard-INDEX-of-COUNT.db")
+            paths[int(match.group(1)), int(match.group(2))] = path
+    else:
+        paths = find_shards(args.store)
+    if not paths:
+        parser.error(f"No shard stores found for {args.store}")
+    if os.path.exists(args.store):
+        if not args.overwrite:
+            parser.error(f"{args.store} exists; pass --overwrite to replace it")
+        for path in (args.store, args.store + '-wal', args.store + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    expected_ids = None
+    if args.fires:
+        import pandas as pd
+
+        adapter = ADAPTERS[args.waterbody]
+        expected_ids = pd.read_csv(args.fires, usecols=[adapter.id_column])[adapter.id_column].unique()
+
+    report = merge_shards(paths, args.store, expected_ids)
+    print(report)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Spatial batching: one HLS collection and reduceRegions call for many waterbodies.
+
+Hundreds of small lakes can sit in the same HLS tile with fires in the same
+season, and each of them builds its own collection and reduces it on its
+own. Here the waterbodies are first looked up in the HLS catalogue to find
+the MGRS tiles covering them (one request per ``chunk_size`` waterbodies).
+Waterbodies covered by the same single tile whose imagery windows overlap
+form a cluster; for each merged window the cluster's collection is fetched
+once and every image is reduced over all member polygons with
+``reduceRegions`` (cloud fraction at ``cloud_scale``, band medians at 30 m).
+The rows are split back per ID and filtered by each member's own cloud
+fraction, which gives the same dates and medians as extract_waterbody.
+
+Waterbodies covered by several tiles (same-day scenes are averaged before
+the median there), made of several polygons or without any scene fall back
+to the per-waterbody batched extraction.
+"""
+import hashlib
+import os
+import time
+from datetime import date
+
+import ee
+
+from .adapters import LAKE
+from .batched import CHUNK_SIZE
+from .cache import get_info as fetch_info
+from .extract import process_fire
+from .imagery import CLOUD_SCALE, HLS_COLLECTION, mask_water
+from .output import write_result
+from .planning import fire_blocks, fire_window, merge_windows
+from .scheduler import is_quota_error
+from .telemetry import NULL_TELEMETRY
+
+BANDS = ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+MAX_MEMBERS = 100  # Polygons per reduceRegions call
+MAX_WINDOW_DAYS = 240  # Longest merged window of a cluster
+MAX_CLOUD = 0.5
+
+
+def task_windows(task):
+    return merge_windows([fire_window(*fire) for fire in task[2]])
+
+
+def lookup_tiles(tasks, waterbodies, chunk_size=CHUNK_SIZE, get_info=fetch_info):
+    """Map each task's waterbody ID to the sorted MGRS tiles of the HLS scenes covering it."""
+    id_column = waterbodies.id_column
+    tiles = {}
+    for offset in range(0, len(tasks), chunk_size):
+        chunk = tasks[offset:offset + chunk_size]
+        windows = [window for task in chunk for window in task_windows(task)]
+        start_time, end_time = min(w[0] for w in windows), max(w[1] for w in windows)
+
+        def footprint(feature):
+            scenes = ee.ImageCollection(HLS_COLLECTION).filterDate(start_time, end_time) \
+                .filterBounds(feature.geometry())
+            return ee.Feature(None, {'id': feature.get(id_column),
+                                     'tiles': scenes.aggregate_array('MGRS_TILE_ID').distinct()})
+
+        features = waterbodies.ee_features([task[0] for task in chunk]).map(footprint)
+        for row in get_info(features)['features']:
+            waterbody_id = row['properties']['id']
+            tiles[waterbody_id] = tuple(sorted(set(tiles.get(waterbody_id, ())) | set(row['properties']['tiles'])))
+    return tiles
+
+
+def _days(start, end):
+    return (date.fromisoformat(end) - date.fromisoformat(start)).days
+
+
+def plan_clusters(tasks, tiles, waterbodies, max_members=MAX_MEMBERS, max_days=MAX_WINDOW_DAYS):
+    """Group ``(id, folder, fires)`` tasks into ``(label, tile, tasks)`` clusters.
+
+    Tasks on the same single tile are swept in order of their first window
+    and join the current cluster while their windows overlap it, it has
+    fewer than ``max_members`` members and its windows span at most
+    ``max_days``. Other tasks become one-member clusters with tile None.
+    """
+    clusters = []
+    by_tile = {}
+    for task in tasks:
+        footprint = tiles.get(task[0], ())
+        if len(footprint) == 1 and len(waterbodies.positions[task[0]]) == 1:
+            by_tile.setdefault(footprint[0], []).append(task)
+        else:
+            clusters.append((f"{task[0]}", None, [task]))
+
+    for tile, tile_tasks in sorted(by_tile.items()):
+        members, start_time, end_time = [], None, None
+        for task in sorted(tile_tasks, key=lambda t: task_windows(t)[0]):
+            windows = task_windows(task)
+            if members and (windows[0][0] >= end_time or len(members) >= max_members
+                            or _days(start_time, max(end_time, windows[-1][1])) > max_days):
+                clusters.append((f"{tile}:{start_time}", tile, members))
+                members = []
+            if not members:
+                start_time, end_time = windows[0][0], windows[-1][1]
+            members.append(task)
+            end_time = max(end_time, windows[-1][1])
+        clusters.append((f"{tile}:{start_time}", tile, members))
+    return clusters
+
+
+def fetch_cluster_medians(features, id_column, start_time, end_time, chunk_size=CHUNK_SIZE,
+                          cloud_scale=CLOUD_SCALE, get_info=fetch_info):
+    """Return ``(raw_size, {id: [(date, values, seconds), ...]})`` for the member ``features``.
+
+    Every scene in the window is reduced over all features; rows whose cloud
+    fraction over their own polygon is not below MAX_CLOUD are dropped.
+    """
+    def reduce_members(image):
+        water, qaMask = mask_water(image)
+        day = ee.Date(image.get('system:time_start')).format('YYYY-MM-dd')
+        cloud = qaMask.Not().reduceRegions(collection=features, reducer=ee.Reducer.mean(), scale=cloud_scale)
+        medians = water.select(BANDS).reduceRegions(collection=cloud, reducer=ee.Reducer.median(), scale=30)
+        return medians.map(lambda feature: ee.Feature(
+            None, ee.Feature(feature).toDictionary([id_column, 'mean'] + BANDS).set('date', day)))
+
+    collection = ee.ImageCollection(HLS_COLLECTION).filterDate(start_time, end_time).filterBounds(features)
+    rows = ee.FeatureCollection(collection.map(reduce_members)).flatten()
+
+    start = time.time()
+    first = get_info(ee.Dictionary({
+        'raw_size': collection.size(),
+        'size': rows.size(),
+        'features': rows.toList(chunk_size, 0),
+    }))
+    fetched = list(first['features'])
+    for offset in range(chunk_size, first['size'], chunk_size):
+        fetched += get_info(rows.toList(chunk_size, offset))
+    seconds = (time.time() - start) / max(len(fetched), 1)
+
+    records = {}
+    for row in fetched:
+        properties = row['properties']
+        cloud = properties.get('mean')
+        if cloud is None or cloud >= MAX_CLOUD:
+            continue
+        records.setdefault(properties[id_column], []).append(
+            (properties['date'], [properties.get(band) for band in BANDS], seconds))
+    return first['raw_size'], records
+
+
+def _geometry_key(waterbodies, waterbody_ids):
+    digest = hashlib.sha256()
+    for waterbody_id in waterbody_ids:
+        digest.update(waterbodies.geometry_key(waterbody_id).encode())
+    return digest.hexdigest()
+
+
+def process_cluster(cluster, waterbodies, adapter=LAKE, chunk_size=CHUNK_SIZE, store=None,
+                    cloud_scale=CLOUD_SCALE, cache=None, telemetry=NULL_TELEMETRY):
+    label, tile, tasks = cluster
+    if tile is None:
+        return process_fire(tasks[0], waterbodies, adapter, True, chunk_size, store, cloud_scale, cache, telemetry)
+    if store is None:
+        tasks = [task for task in tasks if not os.path.exists(os.path.join(task[1], f"{task[0]}.txt"))]
+
+    members = []
+    with telemetry.span('lookup', label):
+        for task in tasks:
+            if adapter.skip(waterbodies.rows(task[0]).iloc[0]):
+                write_result(task[0], task[1], adapter, 'skipped', [], None, store)
+                telemetry.count_state('skipped', task[0])
+            else:
+                members.append((task, task_windows(task)))
+    if not members:
+        return
+    print(f"Processing cluster {label}: {len(members)} waterbodies")
+
+    get_info = fetch_info
+    if cache is not None:
+        get_info = cache.bind(_geometry_key(waterbodies, [task[0] for task, _ in members]))
+    get_info = telemetry.timed(get_info)
+
+    records = {}
+    for start_time, end_time in merge_windows([window for _, windows in members for window in windows]):
+        ids = [task[0] for task, windows in members if any(s < end_time and e > start_time for s, e in windows)]
+        with telemetry.span('geometry', label):
+            features = waterbodies.ee_features(ids)
+        try:
+            with telemetry.span('fetch', label):
+                raw_size, window_records = fetch_cluster_medians(
+                    features, waterbodies.id_column, start_time, end_time, chunk_size, cloud_scale, get_info)
+        except ee.ee_exception.EEException as e:
+            if is_quota_error(e):
+                raise  # Let the scheduler retry the whole cluster
+            print("Error:", e)
+            for task, _ in members:
+                write_result(task[0], task[1], adapter, 'failed', [], str(e), store)
+                telemetry.count_state('failed', task[0])
+            return
+        print(start_time, end_time, raw_size)
+        for waterbody_id, rows in window_records.items():
+            records.setdefault(waterbody_id, []).extend(rows)
+
+    for task, _ in members:
+        waterbody_id, output_folder, fires = task
+        windows = [fire_window(fire_start_time, fire_end_time) for fire_start_time, fire_end_time in fires]
+        with telemetry.span('fan_out', waterbody_id):
+            blocks = fire_blocks(waterbody_id, fires, windows, records.get(waterbody_id, []))
+        state = 'done' if blocks else 'empty'
+        with telemetry.span('write', waterbody_id):
+            write_result(waterbody_id, output_folder, adapter, state, blocks, None, store)
+        telemetry.count_state(state, waterbody_id)
+
+
+def cluster_summary(clusters):
+    batched = [cluster for cluster in clusters if cluster[1] is not None]
+    members = sum(len(cluster[2]) for cluster in batched)
+    return (f"{members} waterbodies in {len(batched)} tile clusters, "
+            f"{len(clusters) - len(batched)} extracted one by one")
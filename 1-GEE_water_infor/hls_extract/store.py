@@ -0,0 +1,181 @@
+"""SQLite result store with a job manifest.
+
+Replaces one ``{id}.txt`` per waterbody. Every planned waterbody has a row in
+``jobs`` (pending / done / empty / skipped / failed), and its band medians go
+to ``results`` in the same transaction that marks it done. A crash can
+therefore never leave a half-written waterbody that looks finished, failed
+waterbodies can be retried on purpose, and "what's left" is one indexed
+query instead of a stat() per output file.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+STATES = ('pending', 'done', 'empty', 'skipped', 'failed')
+BAND_COLUMNS = ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS jobs (
+    waterbody_id INTEGER PRIMARY KEY,
+    fires TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+CREATE TABLE IF NOT EXISTS results (
+    waterbody_id INTEGER NOT NULL,
+    fire_start TEXT NOT NULL,
+    fire_end TEXT NOT NULL,
+    date TEXT NOT NULL,
+    {', '.join(f'{band} REAL' for band in BAND_COLUMNS)},
+    seconds REAL
+);
+CREATE INDEX IF NOT EXISTS results_waterbody ON results (waterbody_id);
+CREATE TABLE IF NOT EXISTS runs (
+    shard TEXT,
+    started REAL NOT NULL,
+    seconds REAL NOT NULL,
+    tasks INTEGER NOT NULL,
+    done INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    retries INTEGER NOT NULL
+);
+"""
+RUN_COLUMNS = ('shard', 'started', 'seconds', 'tasks', 'done', 'failed', 'retries')
+
+
+def _plain(value):
+    # numpy scalars (IDs read with pandas) -> Python values sqlite3 understands
+    return value.item() if hasattr(value, 'item') else value
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self, statements):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        self._conn.executemany(sql, params)
+                    else:
+                        self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def add_jobs(self, tasks):
+        """Register planned ``(id, folder, fires)`` tasks; a waterbody whose fires changed is reset to pending."""
+        rows = [(_plain(task[0]), json.dumps([list(fire) for fire in task[2]])) for task in tasks]
+        self._transaction([(
+            "INSERT INTO jobs (waterbody_id, fires) VALUES (?, ?) "
+            "ON CONFLICT (waterbody_id) DO UPDATE SET fires = excluded.fires, state = 'pending' "
+            "WHERE jobs.fires != excluded.fires",
+            rows,
+        )])
+
+    def job_ids(self, states=STATES):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT waterbody_id FROM jobs WHERE state IN ({', '.join('?' * len(states))})", tuple(states))
+            return {row[0] for row in rows}
+
+    def remaining(self, retry_failed=False):
+        return self.job_ids(('pending', 'failed') if retry_failed else ('pending',))
+
+    def remaining_tasks(self, tasks, retry_failed=False):
+        remaining = self.remaining(retry_failed)
+        return [task for task in tasks if _plain(task[0]) in remaining]
+
+    def counts(self):
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return {state: counts.get(state, 0) for state in STATES}
+
+    def commit(self, waterbody_id, state, rows=(), error=None):
+        """Atomically replace a waterbody's results and set its state.
+
+        ``rows`` are ``(fire_start, fire_end, date, medians, seconds)`` tuples.
+        """
+        waterbody_id = _plain(waterbody_id)
+        values = [(waterbody_id, fire_start, fire_end, date, *median, seconds)
+                  for fire_start, fire_end, date, median, seconds in rows]
+        placeholders = ', '.join('?' * (5 + len(BAND_COLUMNS)))
+        self._transaction([
+            ("DELETE FROM results WHERE waterbody_id = ?", (waterbody_id,)),
+            (f"INSERT INTO results VALUES ({placeholders})", values),
+            ("UPDATE jobs SET state = ?, error = ?, attempts = attempts + 1, updated = ? WHERE waterbody_id = ?",
+             (state, error, time.time(), waterbody_id)),
+        ])
+
+    def results(self, waterbody_id=None):
+        sql = "SELECT * FROM results"
+        params = ()
+        if waterbody_id is not None:
+            sql += " WHERE waterbody_id = ?"
+            params = (_plain(waterbody_id),)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY waterbody_id, fire_start, date", params).fetchall()
+
+    def record_run(self, started, seconds, tasks, done, failed, retries, shard=None):
+        """Log one CLI run (``tasks`` scheduled, ``done``/``failed`` of them) for throughput reports."""
+        self._transaction([(f"INSERT INTO runs VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+                            (shard, started, seconds, tasks, done, failed, retries))])
+
+    def runs(self):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM runs ORDER BY started").fetchall()
+        return [dict(zip(RUN_COLUMNS, row)) for row in rows]
+
+    def merge(self, path):
+        """Copy the jobs, results and runs of the store at ``path`` into this one.
+
+        A waterbody takes the other store's job and results when this store
+        does not have it yet, or has it unfinished while the other has it
+        done. Returns the IDs done in both stores, which keep this store's
+        results.
+        """
+        with self._lock:
+            self._conn.execute("ATTACH DATABASE ? AS other", (path,))
+            try:
+                duplicates = [row[0] for row in self._conn.execute(
+                    "SELECT o.waterbody_id FROM other.jobs o JOIN main.jobs m USING (waterbody_id) "
+                    "WHERE o.state = 'done' AND m.state = 'done'")]
+                has_runs = self._conn.execute(
+                    "SELECT COUNT(*) FROM other.sqlite_master WHERE name = 'runs'").fetchone()[0]
+                taken = "SELECT waterbody_id FROM temp.taken"
+                self._conn.execute('BEGIN IMMEDIATE')
+                try:
+                    self._conn.execute(
+                        "CREATE TEMP TABLE taken AS SELECT o.waterbody_id FROM other.jobs o "
+                        "LEFT JOIN main.jobs m USING (waterbody_id) "
+                        "WHERE m.waterbody_id IS NULL OR (o.state = 'done' AND m.state != 'done')")
+                    for sql in (f"DELETE FROM main.results WHERE waterbody_id IN ({taken})",
+                                f"DELETE FROM main.jobs WHERE waterbody_id IN ({taken})",
+                                f"INSERT INTO main.jobs SELECT * FROM other.jobs WHERE waterbody_id IN ({taken})",
+                                f"INSERT INTO main.results SELECT * FROM other.results WHERE waterbody_id IN ({taken})",
+                                "INSERT INTO main.runs SELECT * FROM other.runs" if has_runs else None,
+                                "DROP TABLE temp.taken"):
+                        if sql:
+                            self._conn.execute(sql)
+                except BaseException:
+                    self._conn.execute('ROLLBACK')
+                    raise
+                self._conn.execute('COMMIT')
+            finally:
+                self._conn.execute("DETACH DATABASE other")
+        return duplicates
@@ -0,0 +1,186 @@
+"""Per-stage timings, Earth Engine call latencies and waterbody counters.
+
+process_fire records a span around each step (ID lookup, geopandas_to_ee,
+collection building, fetching, fanning the dates out to fires, writing),
+every ``getInfo()`` is timed under the outermost function of its request
+(``size``, ``reduceRegion``, ``Dictionary``, ...), and every waterbody is
+counted by its final state. Spans and errors are appended to a JSON-lines
+file as they happen; the histograms and counters are written as a
+Prometheus textfile (for node_exporter's textfile collector) every
+``flush_interval`` seconds and when the run ends.
+
+Without a Telemetry, process_fire uses NULL_TELEMETRY, whose methods do
+nothing.
+"""
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from .output import write_text_atomic
+
+# Upper bounds in seconds, Prometheus' default buckets extended to slow EE calls
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PREFIX = 'hls_extract'
+FLUSH_INTERVAL = 15.0
+
+
+def call_type(obj):
+    # Outermost function of a request: a string in the fake ee, an ee.Function in the client library
+    func = getattr(obj, 'func', None)
+    if isinstance(func, str):
+        return func
+    try:
+        return func.getSignature()['name']
+    except Exception:
+        return type(obj).__name__
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def to_dict(self):
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+
+def _labels(labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Telemetry:
+    def __init__(self, jsonl=None, prometheus=None, flush_interval=FLUSH_INTERVAL):
+        self.prometheus = prometheus
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._jsonl = open(jsonl, 'a', buffering=1 << 16) if jsonl else None
+        self._stages = defaultdict(Histogram)
+        self._calls = defaultdict(Histogram)
+        self._errors = defaultdict(int)
+        self._states = defaultdict(int)
+        self._last_flush = time.monotonic()
+
+    def _event(self, record):
+        # Called with the lock held
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record, default=str) + '\n')
+
+    @contextmanager
+    def span(self, stage, waterbody_id=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self._stages[stage].observe(seconds)
+                self._event({'time': time.time(), 'stage': stage, 'id': waterbody_id, 'seconds': seconds})
+
+    def timed(self, get_info):
+        """Wrap a ``get_info(obj)`` function to time each request by call type."""
+        def timed_get_info(obj):
+            kind = call_type(obj)
+            start = time.perf_counter()
+            try:
+                return get_info(obj)
+            except Exception as e:
+                with self._lock:
+                    self._errors[kind] += 1
+                    self._event({'time': time.time(), 'call': kind, 'error': str(e)})
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                with self._lock:
+                    self._calls[kind].observe(seconds)
+        return timed_get_info
+
+    def count_state(self, state, waterbody_id=None):
+        with self._lock:
+            self._states[state] += 1
+            self._event({'time': time.time(), 'id': waterbody_id, 'state': state})
+            due = self.prometheus and time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def _summary(self):
+        return {
+            'stages': {stage: h.to_dict() for stage, h in self._stages.items()},
+            'calls': {kind: h.to_dict() for kind, h in self._calls.items()},
+            'errors': dict(self._errors),
+            'waterbodies': dict(self._states),
+        }
+
+    def summary(self):
+        with self._lock:
+            return self._summary()
+
+    def prometheus_text(self):
+        summary = self.summary()
+        lines = []
+        for name, label, histograms, help_text in (
+                ('stage_seconds', 'stage', summary['stages'], 'Time spent in each extraction stage'),
+                ('ee_call_seconds', 'call', summary['calls'], 'Latency of getInfo() requests by call type')):
+            lines += [f'# HELP {PREFIX}_{name} {help_text}.', f'# TYPE {PREFIX}_{name} histogram']
+            for key, h in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in zip(list(h['buckets']) + ['+Inf'], h['counts']):
+                    cumulative += count
+                    lines.append(f'{PREFIX}_{name}_bucket{_labels([(label, key), ("le", bound)])} {cumulative}')
+                lines.append(f'{PREFIX}_{name}_sum{_labels([(label, key)])} {h["sum"]}')
+                lines.append(f'{PREFIX}_{name}_count{_labels([(label, key)])} {h["count"]}')
+        for name, label, counts, help_text in (
+                ('ee_errors_total', 'call', summary['errors'], 'Failed getInfo() requests by call type'),
+                ('waterbodies_total', 'state', summary['waterbodies'], 'Waterbodies by final state')):
+            lines += [f'# HELP {PREFIX}_{name} {help_text}.', f'# TYPE {PREFIX}_{name} counter']
+            lines += [f'{PREFIX}_{name}{_labels([(label, key)])} {value}' for key, value in sorted(counts.items())]
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if self._jsonl is not None:
+                self._jsonl.flush()
+        if self.prometheus:
+            write_text_atomic(self.prometheus, self.prometheus_text())
+
+    def close(self):
+        # A final summary record, then the textfile
+        with self._lock:
+            if self._jsonl is not None:
+                self._event({'time': time.time(), 'summary': self._summary()})
+                self._jsonl.close()
+                self._jsonl = None
+        self.flush()
+
+
+class _NullTelemetry:
+    @contextmanager
+    def span(self, stage, waterbody_id=None):
+        yield
+
+    def timed(self, get_info):
+        return get_info
+
+    def count_state(self, state, waterbody_id=None):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_TELEMETRY = _NullTelemetry()
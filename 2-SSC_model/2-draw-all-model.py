@@ -1,51 +1,21 @@
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import mean_squared_log_error
-import math
-import os
-
-# Define models and their corresponding prediction result files
-models = {
-    'RandomForest': 'RFmodel_prediction_results.csv',
-    'XGBoost': 'XGBoost_model_prediction_results.csv',
-    'SVR': 'SVR_model_prediction_results.csv',
-    'DNN': 'DNN_model_prediction_results.csv'
-}
 
-input_colors = ['#2a9d8f', '#e9c46a', '#415a77', '#e76f51']
-
-
-# Metrics functions
-def ei(y, ypred):
-    # Calculate Error Index (EI)
-    df = pd.DataFrame({'y': y, 'ypred': ypred})
-    df = df[(df['y'] >= 0) & (df['ypred'] >= 0)]
-    Y = np.median(abs(np.log(df['ypred'] / df['y'])))
-    return math.e ** Y - 1
+from ssc_model.data import read_table, table_exists
+from ssc_model.metrics import compute_metrics
+from ssc_model.zoo import PREDICTION_FILES
 
+# Define models and their corresponding prediction result files (Parquet; legacy CSVs are converted on read)
+models = dict(PREDICTION_FILES)
 
-def bias(y, ypred):
-    # Calculate Bias
-    df = pd.DataFrame({'y': y, 'ypred': ypred})
-    df = df[(df['y'] >= 0) & (df['ypred'] >= 0)]
-    z = np.median(np.log10(df['ypred'] / df['y']))
-    return 100 * np.sign(z) * (math.e ** abs(z) - 1)
-
-
-def r2_score_custom(y, ypred):
-    # Calculate R² (coefficient of determination)
-    return np.corrcoef(y, ypred)[0, 1] ** 2
+input_colors = ['#2a9d8f', '#e9c46a', '#415a77', '#e76f51']
 
 
+# Metrics (EI, Bias, R², RMSE, ...) are computed by ssc_model.metrics, shared with the training script
 def calculate_metrics(y, ypred):
-    # Compute all performance metrics
-    ei_index = ei(y, ypred)
-    bias_index = bias(y, ypred)
-    r2_index = r2_score_custom(y, ypred)
-    rmse_index = np.sqrt(np.mean((ypred - y) ** 2))
-    return ei_index, bias_index, r2_index, rmse_index
+    # EI, Bias, squared correlation and RMSE of one model
+    metrics = compute_metrics(y, ypred)
+    return metrics['EI'], metrics['Bias'], metrics['R2_corr'], metrics['RMSE']
 
 
 # Create a 2x2 grid of subplots
@@ -59,13 +29,13 @@ for idx, (model_name, prediction_file) in enumerate(models.items()):
     color = input_colors[idx]
 
     # Check if the prediction result file exists
-    if not os.path.exists(prediction_file):
+    if not table_exists(prediction_file):
         print(f"Prediction result file '{prediction_file}' does not exist. Skipping {model_name}.")
         ax.set_visible(False)
         continue
 
     # Read the prediction results
-    data = pd.read_csv(prediction_file)
+    data = read_table(prediction_file, columns=['Actual', 'Predicted'])
     in_situ = data['Actual']
     pred = data['Predicted']
 
@@ -0,0 +1,10 @@
+"""Apply a trained SSC model to the Parquet reflectance dataset from the GEE extraction.
+
+    python 3-predict-ssc.py --model RandomForest_model_R2_0.85.joblib --input reflectance --output ssc.parquet
+
+The streaming, parallel prediction lives in ssc_model.predict.
+"""
+from ssc_model.predict import main
+
+if __name__ == "__main__":
+    main()
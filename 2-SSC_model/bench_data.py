@@ -0,0 +1,69 @@
+"""Load time and memory of ssc_model.data vs. pandas' default CSV reading, on a synthetic matchup table.
+
+Writes --rows synthetic matchups (B2..B7 and ssc) as CSV, then measures,
+each in a fresh process: pd.read_csv with its defaults, the one-time
+conversion by read_table, read_table of the Parquet file, and a projection
+of two columns. Reports wall time, DataFrame size and the peak RSS added
+by the read (Linux).
+
+    python bench_data.py --rows 5000000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bench_training import synthetic_matchups
+from ssc_model.data import read_table
+from ssc_model.train import _peak_rss_mb, _reset_peak_rss
+
+
+def measure(mode, path):
+    _reset_peak_rss()
+    with open('/proc/self/statm') as file:
+        baseline_mb = int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    start_time = time.perf_counter()
+    if mode == 'read_csv':
+        frame = pd.read_csv(path)
+    elif mode == 'projection':
+        frame = read_table(path, columns=['B4', 'ssc'])
+    else:
+        frame = read_table(path)
+    seconds = time.perf_counter() - start_time
+    return seconds, frame.memory_usage(deep=True).sum() / 2 ** 20, _peak_rss_mb() - baseline_mb, frame
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'train_data.csv')
+        synthetic_matchups(args.rows, seed=1).to_csv(path, index=False)
+        csv_mb = os.path.getsize(path) / 2 ** 20
+
+        frames = {}
+        print(f"{args.rows} rows, CSV {csv_mb:.0f} MB")
+        print(f"{'':>24} {'seconds':>8} {'frame MB':>9} {'peak MB':>12}")
+        for label, mode in (('pd.read_csv', 'read_csv'), ('read_table (convert)', 'table'),
+                            ('read_table (parquet)', 'table'), ('read_table 2 columns', 'projection')):
+            # A fresh process per measurement, so the peak RSS is its own
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                seconds, frame_mb, peak_mb, frames[label] = executor.submit(measure, mode, path).result()
+            print(f"{label:>24} {seconds:>8.2f} {frame_mb:>9.0f} {peak_mb:>12.0f}")
+        parquet_mb = os.path.getsize(os.path.join(folder, 'train_data.parquet')) / 2 ** 20
+        print(f"Parquet {parquet_mb:.0f} MB")
+
+    # float32 keeps the values to float32 precision
+    original, converted = frames['pd.read_csv'], frames['read_table (parquet)']
+    assert np.allclose(original.to_numpy(), converted.to_numpy(), rtol=1e-6)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""ssc_model.figures vs. 2-draw-all-model.py on synthetic prediction files.
+
+Writes the four prediction files with --rows predictions each, renders the
+figure with the original script (Agg backend, so plt.show() returns at
+once) and with ssc_model.figures in each --density mode, and reports wall
+time and PNG size. The original script evaluates seaborn's KDE at every
+point, so keep --rows moderate or pass --skip-original.
+
+    python bench_figures.py --rows 100000 --workers 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ssc_model.data import write_table
+from ssc_model.zoo import PREDICTION_FILES
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2-draw-all-model.py')
+
+
+def write_predictions(folder, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    for path in PREDICTION_FILES.values():
+        actual = 10 ** rng.normal(1.8, 0.6, rows)
+        predicted = actual * np.exp(rng.normal(0, 0.4, rows))
+        write_table(pd.DataFrame({'Actual': actual, 'Predicted': predicted}), os.path.join(folder, path))
+
+
+def run(command, folder):
+    env = {**os.environ, 'MPLBACKEND': 'Agg',
+           'PYTHONPATH': os.pathsep.join([os.path.dirname(SCRIPT), os.environ.get('PYTHONPATH', '')])}
+    start_time = time.perf_counter()
+    subprocess.run(command, cwd=folder, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000, help='Predictions per model')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--skip-original', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_predictions(folder, args.rows)
+        runs = [] if args.skip_original else [('2-draw-all-model.py', [sys.executable, SCRIPT],
+                                               'SSC_Prediction_Comparison_All_Models.png')]
+        for density in ('hexbin', 'hist2d'):
+            output = f'figure_{density}.png'
+            runs.append((f'figures --density {density}',
+                         [sys.executable, '-m', 'ssc_model.figures', '--density', density, '--output', output,
+                          '--workers', str(args.workers)], output))
+        print(f"{args.rows} predictions x {len(PREDICTION_FILES)} models")
+        for label, command, output in runs:
+            seconds = run(command, folder)
+            size = os.path.getsize(os.path.join(folder, output)) / 1e6
+            print(f"{label:>28}: {seconds:7.1f}s, {size:5.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compact .npz tree ensembles (ssc_model.forest) vs. the original RandomForest/XGBoost models.
+
+Trains both models with the original hyperparameters on synthetic
+matchups, exports them, checks that the predictions are bitwise identical
+(also with missing values) and reports file size, small-batch latency and
+bulk throughput.
+
+    python bench_forest.py --rows 5000 --predict-rows 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from bench_training import synthetic_matchups
+from ssc_model.data import split_features
+from ssc_model.forest import CompactForest, export_model
+from ssc_model.zoo import build_model
+
+
+def latency_ms(model, X, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - start_time)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000, help='Training rows')
+    parser.add_argument('--predict-rows', type=int, default=200_000)
+    parser.add_argument('--models', nargs='+', default=['RandomForest', 'XGBoost'])
+    args = parser.parse_args()
+
+    X_train, y_train = split_features(synthetic_matchups(args.rows, seed=1))
+    X_test, _ = split_features(synthetic_matchups(args.predict_rows, seed=2))
+    X_missing = X_test.iloc[:10_000].copy()
+    X_missing.iloc[::7, 2] = np.nan
+
+    with tempfile.TemporaryDirectory() as folder:
+        for model_name in args.models:
+            model = build_model(model_name, 42, n_jobs=1).fit(X_train, y_train)
+            model_file = os.path.join(folder, f'{model_name}.joblib')
+            joblib.dump(model, model_file)
+            compact_file = os.path.join(folder, f'{model_name}.npz')
+            export_model(model).save(compact_file)
+            compact = CompactForest.load(compact_file)
+
+            for X in (X_test, X_missing):
+                expected = model.predict(X)
+                assert np.array_equal(expected.astype(compact.value.dtype), compact.predict(X))
+
+            start_time = time.perf_counter()
+            model.predict(X_test)
+            original_bulk = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            compact.predict(X_test)
+            compact_bulk = time.perf_counter() - start_time
+
+            print(f"\n{model_name}: {len(compact.roots)} trees, {len(compact.feature)} nodes, predictions identical")
+            print(f"  file size:  {os.path.getsize(model_file) / 1e6:8.2f} MB -> "
+                  f"{os.path.getsize(compact_file) / 1e6:8.2f} MB")
+            for rows in (1, 100):
+                original = latency_ms(model, X_test.iloc[:rows], 20)
+                fast = latency_ms(compact, X_test.iloc[:rows], 20)
+                print(f"  {rows:>3} rows:   {original:8.2f} ms -> {fast:8.2f} ms ({original / fast:.1f}x)")
+            print(f"  bulk:       {len(X_test) / original_bulk:8.0f} rows/s -> {len(X_test) / compact_bulk:8.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Incremental update vs. full retrain after appending matchups, on synthetic data.
+
+Trains every model on --rows matchups with 1-SSC-all-model.py's main(),
+appends --new rows to train_data.csv, then updates the models with
+--incremental and, in a second folder, retrains them from scratch on the
+same rows. Reports fit time and test R² of both (for the first of --seeds),
+and checks that every seed was updated and kept in the mean ± std rows of
+model_performance.parquet.
+
+    python bench_incremental.py --rows 5000 --new 250
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import warnings
+
+from sklearn.exceptions import ConvergenceWarning
+
+from bench_training import synthetic_matchups
+from ssc_model.data import read_table
+from ssc_model.train import PERFORMANCE_FILE
+from ssc_model.train import main as train_main
+from ssc_model.zoo import MODEL_NAMES
+
+
+def in_folder(folder, argv):
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        return {(result.model, result.seed): result for result in train_main(argv)}
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--new', type=int, default=250)
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES)
+    parser.add_argument('--seeds', nargs='+', default=['42', '7'])
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', ConvergenceWarning)
+
+    argv = ['--models', *args.models, '--seeds', *args.seeds, '--workers', '1']
+    with tempfile.TemporaryDirectory() as incremental, tempfile.TemporaryDirectory() as full:
+        synthetic_matchups(args.rows, seed=1).to_csv(os.path.join(incremental, 'train_data.csv'), index=False)
+        synthetic_matchups(args.rows // 4, seed=2).to_csv(os.path.join(incremental, 'test_data.csv'), index=False)
+        in_folder(incremental, argv)
+
+        # New matchups appended to the end of the file
+        synthetic_matchups(args.new, seed=3).to_csv(os.path.join(incremental, 'train_data.csv'), mode='a',
+                                                     header=False, index=False)
+        for name in ('train_data.csv', 'test_data.csv'):
+            shutil.copy(os.path.join(incremental, name), full)
+
+        updated = in_folder(incremental, argv + ['--incremental'])
+        retrained = in_folder(full, argv)
+        performance = read_table(os.path.join(incremental, PERFORMANCE_FILE)).set_index('Model')
+
+    seeds = sorted(int(seed) for seed in args.seeds)
+    assert sorted(updated) == sorted((model_name, seed) for model_name in args.models for seed in seeds), sorted(updated)
+    for model_name in args.models:
+        assert performance.loc[f'{model_name}_mean', 'Seeds'] == ' '.join(map(str, seeds))
+
+    print(f"\n{args.new} rows appended to {args.rows}")
+    print(f"{'model':>12} {'update s':>9} {'retrain s':>9} {'update R2':>9} {'retrain R2':>10}")
+    key = int(args.seeds[0])
+    for model_name in args.models:
+        update, retrain = updated[model_name, key], retrained[model_name, key]
+        print(f"{model_name:>12} {update.seconds:>9.2f} {retrain.seconds:>9.2f} {update.r2:>9.4f} {retrain.r2:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""ssc_model.metrics vs. the per-call pandas metrics of the original 2-draw-all-model.py.
+
+Checks that both give the same EI, Bias, R² and RMSE, then times one
+evaluation, --resamples bootstrap resamples and --groups per-group
+evaluations of --rows synthetic predictions.
+
+    python bench_metrics.py --rows 10000 --resamples 1000 --groups 200
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from ssc_model.metrics import bootstrap_metrics, compute_metrics, grouped_metrics
+
+
+# The original functions of 2-draw-all-model.py
+def ei(y, ypred):
+    df = pd.DataFrame({'y': y, 'ypred': ypred})
+    df = df[(df['y'] >= 0) & (df['ypred'] >= 0)]
+    Y = np.median(abs(np.log(df['ypred'] / df['y'])))
+    return math.e ** Y - 1
+
+
+def bias(y, ypred):
+    df = pd.DataFrame({'y': y, 'ypred': ypred})
+    df = df[(df['y'] >= 0) & (df['ypred'] >= 0)]
+    z = np.median(np.log10(df['ypred'] / df['y']))
+    return 100 * np.sign(z) * (math.e ** abs(z) - 1)
+
+
+def calculate_metrics(y, ypred):
+    return ei(y, ypred), bias(y, ypred), np.corrcoef(y, ypred)[0, 1] ** 2, np.sqrt(np.mean((ypred - y) ** 2))
+
+
+def timed(function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--resamples', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    actual = 10 ** rng.uniform(0, 3.5, args.rows)
+    predicted = actual * np.exp(rng.normal(0, 0.5, args.rows))
+    predicted[::97] *= -1  # Negative predictions are excluded from EI and Bias
+    frame = pd.DataFrame({'Actual': actual, 'Predicted': predicted, 'group': rng.integers(0, args.groups, args.rows)})
+
+    new = compute_metrics(actual, predicted)
+    assert np.allclose([new['EI'], new['Bias'], new['R2_corr'], new['RMSE']], calculate_metrics(actual, predicted),
+                       rtol=1e-12)
+
+    _, old_single = timed(lambda: [calculate_metrics(actual, predicted) for _ in range(20)])
+    _, new_single = timed(lambda: [compute_metrics(actual, predicted) for _ in range(20)])
+
+    def old_bootstrap():
+        index = np.random.default_rng(1).integers(0, args.rows, (args.resamples, args.rows))
+        return [calculate_metrics(actual[i], predicted[i]) for i in index]
+    _, old_boot = timed(old_bootstrap)
+    _, new_boot = timed(bootstrap_metrics, actual, predicted, args.resamples, 1)
+
+    _, old_grouped = timed(lambda: {key: calculate_metrics(group['Actual'].to_numpy(), group['Predicted'].to_numpy())
+                                    for key, group in frame.groupby('group')})
+    _, new_grouped = timed(grouped_metrics, frame, 'group')
+
+    print(f"{'':>26} {'original':>10} {'metrics.py':>10}")
+    for label, old, fast in ((f'single call ({args.rows} rows)', old_single / 20, new_single / 20),
+                             (f'bootstrap x{args.resamples}', old_boot, new_boot),
+                             (f'{args.groups} groups', old_grouped, new_grouped)):
+        print(f"{label:>26} {old * 1000:>8.1f}ms {fast * 1000:>8.1f}ms  ({old / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
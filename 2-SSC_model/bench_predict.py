@@ -0,0 +1,95 @@
+"""Throughput and memory of ssc_model.predict on a synthetic reflectance dataset (10M rows by default).
+
+Trains a RandomForest with the original hyperparameters on synthetic
+matchups, writes a hive-partitioned dataset like hls_extract.ingest does,
+predicts it with each --workers setting and checks a sample against
+model.predict. Also checks that load_model leaves every model single-threaded,
+including a fitted log_target TransformedTargetRegressor.
+
+    python bench_predict.py --rows 10000000 --workers 1 8
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from bench_training import BANDS, synthetic_matchups
+from ssc_model.data import split_features
+from ssc_model.predict import load_model, predict_dataset
+from ssc_model.zoo import build_model
+
+
+def write_reflectance(folder, rows, rows_per_part=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(folder, 'waterbody=lake'))
+    dates = np.datetime64('2021-04-01') + np.arange(150)
+    for part, start in enumerate(range(0, rows, rows_per_part)):
+        n = min(rows_per_part, rows - start)
+        columns = {
+            'waterbody_id': pa.array(rng.integers(1, 1_400_000, n)),
+            'fire_start': pa.array(np.full(n, np.datetime64('2021-06-01'))).cast(pa.date32()),
+            'fire_end': pa.array(np.full(n, np.datetime64('2021-06-10'))).cast(pa.date32()),
+            'date': pa.array(rng.choice(dates, n)).cast(pa.date32()),
+        }
+        for band in BANDS:
+            columns[band] = pa.array(rng.uniform(0.005, 0.2, n).astype(np.float32))
+        pq.write_table(pa.table(columns), os.path.join(folder, 'waterbody=lake', f'part-{part:05d}.parquet'))
+
+
+def threads(model):
+    # n_jobs/nthread of the estimators that predict: the fitted regressor_ of a TransformedTargetRegressor
+    estimator = getattr(model, 'regressor_', model)
+    return {name: value for name, value in estimator.get_params().items()
+            if name.rsplit('__', 1)[-1] in ('n_jobs', 'nthread')}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--batch-size', type=int, default=1 << 18)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        X, y = split_features(synthetic_matchups(5000, seed=1))
+        model_path = os.path.join(folder, 'RandomForest_model.joblib')
+        joblib.dump(build_model('RandomForest', 42, n_jobs=-1).fit(X, y), model_path)
+        input_path = os.path.join(folder, 'reflectance')
+        start_time = time.perf_counter()
+        write_reflectance(input_path, args.rows)
+        print(f"wrote {args.rows} rows ({time.perf_counter() - start_time:.1f}s), "
+              f"model {os.path.getsize(model_path) / 1e6:.1f} MB")
+
+        # Batches are the unit of parallelism: every loaded model must predict on one thread
+        for preprocess in ([], ['log_target'], ['scale', 'log_target']):
+            path = os.path.join(folder, 'threads.joblib')
+            joblib.dump(build_model('RandomForest', 42, n_jobs=-1, preprocess=preprocess, n_estimators=5).fit(X, y),
+                        path)
+            found = threads(load_model(path))
+            assert found and set(found.values()) == {1}, (preprocess, found)
+
+        for workers in sorted(set(args.workers)):
+            output_path = os.path.join(folder, f'ssc-{workers}.parquet')
+            start_time = time.perf_counter()
+            model = load_model(model_path)
+            rows = predict_dataset(model, input_path, output_path, batch_size=args.batch_size, workers=workers)
+            elapsed = time.perf_counter() - start_time
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            assert rows == args.rows
+            print(f"workers={workers:>3}: {elapsed:6.1f}s, {rows / elapsed:10.0f} rows/s, peak RSS {peak:.0f} MB")
+
+        sample = pq.read_table(input_path + '/waterbody=lake/part-00000.parquet').slice(0, 1000).to_pandas()
+        predicted = pq.read_table(output_path).slice(0, 1000).column('ssc').to_numpy()
+        expected = model.predict(sample[BANDS]).astype(np.float32)
+        np.testing.assert_array_equal(predicted, expected)
+        print("sample matches model.predict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Fit time and accuracy of SVR and DNN with and without preprocessing, on synthetic matchups.
+
+Each --preprocess setting ('none' is the raw reflectance the original
+script used) is fitted for every --seeds; the first seeds fill the
+joblib.Memory cache of the transformers and later ones reuse it.
+
+    python bench_preprocess.py --rows 5000 --seeds 42 7 13
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from sklearn.metrics import r2_score
+
+from bench_training import synthetic_matchups
+from ssc_model.data import split_features
+from ssc_model.preprocess import parse_steps
+from ssc_model.zoo import build_model
+
+SETTINGS = ['none', 'scale', 'ratios scale', 'ratios scale log_target']
+
+
+def iterations(model):
+    # n_iter_ of the MLP / SVR (an array per class for SVR), wherever it sits in the pipeline
+    model = getattr(model, 'regressor_', model)
+    model = model[-1] if hasattr(model, 'steps') else model
+    return int(np.sum(model.n_iter_))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--seeds', type=int, nargs='+', default=[42, 7, 13])
+    parser.add_argument('--models', nargs='+', default=['SVR', 'DNN'])
+    args = parser.parse_args()
+
+    X_train, y_train = split_features(synthetic_matchups(args.rows, seed=1))
+    X_test, y_test = split_features(synthetic_matchups(args.rows // 4, seed=2))
+
+    print(f"{'model':>5} {'preprocess':>24} {'first seed s':>12} {'other seeds s':>13} {'iterations':>10} {'test R2':>8}")
+    for model_name in args.models:
+        for setting in SETTINGS:
+            steps = parse_steps(setting.split())
+            seconds, scores, n_iter = [], [], []
+            with tempfile.TemporaryDirectory() as memory:
+                for seed in args.seeds:
+                    start_time = time.perf_counter()
+                    model = build_model(model_name, seed, preprocess=steps, memory=memory).fit(X_train, y_train)
+                    seconds.append(time.perf_counter() - start_time)
+                    scores.append(r2_score(y_test, model.predict(X_test)))
+                    n_iter.append(iterations(model))
+            others = np.mean(seconds[1:]) if len(seconds) > 1 else float('nan')
+            print(f"{model_name:>5} {setting:>24} {seconds[0]:>12.2f} {others:>13.2f} {np.mean(n_iter):>10.0f} "
+                  f"{np.mean(scores):>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Successive halving vs. evaluating every candidate on the full data, on synthetic matchups.
+
+For each model the same --candidates are scored both ways (3-fold CV);
+the best parameters of each are refitted and scored on a held-out test
+set. A second halving run must be served entirely from the fold cache.
+
+    python bench_search.py --rows 5000 --candidates 27 --models RandomForest SVR
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from bench_training import synthetic_matchups
+from sklearn.metrics import r2_score
+
+from ssc_model.data import split_features
+from ssc_model.search import successive_halving
+from ssc_model.zoo import build_model
+
+
+def test_r2(model_name, params, data):
+    X_train, y_train, X_test, y_test = data
+    model = build_model(model_name, 0, n_jobs=-1, **params)
+    return r2_score(y_test, model.fit(X_train, y_train).predict(X_test))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--candidates', type=int, default=27)
+    parser.add_argument('--models', nargs='+', default=['RandomForest', 'SVR'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    data = (*split_features(synthetic_matchups(args.rows, seed=1)),
+            *split_features(synthetic_matchups(args.rows // 2, seed=2)))
+    X_train, y_train = data[:2]
+
+    with tempfile.TemporaryDirectory() as folder:
+        cache_file = os.path.join(folder, 'cache.jsonl')
+        for model_name in args.models:
+            start_time = time.perf_counter()
+            halving_best, history = successive_halving(model_name, X_train, y_train, args.candidates,
+                                                       workers=args.workers, cache_file=cache_file)
+            halving_wall = time.perf_counter() - start_time
+            halving_cpu = sum(rung['fit_seconds'] for rung in history)
+
+            start_time = time.perf_counter()
+            _, resumed = successive_halving(model_name, X_train, y_train, args.candidates,
+                                            workers=args.workers, cache_file=cache_file)
+            assert sum(rung['fitted'] for rung in resumed) == 0
+            resume_wall = time.perf_counter() - start_time
+
+            # Full evaluation: every candidate on all rows (the second rung then only reads the cache)
+            start_time = time.perf_counter()
+            full_best, full_history = successive_halving(model_name, X_train, y_train, args.candidates,
+                                                         eta=args.candidates, min_rows=len(X_train),
+                                                         workers=args.workers,
+                                                         cache_file=os.path.join(folder, 'full.jsonl'))
+            full_wall = time.perf_counter() - start_time
+            full_cpu = full_history[0]['fit_seconds']
+
+            default_r2 = test_r2(model_name, {}, data)
+            halving_r2 = test_r2(model_name, halving_best, data)
+            full_r2 = test_r2(model_name, full_best, data)
+            print(f"\n{model_name}: test R² default {default_r2:.4f}, halving {halving_r2:.4f}, full {full_r2:.4f}")
+            print(f"  halving: {halving_cpu:7.1f} CPU-s, {halving_wall:6.1f}s wall, resumed from cache in "
+                  f"{resume_wall:.1f}s")
+            print(f"  full:    {full_cpu:7.1f} CPU-s, {full_wall:6.1f}s wall ({full_cpu / halving_cpu:.1f}x the CPU)")
+            print(f"  halving best: {halving_best}\n  full best:    {full_best}")
+
+
+if __name__ == "__main__":
+    main()
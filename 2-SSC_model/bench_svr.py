@@ -0,0 +1,74 @@
+"""Accuracy vs. fit time of the SVR engines (ssc_model.svr) on synthetic matchups.
+
+For every training size the exact SVR (up to --max-exact rows, it is
+quadratic or worse) and the Nyström / random Fourier feature engines with
+each --components are fitted with the original C and epsilon on scaled
+bands, and scored on the same held-out rows. Writes the table to --csv
+and the R²-vs-seconds curves to --plot.
+
+    python bench_svr.py --rows 2000 5000 10000 20000 50000 --components 100 300 1000
+"""
+import argparse
+import time
+import warnings
+
+import matplotlib
+import pandas as pd
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.metrics import r2_score
+
+from bench_training import synthetic_matchups
+from ssc_model.data import split_features
+from ssc_model.zoo import build_model
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+def fit_score(data, engine, n_components=None):
+    X_train, y_train, X_test, y_test = data
+    params = {'engine': engine} if n_components is None else {'engine': engine, 'n_components': n_components}
+    start_time = time.perf_counter()
+    model = build_model('SVR', 0, **params).fit(X_train, y_train)
+    seconds = time.perf_counter() - start_time
+    return seconds, r2_score(y_test, model.predict(X_test))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[2000, 5000, 10000, 20000, 50000])
+    parser.add_argument('--components', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--max-exact', type=int, default=20000, help='Largest training size fitted exactly')
+    parser.add_argument('--csv', default='svr_engines.csv')
+    parser.add_argument('--plot', default='svr_engines.png')
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', ConvergenceWarning)
+
+    test = split_features(synthetic_matchups(5000, seed=2))
+    records = []
+    for rows in args.rows:
+        data = (*split_features(synthetic_matchups(rows, seed=1)), *test)
+        runs = [('exact', None)] if rows <= args.max_exact else []
+        runs += [(engine, n) for engine in ('nystroem', 'rff') for n in args.components]
+        for engine, n_components in runs:
+            seconds, r2 = fit_score(data, engine, n_components)
+            label = engine if n_components is None else f'{engine}-{n_components}'
+            records.append({'rows': rows, 'engine': label, 'seconds': seconds, 'r2': r2})
+            print(f"{rows:>7} rows {label:>14}: {seconds:8.2f}s  R² {r2:.4f}")
+
+    results = pd.DataFrame(records)
+    results.to_csv(args.csv, index=False)
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for label, group in results.groupby('engine', sort=False):
+        axes[0].plot(group['seconds'], group['r2'], marker='o', label=label)
+        axes[1].plot(group['rows'], group['seconds'], marker='o', label=label)
+    axes[0].set(xscale='log', xlabel='Fit time (s)', ylabel='Test R²', title='Accuracy vs. fit time')
+    axes[1].set(xscale='log', yscale='log', xlabel='Training rows', ylabel='Fit time (s)', title='Fit time')
+    axes[0].legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(args.plot, dpi=150)
+    print(f"Saved {args.csv} and {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
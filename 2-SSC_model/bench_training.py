@@ -0,0 +1,64 @@
+"""Sequential vs. pooled training of the SSC model zoo on synthetic matchups.
+
+Runs every model x seed once with a single worker and once with --workers,
+and checks that both give the same metrics.
+
+    python bench_training.py --rows 5000 --seeds 42 7 13 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ssc_model.data import split_features
+from ssc_model.train import run_jobs, summarize
+from ssc_model.zoo import MODEL_NAMES
+
+BANDS = ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+
+
+def synthetic_matchups(rows, seed=0):
+    # Band medians in reflectance units and an SSC (mg/L) that grows with red/NIR reflectance
+    rng = np.random.default_rng(seed)
+    bands = rng.uniform(0.005, 0.2, (rows, len(BANDS)))
+    ssc = 10 ** (0.5 + 8 * bands[:, 2] + 6 * bands[:, 3] - 3 * bands[:, 0] + rng.normal(0, 0.15, rows))
+    data = pd.DataFrame(bands, columns=BANDS)
+    data['ssc'] = ssc
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--seeds', type=int, nargs='+', default=[42, 7, 13])
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    train = synthetic_matchups(args.rows, seed=1)
+    test = synthetic_matchups(args.rows // 4, seed=2)
+    data = (*split_features(train), *split_features(test))
+
+    cwd = os.getcwd()
+    summaries = {}
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            for workers in sorted({1, args.workers}):
+                start_time = time.perf_counter()
+                results = run_jobs(args.models, args.seeds, data, workers)
+                elapsed = time.perf_counter() - start_time
+                summaries[workers] = summary = summarize(results)
+                print(f"workers={workers}: {elapsed:.1f}s wall, {summary.seconds.sum() * len(args.seeds):.1f}s of fits")
+                print(summary[['seconds', 'peak_mb', 'mae', 'mae_std', 'r2', 'r2_std']].round(3).to_string())
+        finally:
+            os.chdir(cwd)
+    first, last = summaries[1], summaries[max(summaries)]
+    assert np.allclose(first.loc[last.index, ['mae', 'mse', 'r2']], last[['mae', 'mse', 'r2']], rtol=1e-6)
+
+
+if __name__ == "__main__":
+    main()
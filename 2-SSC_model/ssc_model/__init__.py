@@ -0,0 +1 @@
+"""Shared helpers for the SSC model scripts (1-SSC-all-model.py, 2-draw-all-model.py)."""
@@ -0,0 +1,122 @@
+"""Training/test matchups, prediction results and metrics tables on disk.
+
+Tables are stored as Parquet (or Feather, by extension) with float columns
+as float32, and read with pyarrow, only the requested ``columns``. A
+legacy CSV is converted once: reading ``train_data.csv`` (or asking for
+``x.parquet`` when only ``x.csv`` exists) writes ``train_data.parquet``
+next to it and uses that from then on, until the CSV is modified again
+(e.g. new matchups appended), which converts it anew.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+TRAIN_FILE = './train_data.csv'
+TEST_FILE = './test_data.csv'
+TARGET = 'ssc'
+COLUMNAR_FORMATS = ('.parquet', '.feather')
+CSV_BLOCK_SIZE = 64 << 20  # Bytes of CSV per converted block (and Parquet row group)
+
+
+def to_float32(frame):
+    floats = frame.select_dtypes('float').columns
+    return frame.astype(dict.fromkeys(floats, np.float32)) if len(floats) else frame
+
+
+def _sources(path):
+    # (columnar file, legacy CSV) that may hold the table of ``path``
+    stem, ext = os.path.splitext(path)
+    columnar = path if ext in COLUMNAR_FORMATS else stem + '.parquet'
+    return columnar, stem + '.csv'
+
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def table_exists(path):
+    return any(_mtime(source) is not None for source in _sources(path))
+
+
+def write_table(frame, path):
+    """Write ``frame`` (floats as float32) as Parquet, Feather or CSV, by the extension of ``path``."""
+    ext = os.path.splitext(path)[1]
+    if ext == '.csv':
+        frame.to_csv(path, index=False)
+    elif ext == '.feather':
+        to_float32(frame).reset_index(drop=True).to_feather(path)
+    else:
+        to_float32(frame).to_parquet(path, engine='pyarrow', index=False)
+
+
+def _float32_schema(schema):
+    return pa.schema([field.with_type(pa.float32()) if pa.types.is_floating(field.type) else field
+                      for field in schema])
+
+
+def convert_csv(csv, path):
+    """Convert a CSV to ``path`` with Arrow (floats as float32), block by block for Parquet.
+
+    The table is written to a temporary file in the same folder and renamed
+    into place once complete: an interrupted conversion would otherwise leave
+    a valid but truncated file, newer than the CSV, that read_table trusts.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-',
+                                    suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        _convert_csv(csv, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _convert_csv(csv, path):
+    if not path.endswith('.feather'):
+        try:
+            reader = pa_csv.open_csv(csv, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE))
+            schema = _float32_schema(reader.schema)
+            with pq.ParquetWriter(path, schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch.cast(schema))
+            return
+        except pa.ArrowInvalid:
+            pass  # A column's type changed after the first block: infer from the whole file below
+    table = pa_csv.read_csv(csv)
+    table = table.cast(_float32_schema(table.schema))
+    if path.endswith('.feather'):
+        feather.write_feather(table, path)
+    else:
+        pq.write_table(table, path)
+
+
+def read_table(path, columns=None):
+    """Read a table written by write_table, converting a newer legacy CSV first."""
+    columnar, csv = _sources(path)
+    columnar_time, csv_time = _mtime(columnar), _mtime(csv)
+    if csv_time is not None and (columnar_time is None or csv_time > columnar_time):
+        convert_csv(csv, columnar)
+    elif columnar_time is None:
+        raise FileNotFoundError(2, 'No such file or directory', path)
+    if columnar.endswith('.feather'):
+        return pd.read_feather(columnar, columns=columns)
+    return pd.read_parquet(columnar, engine='pyarrow', columns=columns)
+
+
+def split_features(data, target=TARGET):
+    return data.drop(columns=[target]), data[target]
+
+
+def load_split(train_file=TRAIN_FILE, test_file=TEST_FILE, target=TARGET):
+    """Return ``X_train, y_train, X_test, y_test``."""
+    X_train, y_train = split_features(read_table(train_file), target)
+    X_test, y_test = split_features(read_table(test_file), target)
+    return X_train, y_train, X_test, y_test
@@ -0,0 +1,192 @@
+"""Headless rendering of the 2x2 prediction-vs-actual figure for large prediction sets.
+
+The same figure as 2-draw-all-model.py (log-log axes from 1 to 5000 mg/L,
+1:1 line, dashed density contours at 0.5/0.7/0.9, Error/R²/RMSE), but:
+
+- the points are binned into a log-log 2-D histogram or a hexbin instead of
+  one marker per prediction (``--scatter`` adds the markers back as a
+  rasterized layer);
+- the contours come from a Gaussian KDE evaluated on that grid by FFT
+  convolution, O(grid) instead of O(points x grid) as in seaborn's
+  kdeplot. Bandwidths follow Scott's rule per axis (seaborn uses the full
+  covariance), in log10 space like kdeplot on log axes;
+- each panel is drawn with the Agg backend in its own process and the four
+  images are tiled, so nothing is shown and the panels render in parallel.
+  Vector outputs (.pdf, .svg) are drawn in one figure instead.
+
+    python -m ssc_model.figures --output SSC_Prediction_Comparison_All_Models.png --density hexbin
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from matplotlib.colors import LinearSegmentedColormap, LogNorm, to_rgb  # noqa: E402
+from scipy.signal import fftconvolve  # noqa: E402
+
+from .data import read_table, table_exists  # noqa: E402
+from .metrics import compute_metrics  # noqa: E402
+from .zoo import MODEL_NAMES, PREDICTION_FILES  # noqa: E402
+
+COLORS = ['#2a9d8f', '#e9c46a', '#415a77', '#e76f51']
+BOUNDS = (1, 5000)
+KDE_LEVELS = [0.5, 0.7, 0.9]
+GRID_SIZE = 256
+PANEL_SIZE = 4  # inches; the original figure is 8 x 8 for 2 x 2 panels
+DPI = 300
+OUTPUT_FILE = 'SSC_Prediction_Comparison_All_Models.png'
+
+
+def log_histogram(actual, predicted, bounds=BOUNDS, bins=GRID_SIZE):
+    """Counts of the pairs inside ``bounds`` on a ``bins`` x ``bins`` grid in log10 space, and the bin edges."""
+    log_range = np.log10(bounds)
+    counts, x_edges, y_edges = np.histogram2d(np.log10(actual), np.log10(predicted), bins=bins,
+                                              range=[log_range, log_range])
+    return counts, x_edges, y_edges
+
+
+def kde_grid(counts, x_edges, y_edges, x_std, y_std):
+    """Gaussian KDE of binned log10 values, by FFT convolution of the counts with the kernel."""
+    n = counts.sum()
+    factor = n ** (-1 / 6)  # Scott's rule in two dimensions
+    kernels = []
+    for std, edges in ((x_std, x_edges), (y_std, y_edges)):
+        sigma = max(std * factor / (edges[1] - edges[0]), 0.5)  # In bins
+        offsets = np.arange(-int(np.ceil(4 * sigma)), int(np.ceil(4 * sigma)) + 1)
+        kernels.append(np.exp(-0.5 * (offsets / sigma) ** 2))
+    kernel = np.outer(*kernels)
+    return np.clip(fftconvolve(counts, kernel / kernel.sum(), mode='same'), 0, None)
+
+
+def iso_proportion_levels(density, levels=KDE_LEVELS):
+    # As seaborn: the contour for level p has a fraction p of the probability mass below it
+    values = np.sort(density.ravel())
+    mass = np.cumsum(values)
+    mass /= mass[-1]
+    return np.unique(values[np.searchsorted(mass, levels)])
+
+
+def _density_cmap(color):
+    rgb = np.array(to_rgb(color))
+    return LinearSegmentedColormap.from_list('density', [0.85 + 0.15 * rgb, rgb, 0.6 * rgb])
+
+
+def draw_panel(ax, model_name, actual, predicted, color, density='hexbin', scatter=False, show_ylabel=True):
+    """Draw one model's panel on ``ax``."""
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    metrics = compute_metrics(actual, predicted)
+    inside = ((actual >= BOUNDS[0]) & (actual <= BOUNDS[1]) & (predicted >= BOUNDS[0]) & (predicted <= BOUNDS[1]))
+    x, y = actual[inside], predicted[inside]
+
+    if scatter:
+        ax.scatter(x, y, s=20, c=color, alpha=0.5, edgecolor='none', rasterized=True)
+    counts, x_edges, y_edges = log_histogram(x, y)
+    if density == 'hexbin' and len(x):
+        ax.hexbin(x, y, xscale='log', yscale='log', gridsize=80, extent=np.log10(BOUNDS * 2),
+                  bins='log', mincnt=1, cmap=_density_cmap(color), linewidths=0, rasterized=True)
+    elif density == 'hist2d' and len(x):
+        ax.pcolormesh(10 ** x_edges, 10 ** y_edges, np.ma.masked_equal(counts, 0).T, norm=LogNorm(),
+                      cmap=_density_cmap(color), rasterized=True)
+    ax.plot(BOUNDS, BOUNDS, ls='--', c='k', alpha=0.8)
+
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlim(*BOUNDS)
+    ax.set_ylim(*BOUNDS)
+
+    if len(x) > 2:
+        grid = kde_grid(counts, x_edges, y_edges, np.log10(x).std(), np.log10(y).std())
+        x_centers = 10 ** ((x_edges[:-1] + x_edges[1:]) / 2)
+        y_centers = 10 ** ((y_edges[:-1] + y_edges[1:]) / 2)
+        ax.contour(x_centers, y_centers, grid.T, levels=iso_proportion_levels(grid), colors='k', linewidths=0.5,
+                   linestyles='--', zorder=100)
+
+    for val in [1, 10, 100, 1000]:
+        ax.axhline(y=val, linestyle='-', color='gray', alpha=0.5, lw=0.3)
+        ax.axvline(x=val, linestyle='-', color='gray', alpha=0.5, lw=0.3)
+
+    ax.text(0.06, 0.70, r'$\it{Error}$' + ' = ' + '{}'.format(round(metrics['EI'], 2)), transform=ax.transAxes,
+            zorder=200)
+    ax.text(0.06, 0.90, r'$\it{R²}$' + ' = ' + '{}'.format(round(metrics['R2_corr'], 2)), transform=ax.transAxes,
+            zorder=200)
+    ax.text(0.06, 0.80, r'$\it{RMSE}$' + ' = ' + '{} mg/L'.format(round(metrics['RMSE'], 2)),
+            transform=ax.transAxes, zorder=200)
+    ax.set_xlabel('Actual SSC (mg/L)')
+    if show_ylabel:
+        ax.set_ylabel('Predicted SSC (mg/L)')
+    ax.set_title(f'{model_name} Prediction')
+
+
+def read_predictions(path):
+    data = read_table(path, columns=['Actual', 'Predicted'])
+    return data['Actual'].to_numpy(), data['Predicted'].to_numpy()
+
+
+def render_panel(model_name, path, color, density='hexbin', scatter=False, show_ylabel=True, dpi=DPI):
+    """RGBA image of one panel, or None when ``path`` does not exist."""
+    if not table_exists(path):
+        print(f"Prediction result file '{path}' does not exist. Skipping {model_name}.")
+        return None
+    fig, ax = plt.subplots(figsize=(PANEL_SIZE, PANEL_SIZE), dpi=dpi)
+    draw_panel(ax, model_name, *read_predictions(path), color, density, scatter, show_ylabel)
+    fig.tight_layout()
+    fig.canvas.draw()
+    image = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return image
+
+
+def render_figure(files, output, density='hexbin', scatter=False, workers=None, dpi=DPI):
+    """Write the 2 x 2 figure of ``files`` ({model: prediction file}, in panel order) to ``output``."""
+    panels = [(model_name, path, COLORS[i % len(COLORS)], density, scatter, i == 0)
+              for i, (model_name, path) in enumerate(files.items())]
+    if os.path.splitext(output)[1].lower() in ('.pdf', '.svg', '.eps'):
+        # Vector output: one figure, the rasterized layers stay bitmaps inside it
+        fig, axes = plt.subplots(2, 2, figsize=(2 * PANEL_SIZE, 2 * PANEL_SIZE), dpi=dpi)
+        for ax, (model_name, path, color, *options) in zip(axes.flat, panels):
+            if table_exists(path):
+                draw_panel(ax, model_name, *read_predictions(path), color, *options)
+            else:
+                print(f"Prediction result file '{path}' does not exist. Skipping {model_name}.")
+                ax.set_visible(False)
+        fig.tight_layout()
+        fig.savefig(output, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers or min(len(panels), os.cpu_count() or 1)) as executor:
+        images = list(executor.map(render_panel, *zip(*panels), [dpi] * len(panels)))
+    size = PANEL_SIZE * dpi
+    blank = np.full((size, size, 4), 255, dtype=np.uint8)
+    images = [blank if image is None else image[:size, :size] for image in images]
+    images += [blank] * (-len(images) % 2)
+    tiled = np.concatenate([np.concatenate(images[i:i + 2], axis=1) for i in range(0, len(images), 2)], axis=0)
+    plt.imsave(output, tiled, dpi=dpi)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the prediction comparison figure without a display.")
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--models', nargs='+', choices=MODEL_NAMES, default=MODEL_NAMES)
+    parser.add_argument('--files', nargs='+', default=None,
+                        help='Prediction files in --models order (default: the files written by training)')
+    parser.add_argument('--density', choices=['hexbin', 'hist2d', 'none'], default='hexbin')
+    parser.add_argument('--scatter', action='store_true', help='Also draw every point, as a rasterized layer')
+    parser.add_argument('--workers', type=int, default=None, help='Panels rendered at once (default: all cores)')
+    parser.add_argument('--dpi', type=int, default=DPI)
+    args = parser.parse_args(argv)
+
+    files = dict(zip(args.models, args.files or [PREDICTION_FILES[name] for name in args.models]))
+    start_time = time.perf_counter()
+    render_figure(files, args.output, args.density, args.scatter, args.workers, args.dpi)
+    print(f"Saved '{args.output}' in {time.perf_counter() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
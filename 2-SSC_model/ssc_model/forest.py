@@ -0,0 +1,216 @@
+"""Flattened, array-backed copies of the RandomForest and XGBoost SSC models.
+
+All trees of an ensemble are stored as contiguous node arrays: split
+feature (int16), float32 threshold, left child (int32, -1 for leaves),
+missing-value direction and leaf value. Nodes are renumbered breadth first
+so the right child always follows the left one, and a split is a single
+``left + (x > threshold)``. Splits are normalised to ``x <= threshold`` on
+float32 inputs; the thresholds are rounded *down* to float32 (and XGBoost's
+``x < split`` becomes ``x <= previous float32``), so every row takes exactly
+the same path as in scikit-learn or XGBoost. Leaves are accumulated tree by
+tree in the original order and precision (float64 mean for RandomForest,
+float32 sum plus base_score for XGBoost).
+
+Prediction walks all (row, tree) pairs of a chunk level by level with NumPy
+gathers, dropping pairs as they reach a leaf. The .npz file holds only
+these arrays, a fraction of the pickled estimator:
+
+    python -m ssc_model.forest RandomForest_model_R2_0.85.joblib --check test_data.csv
+"""
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+
+from .data import read_table
+
+CHUNK_SIZE = 1 << 12
+
+
+def _floor_float32(threshold):
+    # Largest float32 <= threshold: for float32 x, x <= t  <=>  x <= _floor_float32(t)
+    rounded = np.asarray(threshold, dtype=np.float64).astype(np.float32)
+    too_big = rounded.astype(np.float64) > threshold
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def _breadth_first(left, right):
+    """Node order of one tree with the two children of every split adjacent."""
+    order = [0]
+    for node in order:
+        if left[node] >= 0:
+            order += [left[node], right[node]]
+    order = np.asarray(order)
+    new_id = np.empty(len(left), dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+    new_left = np.where(left[order] >= 0, new_id[np.maximum(left[order], 0)], -1)
+    return order, new_left
+
+
+class CompactForest:
+    """Tree ensemble as flat node arrays; ``kind`` is 'mean' (RandomForest) or 'sum' (XGBoost)."""
+
+    def __init__(self, feature, threshold, left, default_left, value, roots, kind, base_score=0.0,
+                 feature_names=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int16)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.kind = kind
+        self.base_score = base_score
+        self.feature_names_in_ = None if feature_names is None else np.asarray(feature_names, dtype=object)
+        self.is_leaf = self.left < 0
+
+    @classmethod
+    def _from_trees(cls, trees, **kwargs):
+        # trees: one (feature, threshold, left, right, default_left, value) tuple per tree, local node ids
+        parts = {name: [] for name in ('feature', 'threshold', 'left', 'default_left', 'value')}
+        roots = []
+        offset = 0
+        for feature, threshold, left, right, default_left, value in trees:
+            order, left = _breadth_first(left, right)
+            parts['feature'].append(feature[order])
+            parts['threshold'].append(threshold[order])
+            parts['left'].append(np.where(left >= 0, left + offset, -1))
+            parts['default_left'].append(default_left[order])
+            parts['value'].append(value[order])
+            roots.append(offset)
+            offset += len(order)
+        arrays = {name: np.concatenate(values) for name, values in parts.items()}
+        return cls(**arrays, roots=roots, **kwargs)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """RandomForestRegressor (or a single DecisionTreeRegressor)."""
+        trees = []
+        for estimator in getattr(model, 'estimators_', [model]):
+            tree = estimator.tree_
+            leaf = tree.children_left < 0
+            missing = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+            trees.append((np.where(leaf, 0, tree.feature),
+                          np.where(leaf, np.inf, _floor_float32(tree.threshold)),
+                          tree.children_left, tree.children_right,
+                          np.asarray(missing, dtype=bool),
+                          tree.value[:, 0, 0].astype(np.float64)))
+        return cls._from_trees(trees, kind='mean', feature_names=getattr(model, 'feature_names_in_', None))
+
+    @classmethod
+    def from_xgboost(cls, model):
+        """XGBRegressor (or its Booster) trained with the default gbtree booster."""
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        trees = []
+        for tree in learner['gradient_booster']['model']['trees']:
+            if any(tree['split_type']):
+                raise ValueError("categorical splits are not supported")
+            left = np.asarray(tree['left_children'])
+            leaf = left < 0
+            condition = np.asarray(tree['split_conditions'], dtype=np.float32)
+            # x < split  <=>  x <= the float32 just below split
+            below = np.nextafter(condition, np.float32(-np.inf))
+            trees.append((np.where(leaf, 0, tree['split_indices']),
+                          np.where(leaf, np.float32(np.inf), below),
+                          left, np.asarray(tree['right_children']),
+                          np.asarray(tree['default_left'], dtype=bool),
+                          np.where(leaf, condition, 0).astype(np.float32)))
+        return cls._from_trees(trees, kind='sum', base_score=base_score,
+                               feature_names=getattr(model, 'feature_names_in_', None))
+
+    def _leaves(self, X):
+        # Leaf node of every (row, tree) pair of a float32 chunk, shape (rows, trees)
+        rows, width = X.shape
+        trees = len(self.roots)
+        flat = X.ravel()
+        nodes = np.tile(self.roots, rows)
+        row_offset = np.repeat(np.arange(rows, dtype=np.int64) * width, trees)
+        check_missing = np.isnan(flat).any()
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            x = flat[row_offset[active] + self.feature[current]]
+            go_right = x > self.threshold[current]
+            if check_missing:
+                go_right |= np.isnan(x) & ~self.default_left[current]
+            following = self.left[current] + go_right
+            nodes[active] = following
+            active = active[~self.is_leaf[following]]
+        return nodes.reshape(rows, trees)
+
+    def predict(self, X, chunk_size=CHUNK_SIZE):
+        if self.feature_names_in_ is not None and hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=self.value.dtype)
+        for start in range(0, len(X), chunk_size):
+            values = self.value[self._leaves(X[start:start + chunk_size])]
+            # Same accumulation order and precision as the original predict
+            total = np.full(len(values), self.base_score if self.kind == 'sum' else 0, dtype=self.value.dtype)
+            for column in values.T:
+                total += column
+            if self.kind == 'mean':
+                total /= values.shape[1]
+            out[start:start + len(values)] = total
+        return out
+
+    def save(self, path):
+        metadata = {'kind': self.kind, 'base_score': self.base_score,
+                    'feature_names': None if self.feature_names_in_ is None else list(self.feature_names_in_)}
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left,
+                 default_left=self.default_left, value=self.value, roots=self.roots,
+                 metadata=np.frombuffer(json.dumps(metadata).encode(), dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            metadata = json.loads(arrays['metadata'].tobytes())
+            return cls(*(arrays[name] for name in ('feature', 'threshold', 'left', 'default_left', 'value', 'roots')),
+                       metadata['kind'], metadata['base_score'], metadata['feature_names'])
+
+
+def export_model(model):
+    """CompactForest of a fitted RandomForestRegressor or XGBRegressor."""
+    if hasattr(model, 'get_booster'):
+        return CompactForest.from_xgboost(model)
+    if hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+        return CompactForest.from_sklearn(model)
+    raise TypeError(f"cannot export {type(model).__name__}; only tree ensembles are supported")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a RandomForest/XGBoost SSC model to a compact .npz.")
+    parser.add_argument('model', help='Model saved by 1-SSC-all-model.py (.joblib)')
+    parser.add_argument('--output', default=None, help='Output .npz (default: next to the model)')
+    parser.add_argument('--check', default=None, help='CSV (e.g. test_data.csv) to compare predictions on')
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    compact = export_model(model)
+    output = args.output or os.path.splitext(args.model)[0] + '.npz'
+    compact.save(output)
+    print(f"{len(compact.roots)} trees, {len(compact.feature)} nodes: {os.path.getsize(args.model) / 1e6:.1f} MB "
+          f"-> {os.path.getsize(output) / 1e6:.1f} MB ({output})")
+
+    if args.check:
+        X = read_table(args.check)
+        X = X[list(compact.feature_names_in_)] if compact.feature_names_in_ is not None else X.drop(columns=['ssc'])
+        start_time = time.perf_counter()
+        expected = model.predict(X)
+        original_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        got = compact.predict(X)
+        compact_time = time.perf_counter() - start_time
+        identical = np.array_equal(expected.astype(got.dtype), got)
+        print(f"{len(X)} rows: max abs difference {np.max(np.abs(expected - got)):.3g} "
+              f"({'bitwise identical' if identical else 'not identical'}), "
+              f"original {original_time:.3f}s, compact {compact_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
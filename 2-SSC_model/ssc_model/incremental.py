@@ -0,0 +1,192 @@
+"""Update the saved SSC models when new matchups are appended to train_data.csv.
+
+A full run of 1-SSC-all-model.py writes MANIFEST_FILE: the number of
+training rows, a hash of them, and per model and seed the saved model
+file, its hyperparameters, preprocessing and full fit time. With
+``--incremental`` the training data is compared with the manifest; if its
+first ``rows`` rows still hash the same, only the appended rows are new and
+the model of every recorded seed is updated instead of refitted, so the
+mean and std over seeds stay comparable with the full run:
+
+- RandomForest: ``warm_start`` adds trees (the same share of the forest as
+  the share of new rows), fitted on all rows; the old trees are kept;
+- XGBoost: boosting continues from the saved booster for the same share of
+  extra rounds, on all rows;
+- DNN: ``partial_fit`` epochs over the new rows mixed with as many old rows
+  (replayed so the network does not forget them);
+- SVR: kept unless the new rows are at least REFIT_FRACTION of the data or
+  its MAE on them exceeds REFIT_ERROR_RATIO times its test MAE recorded in
+  the manifest; then it is refitted from scratch.
+
+Any other change to the training rows, or a model missing from the
+manifest, falls back to a full fit. Transformers of a preprocessing
+pipeline stay as fitted; only the final estimator is updated.
+"""
+import hashlib
+import json
+import math
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.pipeline import Pipeline
+
+from .preprocess import preprocessing_for
+from .zoo import build_model
+
+MANIFEST_FILE = 'train_manifest.json'
+REFIT_FRACTION = 0.1
+REFIT_ERROR_RATIO = 1.2
+DNN_EPOCHS = 20
+
+
+def rows_hash(X, y):
+    # Floats as float32: a CSV rewritten by pandas may differ in the last bits of float64 values
+    frame = pd.concat([X, y], axis=1)
+    floats = frame.select_dtypes('float').columns
+    frame[floats] = frame[floats].astype(np.float32)
+    hashed = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if path and os.path.exists(path):
+        with open(path) as file:
+            return json.load(file)
+    return None
+
+
+def write_manifest(path, X, y, entries, manifest=None):
+    """Record the training rows and ``entries`` ({model: {seed: manifest_entry(...)}}).
+
+    The seeds of a model in ``entries`` replace those recorded before; other models are kept.
+    """
+    models = dict((manifest or {}).get('models', {}))
+    models.update(entries)
+    manifest = {'rows': len(X), 'hash': rows_hash(X, y), 'columns': list(X.columns), 'models': models}
+    with open(path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def appended_rows(manifest, X, y):
+    """Index where the new rows start, or None when the old rows changed (a full fit is needed)."""
+    if manifest is None or manifest['columns'] != list(X.columns) or len(X) < manifest['rows']:
+        return None
+    rows = manifest['rows']
+    if rows_hash(X.iloc[:rows], y.iloc[:rows]) != manifest['hash']:
+        return None
+    return rows
+
+
+def _parts(model):
+    # (transform X, transform y, final estimator) of a bare model, Pipeline or TransformedTargetRegressor
+    transform_y = None
+    if isinstance(model, TransformedTargetRegressor):
+        transform_y = model.func
+        model = model.regressor_
+    if isinstance(model, Pipeline):
+        return model[:-1].transform, transform_y, model[-1]
+    return None, transform_y, model
+
+
+def _transformed(model, X, y):
+    transform_X, transform_y, estimator = _parts(model)
+    X = transform_X(X) if transform_X else X
+    y = transform_y(np.asarray(y)) if transform_y else y
+    return X, y, estimator
+
+
+def _extra(total, old_rows, new_rows):
+    # Same share of trees / rounds as the share of new rows, at least one
+    return max(1, math.ceil(total * new_rows / old_rows))
+
+
+def update_random_forest(model, X, y, start):
+    X, y, forest = _transformed(model, X, y)
+    added = _extra(forest.n_estimators, start, len(X) - start)
+    forest.set_params(warm_start=True, n_estimators=forest.n_estimators + added)
+    forest.fit(X, y)
+    forest.set_params(warm_start=False)
+    return f"+{added} trees ({forest.n_estimators} total)"
+
+
+def update_xgboost(model, X, y, start):
+    X, y, booster = _transformed(model, X, y)
+    total = booster.n_estimators
+    rounds = _extra(total, start, len(X) - start)
+    booster.set_params(n_estimators=rounds)
+    booster.fit(X, y, xgb_model=booster.get_booster())
+    booster.set_params(n_estimators=total + rounds)
+    return f"+{rounds} boosting rounds ({total + rounds} total)"
+
+
+def update_dnn(model, X, y, start, epochs=DNN_EPOCHS, seed=0):
+    X, y, mlp = _transformed(model, X, y)
+    X, y = np.asarray(X), np.asarray(y)
+    rng = np.random.default_rng(seed)
+    new = np.arange(start, len(X))
+    for _ in range(epochs):
+        replay = rng.choice(start, min(start, len(new)), replace=False)
+        batch = rng.permutation(np.concatenate([new, replay]))
+        mlp.partial_fit(X[batch], y[batch])
+    return f"{epochs} partial_fit epochs on {len(new)} new + {min(start, len(new))} replayed rows"
+
+
+def svr_needs_refit(model, X, y, start, test_mae):
+    if (len(X) - start) / len(X) >= REFIT_FRACTION:
+        return True
+    # The new rows are unseen, like the test set
+    new_mae = np.mean(np.abs(model.predict(X.iloc[start:]) - y.iloc[start:]))
+    return new_mae > REFIT_ERROR_RATIO * test_mae
+
+
+UPDATES = {'RandomForest': update_random_forest, 'XGBoost': update_xgboost, 'DNN': update_dnn}
+
+
+def update_model(model_name, entry, X, y, start, random_state=42, memory=None):
+    """Return ``(model, description, full_fit)`` with the saved model of ``entry`` brought up to date."""
+    model = joblib.load(entry['model_file'])
+    if model_name == 'SVR':
+        if not svr_needs_refit(model, X, y, start, entry['test_mae']):
+            return model, 'kept (new rows within its error)', False
+        model = build_model(model_name, random_state, preprocess=entry['preprocess'], memory=memory,
+                            **entry['params'])
+        return model.fit(X, y), 'refitted', True
+    return model, UPDATES[model_name](model, X, y, start), False
+
+
+def manifest_entry(result, params, preprocess, full_seconds, original_names):
+    # original_names: the files of the first seed keep the names without a seed suffix
+    return {'model_file': result.model_file, 'params': params or {}, 'preprocess': preprocess,
+            'full_seconds': full_seconds, 'test_mae': result.mae, 'original_names': original_names}
+
+
+def entries_for(results, first_seed, params, preprocess):
+    """Manifest entries of a full run: ``{model: {seed: entry}}`` for every seed."""
+    entries = {}
+    for result in results:
+        entries.setdefault(result.model, {})[str(result.seed)] = manifest_entry(
+            result, params.get(result.model), preprocessing_for(result.model, preprocess), result.seconds,
+            result.seed == first_seed)
+    return entries
+
+
+def seed_entries(manifest, model_name, legacy_seed):
+    """``{seed: entry}`` of a model; manifests written before seeds were recorded hold one entry of ``legacy_seed``."""
+    entries = manifest['models'][model_name]
+    if 'model_file' in entries:
+        return {str(legacy_seed): {**entries, 'original_names': True}}
+    return entries
+
+
+def timed_update(model_name, entry, data, start, random_state=42, memory=None):
+    """Update one model; returns ``(model, y_pred, seconds, description, full_fit)``."""
+    X_train, y_train, X_test, _ = data
+    start_time = time.perf_counter()
+    model, description, full_fit = update_model(model_name, entry, X_train, y_train, start, random_state, memory)
+    y_pred = model.predict(X_test)
+    return model, y_pred, time.perf_counter() - start_time, description, full_fit
@@ -0,0 +1,126 @@
+"""Error metrics of SSC predictions, for one sample, per group or over bootstrap resamples.
+
+All metrics come from the same pass over float64 arrays; a 2-D input
+(resamples x rows) gives one value per row of the array, which is how the
+bootstrap is vectorised.
+
+- EI: exp(median |ln(pred / actual)|) - 1, on rows where both are >= 0
+- Bias: 100 * sign(z) * (exp|z| - 1) with z = median log10(pred / actual),
+  on the same rows (as in 2-draw-all-model.py)
+- R2: coefficient of determination (sklearn's r2_score, used for training)
+- R2_corr: squared Pearson correlation (the R² printed on the figures)
+- RMSE, MAE, MSE
+
+    python -m ssc_model.metrics *_prediction_results*.parquet --bootstrap 1000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .data import read_table
+
+METRIC_NAMES = ['EI', 'Bias', 'R2', 'R2_corr', 'RMSE', 'MAE', 'MSE']
+BOOTSTRAP_CHUNK = 1 << 22  # Resampled values held in memory at once
+
+
+def _nanmedian_rows(values):
+    # Median of the non-NaN values of every row. np.nanmedian loops over the rows in Python
+    # for long rows; sorting puts the NaNs last, and the valid count gives the middle
+    values = np.sort(values, axis=1)
+    valid = values.shape[1] - np.isnan(values).sum(axis=1)
+    rows = np.arange(len(values))
+    low = values[rows, np.maximum(valid - 1, 0) // 2]
+    high = values[rows, np.maximum(valid, 1) // 2]
+    with np.errstate(invalid='ignore'):
+        return np.where(valid > 0, (low + high) / 2, np.nan)
+
+
+def _metrics(y, ypred):
+    # y, ypred: (k, n) float64; returns {name: (k,) array}
+    n = y.shape[1]
+    error = ypred - y
+    mse = np.einsum('ij,ij->i', error, error) / n
+    mae = np.abs(error).sum(axis=1) / n
+
+    y_mean = y.mean(axis=1, keepdims=True)
+    p_mean = ypred.mean(axis=1, keepdims=True)
+    dy = y - y_mean
+    dp = ypred - p_mean
+    syy = np.einsum('ij,ij->i', dy, dy)
+    spp = np.einsum('ij,ij->i', dp, dp)
+    syp = np.einsum('ij,ij->i', dy, dp)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = 1 - mse * n / syy
+        r2_corr = syp ** 2 / (syy * spp)
+        log_ratio = np.log(ypred / y)
+    log_ratio[(y < 0) | (ypred < 0) | np.isnan(y) | np.isnan(ypred)] = np.nan
+    ei = np.exp(_nanmedian_rows(np.abs(log_ratio))) - 1
+    z = _nanmedian_rows(log_ratio) / np.log(10)
+    bias = 100 * np.sign(z) * (np.exp(np.abs(z)) - 1)
+    return {'EI': ei, 'Bias': bias, 'R2': r2, 'R2_corr': r2_corr, 'RMSE': np.sqrt(mse), 'MAE': mae, 'MSE': mse}
+
+
+def compute_metrics(y, ypred):
+    """``{metric: float}`` for 1-D ``y``/``ypred``; ``{metric: array}`` (one per row) for 2-D."""
+    y = np.asarray(y, dtype=np.float64)
+    ypred = np.asarray(ypred, dtype=np.float64)
+    if y.ndim == 1:
+        return {name: float(value[0]) for name, value in _metrics(y[None], ypred[None]).items()}
+    return _metrics(y, ypred)
+
+
+def grouped_metrics(frame, by, actual='Actual', predicted='Predicted'):
+    """One row of METRIC_NAMES (and the row count) per group of ``frame`` (e.g. by model, region or seed)."""
+    groups = frame.groupby(by, sort=True, dropna=False)
+    ids = groups.ngroup().to_numpy()
+    # Sort once so every group is a contiguous slice
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    y = frame[actual].to_numpy(np.float64)[order]
+    ypred = frame[predicted].to_numpy(np.float64)[order]
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+    rows = [{**compute_metrics(y[start:end], ypred[start:end]), 'n': end - start} for start, end in zip(starts, ends)]
+    return pd.DataFrame(rows, index=groups.size().index)
+
+
+def bootstrap_metrics(y, ypred, n_resamples=1000, seed=0):
+    """``{metric: (n_resamples,) array}`` over resamples drawn with replacement."""
+    y = np.asarray(y, dtype=np.float64)
+    ypred = np.asarray(ypred, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    chunk = max(1, BOOTSTRAP_CHUNK // max(len(y), 1))
+    parts = []
+    for start in range(0, n_resamples, chunk):
+        index = rng.integers(0, len(y), (min(chunk, n_resamples - start), len(y)))
+        parts.append(_metrics(y[index], ypred[index]))
+    return {name: np.concatenate([part[name] for part in parts]) for name in METRIC_NAMES}
+
+
+def bootstrap_ci(y, ypred, n_resamples=1000, confidence=0.95, seed=0):
+    """DataFrame indexed by metric with the point estimate and percentile ``low``/``high`` bounds."""
+    estimate = compute_metrics(y, ypred)
+    samples = bootstrap_metrics(y, ypred, n_resamples, seed)
+    tail = (1 - confidence) / 2 * 100
+    return pd.DataFrame([[estimate[name], *np.nanpercentile(samples[name], [tail, 100 - tail])]
+                         for name in METRIC_NAMES], index=METRIC_NAMES, columns=['estimate', 'low', 'high'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Metrics of prediction result files (Actual/Predicted columns).")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--bootstrap', type=int, default=0, help='Resamples for 95%% confidence intervals')
+    args = parser.parse_args(argv)
+
+    frame = pd.concat([read_table(path, columns=['Actual', 'Predicted']).assign(file=path) for path in args.files], ignore_index=True)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(grouped_metrics(frame, 'file').round(4).to_string())
+        if args.bootstrap:
+            for path, group in frame.groupby('file', sort=True):
+                print(f"\n{path}:")
+                print(bootstrap_ci(group['Actual'], group['Predicted'], args.bootstrap).round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
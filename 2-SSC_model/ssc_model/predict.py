@@ -0,0 +1,130 @@
+"""Apply a saved SSC model to the reflectance dataset written by hls_extract.ingest.
+
+The dataset (``reflectance/waterbody=lake/part-*.parquet`` ...) is streamed
+in record batches of --batch-size rows, so memory stays bounded by a few
+batches however large the input is. Batches are predicted by a thread pool
+(tree traversal in scikit-learn and XGBoost, and the BLAS calls of the MLP,
+run without the GIL) with at most ``2 * workers`` batches in flight, and
+written in input order to one Parquet file:
+
+    python -m ssc_model.predict --model RandomForest_model_R2_0.85.joblib \
+        --input reflectance --output ssc.parquet --workers 8
+
+Output columns: waterbody, waterbody_id, fire_start, fire_end, date (those
+present in the input) and ssc (float32). The model is loaded with
+``joblib.load(mmap_mode='r')``, so its large arrays are mapped rather than
+copied where the estimator allows it.
+"""
+import argparse
+import os
+import resource
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .forest import CompactForest
+
+BAND_COLUMNS = ['B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+KEY_COLUMNS = ['waterbody', 'waterbody_id', 'fire_start', 'fire_end', 'date']
+BATCH_SIZE = 1 << 18
+
+
+def load_model(path):
+    if path.endswith('.npz'):
+        return CompactForest.load(path)  # Written by ssc_model.forest; single-threaded already
+    model = joblib.load(path, mmap_mode='r')
+    # Parallelism comes from predicting several batches at once
+    # (also inside a preprocessing Pipeline, where the parameter is e.g. model__n_jobs).
+    # A log_target TransformedTargetRegressor predicts with its fitted regressor_,
+    # not with the unfitted regressor template that its own set_params reaches
+    for estimator in (model, getattr(model, 'regressor_', None)):
+        if estimator is not None:
+            names = [name for name in estimator.get_params() if name.rsplit('__', 1)[-1] in ('n_jobs', 'nthread')]
+            estimator.set_params(**dict.fromkeys(names, 1))
+    return model
+
+
+def feature_columns(model, default=BAND_COLUMNS):
+    # Models fitted on a DataFrame remember its columns
+    names = getattr(model, 'feature_names_in_', None)
+    return list(names) if names is not None else list(default)
+
+
+def open_dataset(path):
+    return ds.dataset(path, format='parquet', partitioning='hive')
+
+
+def predict_batch(model, batch, features):
+    X = np.column_stack([batch.column(name).to_numpy(zero_copy_only=False) for name in features])
+    # Feature names only for models that were fitted with them, to avoid sklearn's name check warnings
+    if getattr(model, 'feature_names_in_', None) is not None:
+        X = pd.DataFrame(X, columns=features)
+    return np.asarray(model.predict(X), dtype=np.float32)
+
+
+def predict_dataset(model, input_path, output_path, features=None, batch_size=BATCH_SIZE, workers=None):
+    """Stream ``input_path`` through ``model`` into ``output_path``; returns the number of rows."""
+    features = features or feature_columns(model)
+    dataset = open_dataset(input_path)
+    keys = [name for name in KEY_COLUMNS if name in dataset.schema.names]
+    workers = workers or os.cpu_count() or 1
+
+    rows = 0
+    writer = None
+    pending = deque()
+
+    def write(future, batch):
+        nonlocal writer, rows
+        ssc = future.result()
+        table = pa.Table.from_arrays([batch.column(name) for name in keys] + [pa.array(ssc)], keys + ['ssc'])
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema, compression='zstd')
+        writer.write_table(table)
+        rows += len(ssc)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch in dataset.to_batches(columns=keys + features, batch_size=batch_size):
+                if batch.num_rows == 0:
+                    continue
+                pending.append((executor.submit(predict_batch, model, batch, features), batch))
+                if len(pending) >= 2 * workers:
+                    write(*pending.popleft())
+            while pending:
+                write(*pending.popleft())
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict SSC for every row of the reflectance dataset.")
+    parser.add_argument('--model', required=True,
+                        help='Model saved by 1-SSC-all-model.py (.joblib) or exported by ssc_model.forest (.npz)')
+    parser.add_argument('--input', required=True, help='Parquet dataset written by hls_extract.ingest')
+    parser.add_argument('--output', required=True, help='Output Parquet file')
+    parser.add_argument('--features', nargs='+', default=None,
+                        help='Input columns in training order (default: the columns the model was fitted on)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help='Batches predicted at once (default: all cores)')
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    model = load_model(args.model)
+    rows = predict_dataset(model, args.input, args.output, args.features, args.batch_size, args.workers)
+    elapsed = time.perf_counter() - start_time
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s), peak RSS {peak:.0f} MB "
+          f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Feature/target preprocessing in front of the SSC regressors.
+
+Steps, applied in this order when selected:
+
+- ``ratios``: append band ratios (RATIOS, e.g. red/green and NIR/red) to the
+  reflectance columns;
+- ``scale``: standardise every feature (StandardScaler);
+- ``log_target``: fit on log10(ssc) and predict 10 ** prediction.
+
+SVR and DNN are scaled by default (DEFAULT_PREPROCESSING): the RBF kernel
+and the MLP weight every feature by its spread, which differs between the
+visible and SWIR bands of water pixels. The tree ensembles are
+scale-invariant and stay unchanged.
+
+The result is an ordinary scikit-learn Pipeline (wrapped in a
+TransformedTargetRegressor for ``log_target``), so it is saved and loaded
+with joblib like the bare model. Given a ``memory`` folder, the fitted
+transformers are cached with joblib.Memory: fits of other seeds or models
+on the same rows reuse the transformed matrix instead of recomputing it.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+STEPS = ['ratios', 'scale', 'log_target']
+PREPROCESS_CACHE = 'preprocess_cache'
+DEFAULT_PREPROCESSING = {'RandomForest': [], 'XGBoost': [], 'SVR': ['scale'], 'DNN': ['scale']}
+# (numerator, denominator): red/green, NIR/red, red/blue, green/blue
+RATIOS = [('B4', 'B3'), ('B5', 'B4'), ('B4', 'B2'), ('B3', 'B2')]
+
+
+class BandRatios(BaseEstimator, TransformerMixin):
+    """Append ``numerator / denominator`` columns for the band pairs in ``ratios``."""
+
+    def __init__(self, ratios=RATIOS):
+        self.ratios = ratios
+
+    def fit(self, X, y=None):
+        columns = list(X.columns) if hasattr(X, 'columns') else None
+        missing = sorted({band for pair in self.ratios for band in pair} - set(columns or []))
+        if missing:
+            raise ValueError(f"band ratios need a DataFrame with the columns {missing}")
+        self.feature_names_in_ = np.asarray(columns, dtype=object)
+        self.n_features_in_ = len(columns)
+        return self
+
+    def transform(self, X):
+        X = pd.DataFrame(X, columns=self.feature_names_in_) if not hasattr(X, 'columns') else X
+        ratios = {f'{top}/{bottom}': X[top] / X[bottom] for top, bottom in self.ratios}
+        return pd.concat([X, pd.DataFrame(ratios, index=X.index)], axis=1)
+
+    def get_feature_names_out(self, input_features=None):
+        names = [f'{top}/{bottom}' for top, bottom in self.ratios]
+        return np.asarray(list(self.feature_names_in_) + names, dtype=object)
+
+
+def parse_steps(steps):
+    """``None`` (model defaults), ``['none']`` (no preprocessing) or a list of STEPS."""
+    if steps is None:
+        return None
+    steps = [step for step in steps if step != 'none']
+    unknown = sorted(set(steps) - set(STEPS))
+    if unknown:
+        raise ValueError(f"Unknown preprocessing steps {unknown}; choose from {STEPS} or 'none'")
+    return [step for step in STEPS if step in steps]
+
+
+def preprocessing_for(model_name, steps=None):
+    return list(DEFAULT_PREPROCESSING.get(model_name, [])) if steps is None else list(steps)
+
+
+def wrap_model(model, steps, memory=None):
+    """``model`` behind the selected ``steps``; the bare model when there are none."""
+    transformers = []
+    if 'ratios' in steps:
+        transformers.append(('ratios', BandRatios()))
+    if 'scale' in steps:
+        transformers.append(('scale', StandardScaler()))
+    if transformers:
+        model = Pipeline(transformers + [('model', model)], memory=memory)
+    if 'log_target' in steps:
+        model = TransformedTargetRegressor(model, func=np.log10, inverse_func=_exp10, check_inverse=False)
+    return model
+
+
+def _exp10(y):
+    # Module-level so fitted models stay picklable
+    return np.power(10.0, y)
+
+
+def drop_memory(model):
+    """Detach the transformer cache from a fitted model before it is saved."""
+    pipeline = getattr(model, 'regressor_', model)
+    if isinstance(pipeline, Pipeline):
+        pipeline.set_params(memory=None)
+    return model
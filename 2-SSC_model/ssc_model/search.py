@@ -0,0 +1,197 @@
+"""Successive-halving hyperparameter search for the SSC models.
+
+Candidates are sampled from SEARCH_SPACES (the original hyperparameters are
+always candidate 0). Each rung scores the surviving candidates by K-fold
+R² on a random subset of the training rows, keeps the best 1/``eta`` and
+moves to an ``eta`` times larger subset, so only a handful of candidates
+is ever fitted on the full data. Every (candidate, rows, fold) score is
+appended to a JSON-lines cache, keyed on the data as well, so an
+interrupted search resumes where it stopped. Fits of a rung run in a
+process pool, one thread each.
+"""
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+from threadpoolctl import threadpool_limits
+
+from .preprocess import preprocessing_for
+from .zoo import DEFAULT_PARAMS, build_model
+
+SEARCH_SPACES = {
+    'RandomForest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [10, 20, 30, None],
+        'min_samples_split': [2, 5, 10],
+        'max_features': [1.0, 0.5, 'sqrt'],
+    },
+    'XGBoost': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [3, 6, 10, 20],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'subsample': [0.7, 1.0],
+        'colsample_bytree': [0.7, 1.0],
+    },
+    'SVR': {
+        'C': [1, 10, 100, 1000],
+        'epsilon': [0.01, 0.1, 1],
+        'gamma': ['scale', 0.1, 1, 10],
+    },
+    'DNN': {
+        'hidden_layer_sizes': [[100, 100], [64], [128, 64], [256, 128]],
+        'alpha': [1e-4, 1e-3, 1e-2],
+        'learning_rate_init': [1e-3, 3e-3],
+    },
+}
+# Library defaults of the searched parameters that the original models did not set
+LIBRARY_DEFAULTS = {'max_features': 1.0, 'subsample': 1.0, 'colsample_bytree': 1.0, 'gamma': 'scale',
+                    'alpha': 1e-4, 'learning_rate_init': 1e-3}
+SEARCH_CACHE = 'search_cache.jsonl'
+BEST_PARAMS_FILE = 'best_params.json'
+
+_data = None
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def sample_candidates(model_name, n_candidates, seed=0):
+    """``n_candidates`` distinct parameter dicts, the original hyperparameters first."""
+    space = SEARCH_SPACES[model_name]
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    random.Random(seed).shuffle(grid)
+    default = {name: DEFAULT_PARAMS[model_name].get(name, LIBRARY_DEFAULTS.get(name)) for name in space}
+    default = json.loads(json.dumps(default))  # Tuples as lists, like the grid
+    candidates = [default] + [params for params in grid if params != default]
+    return candidates[:n_candidates]
+
+
+def data_fingerprint(X, y):
+    hashed = pd.util.hash_pandas_object(pd.concat([X, y], axis=1), index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+def fold_key(fingerprint, model_name, params, rows, fold, folds, seed, preprocess=()):
+    payload = json.dumps([fingerprint, model_name, params, rows, fold, folds, seed, list(preprocess)], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def load_cache(path):
+    cache = {}
+    if path and os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line of an interrupted run
+                cache[record['key']] = record
+    return cache
+
+
+def score_fold(model_name, params, rows, fold, folds, seed, preprocess=None, memory=None):
+    """R² of one fold of a ``rows``-row subset; returns ``(score, seconds)``."""
+    X, y = _data
+    subset = np.random.default_rng(seed).permutation(len(X))[:rows]
+    train_index, test_index = list(KFold(folds, shuffle=True, random_state=seed).split(subset))[fold]
+    train_rows, test_rows = subset[train_index], subset[test_index]
+    start_time = time.perf_counter()
+    with threadpool_limits(limits=1):
+        model = build_model(model_name, seed, n_jobs=1, preprocess=preprocess, memory=memory, **params)
+        model.fit(X.iloc[train_rows], y.iloc[train_rows])
+        score = r2_score(y.iloc[test_rows], model.predict(X.iloc[test_rows]))
+    return score, time.perf_counter() - start_time
+
+
+def rung_sizes(rows, n_candidates, eta=3, min_rows=200):
+    """``(candidates, rows)`` per rung, ending with the full data."""
+    rungs = 1
+    while eta ** (rungs - 1) < n_candidates:
+        rungs += 1
+    sizes = []
+    for i in range(rungs):
+        budget = max(min(min_rows, rows), int(rows / eta ** (rungs - 1 - i)))
+        sizes.append((max(1, math.ceil(n_candidates / eta ** i)), budget))
+    return sizes
+
+
+def successive_halving(model_name, X, y, n_candidates=27, eta=3, folds=3, min_rows=200, seed=0, workers=None,
+                       cache_file=SEARCH_CACHE, preprocess=None, memory=None):
+    """Return ``(best_params, history)``; history has one dict per rung.
+
+    ``preprocess`` and ``memory`` are passed on to build_model.
+    """
+    candidates = sample_candidates(model_name, n_candidates, seed)
+    steps = preprocessing_for(model_name, preprocess)
+    fingerprint = data_fingerprint(X, y)
+    cache = load_cache(cache_file)
+    history = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=((X, y),)) as executor, \
+            open(cache_file, 'a') if cache_file else open(os.devnull, 'w') as cache_out:
+        for keep, rows in rung_sizes(len(X), len(candidates), eta, min_rows):
+            candidates = candidates[:keep]
+            start_time = time.perf_counter()
+            scores = {i: [None] * folds for i in range(len(candidates))}
+            futures = {}
+            fitted = cached = 0
+            fit_seconds = 0.0
+            for i, params in enumerate(candidates):
+                for fold in range(folds):
+                    key = fold_key(fingerprint, model_name, params, rows, fold, folds, seed, steps)
+                    if key in cache:
+                        scores[i][fold] = cache[key]['score']
+                        cached += 1
+                    else:
+                        future = executor.submit(score_fold, model_name, params, rows, fold, folds, seed, steps,
+                                                 memory)
+                        futures[future] = (i, fold, key)
+            for future in as_completed(futures):
+                i, fold, key = futures[future]
+                score, seconds = future.result()
+                scores[i][fold] = score
+                fitted += 1
+                fit_seconds += seconds
+                record = {'key': key, 'model': model_name, 'params': candidates[i], 'rows': rows, 'fold': fold,
+                          'score': score, 'seconds': seconds}
+                cache[key] = record
+                cache_out.write(json.dumps(record) + '\n')
+                cache_out.flush()
+
+            ranked = sorted(range(len(candidates)), key=lambda i: -np.mean(scores[i]))
+            candidates = [candidates[i] for i in ranked]
+            best = float(np.mean(scores[ranked[0]]))
+            history.append({'candidates': len(ranked), 'rows': rows, 'best_r2': best, 'fitted': fitted,
+                            'cached': cached, 'fit_seconds': fit_seconds,
+                            'wall_seconds': time.perf_counter() - start_time})
+            print(f"{model_name}: {len(ranked):>3} candidates on {rows:>7} rows, best CV R² {best:.4f} "
+                  f"({fitted} fits, {cached} cached, {fit_seconds:.1f} CPU-s)")
+    return candidates[0], history
+
+
+def search_models(model_names, X, y, best_params_file=BEST_PARAMS_FILE, **kwargs):
+    """Search every model and save ``{model: params}`` to ``best_params_file``."""
+    best = load_best_params(best_params_file)
+    for model_name in model_names:
+        best[model_name], _ = successive_halving(model_name, X, y, **kwargs)
+        print(f"{model_name}: best parameters {best[model_name]}")
+    with open(best_params_file, 'w') as file:
+        json.dump(best, file, indent=2)
+    return best
+
+
+def load_best_params(path):
+    if path and os.path.exists(path):
+        with open(path) as file:
+            return json.load(file)
+    return {}
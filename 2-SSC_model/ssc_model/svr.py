@@ -0,0 +1,87 @@
+"""RBF support vector regression that stays tractable on large training sets.
+
+The exact SVR (libsvm) costs O(n²) kernel evaluations or more, which
+dominates 1-SSC-all-model.py beyond a few tens of thousands of matchups.
+ScalableSVR picks an engine from the number of training rows:
+
+- ``exact`` up to ``max_exact_rows``: sklearn's SVR, with libsvm's default
+  200 MB kernel cache (several seeds fit at once in train.run_jobs, and a
+  larger cache made no measurable difference);
+- ``nystroem`` (default above that) or ``rff``: the RBF kernel is
+  approximated by ``n_components`` Nyström or random Fourier features and
+  a LinearSVR is fitted on them, O(n · n_components).
+
+C, epsilon and gamma (including gamma='scale') mean the same for every
+engine, so the hyperparameters of the original model carry over.
+"""
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.svm import SVR, LinearSVR
+from sklearn.utils.validation import check_is_fitted, validate_data
+
+ENGINES = ['auto', 'exact', 'nystroem', 'rff']
+MAX_EXACT_ROWS = 20_000
+
+
+class ScalableSVR(RegressorMixin, BaseEstimator):
+    """SVR with an exact or kernel-approximation engine chosen by training size (see module docstring)."""
+
+    def __init__(self, kernel='rbf', C=1.0, epsilon=0.1, gamma='scale', engine='auto',
+                 max_exact_rows=MAX_EXACT_ROWS, n_components=1000, approximate_alternative='nystroem',
+                 max_iter=10_000, random_state=None):
+        self.kernel = kernel
+        self.C = C
+        self.epsilon = epsilon
+        self.gamma = gamma
+        self.engine = engine
+        self.max_exact_rows = max_exact_rows
+        self.n_components = n_components
+        self.approximate_alternative = approximate_alternative
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def _select_engine(self, rows):
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown SVR engine {self.engine!r}; choose from {ENGINES}")
+        if self.engine != 'auto':
+            return self.engine
+        # Only the RBF kernel has an approximation here
+        if rows <= self.max_exact_rows or self.kernel != 'rbf':
+            return 'exact'
+        return self.approximate_alternative
+
+    def fit(self, X, y):
+        X, y = validate_data(self, X, y, dtype=np.float64, y_numeric=True)
+        self.engine_ = self._select_engine(len(X))
+        if self.engine_ == 'exact':
+            self.svr_ = SVR(kernel=self.kernel, C=self.C, epsilon=self.epsilon, gamma=self.gamma).fit(X, y)
+            return self
+        if self.kernel != 'rbf':
+            raise ValueError(f"the {self.engine_} engine approximates the rbf kernel only")
+        # gamma='scale' as in SVR: 1 / (n_features * X.var())
+        gamma = 1.0 / (X.shape[1] * X.var()) if self.gamma == 'scale' else float(self.gamma)
+        self.gamma_ = gamma
+        n_components = min(self.n_components, len(X)) if self.engine_ == 'nystroem' else self.n_components
+        if self.engine_ == 'nystroem':
+            self.features_ = Nystroem(gamma=gamma, n_components=n_components, random_state=self.random_state)
+        else:
+            self.features_ = RBFSampler(gamma=gamma, n_components=n_components, random_state=self.random_state)
+        Z = self.features_.fit_transform(X)
+        # liblinear regularises the intercept, so fit around the target mean instead
+        self.y_mean_ = float(np.mean(y))
+        self.linear_ = LinearSVR(C=self.C, epsilon=self.epsilon, loss='epsilon_insensitive', dual=True,
+                                 fit_intercept=False, max_iter=self.max_iter, random_state=self.random_state)
+        self.linear_.fit(Z, y - self.y_mean_)
+        return self
+
+    def predict(self, X):
+        check_is_fitted(self, 'engine_')
+        X = validate_data(self, X, dtype=np.float64, reset=False)
+        if self.engine_ == 'exact':
+            return self.svr_.predict(X)
+        return self.linear_.predict(self.features_.transform(X)) + self.y_mean_
+
+    @property
+    def n_iter_(self):
+        return self.svr_.n_iter_ if self.engine_ == 'exact' else self.linear_.n_iter_
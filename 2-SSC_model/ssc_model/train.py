@@ -0,0 +1,289 @@
+"""Train the SSC model zoo over one or more seeds in a process pool.
+
+Every (model, seed) pair is one job in a process pool; each job reports
+its fit time and peak RSS (on Linux the high-water mark is reset before the
+job, elsewhere it is the worker's peak so far). The cores are split
+between the workers: with W workers on C cores each job gets C // W threads,
+used both as n_jobs for RandomForest/XGBoost and as the BLAS/OpenMP limit
+(threadpoolctl), so inner parallelism never oversubscribes the machine.
+
+model_performance.parquet keeps one row per ``{model}_random_state_{seed}`` as
+before, plus a ``{model}_mean`` row with the mean and standard deviation of
+MAE/MSE/R² over the seeds, the seeds used, mean fit time and peak memory,
+and the mean RMSE, EI and Bias of metrics.py.
+
+``--search`` first runs the successive-halving search of search.py on the
+training data and trains with the best parameters found; ``--params`` reuses
+a saved best_params.json.
+
+SVR and DNN are fitted behind a StandardScaler by default; ``--preprocess``
+selects the steps of preprocess.py for every model instead (``none`` for
+the raw reflectance), and the fitted transformers are cached in
+``--preprocess-cache`` across jobs.
+
+Every full run records its training rows and models in ``--manifest``;
+``--incremental`` then updates those models, for every seed of that run,
+with newly appended rows (incremental.py) instead of refitting them.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from .data import TEST_FILE, TRAIN_FILE, load_split, read_table, table_exists, write_table
+from .incremental import (MANIFEST_FILE, appended_rows, entries_for, load_manifest, manifest_entry, seed_entries,
+                          timed_update, write_manifest)
+from .metrics import compute_metrics
+from .preprocess import PREPROCESS_CACHE, STEPS, drop_memory, parse_steps
+from .search import BEST_PARAMS_FILE, SEARCH_CACHE, load_best_params, search_models
+from .svr import ENGINES
+from .zoo import MODEL_NAMES, build_model, model_filename, prediction_filename
+
+PERFORMANCE_FILE = 'model_performance.parquet'
+PERFORMANCE_COLUMNS = ['Model', 'MAE', 'MSE', 'R2', 'MAE_std', 'MSE_std', 'R2_std', 'Seeds', 'Seconds', 'Peak_MB',
+                       'RMSE', 'EI', 'Bias']
+
+RunResult = namedtuple('RunResult', 'model seed mae mse r2 seconds peak_mb prediction_file model_file rmse ei bias')
+
+_data = None
+_threads = 1
+
+
+def _init_worker(data, threads):
+    global _data, _threads
+    _data = data
+    _threads = threads
+
+
+def _reset_peak_rss():
+    # Linux only: writing 5 to clear_refs resets VmHWM, the peak RSS of the process
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def fit_job(model_name, random_state, original_names=True, params=None, preprocess=None, memory=None):
+    """Fit one model, save its test predictions and the model, and return a RunResult."""
+    X_train, y_train, X_test, y_test = _data
+    _reset_peak_rss()
+    suffix_seed = None if original_names else random_state
+
+    with threadpool_limits(limits=_threads):
+        start_time = time.perf_counter()
+        model = build_model(model_name, random_state, n_jobs=_threads, preprocess=preprocess, memory=memory,
+                            **(params or {}))
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        seconds = time.perf_counter() - start_time
+    return save_run(model, model_name, random_state, y_test, y_pred, seconds, suffix_seed)
+
+
+def save_run(model, model_name, random_state, y_test, y_pred, seconds, suffix_seed=None):
+    """Score ``y_pred``, save the predictions and the model, and return a RunResult."""
+    metrics = compute_metrics(y_test, y_pred)
+    mae, mse, r2 = metrics['MAE'], metrics['MSE'], metrics['R2']
+    print(f'{model_name} (random_state={random_state}) - MAE: {mae}, MSE: {mse}, R²: {r2}, {seconds:.1f}s')
+
+    prediction_file = prediction_filename(model_name, suffix_seed)
+    write_table(pd.DataFrame({'Actual': y_test, 'Predicted': y_pred}), prediction_file)
+    print(f"Prediction results saved to '{prediction_file}'")
+    model_file = model_filename(model_name, r2, suffix_seed)
+    joblib.dump(drop_memory(model), model_file)
+    print(f"Model saved as '{model_file}'")
+
+    peak_mb = _peak_rss_mb()
+    return RunResult(model_name, random_state, mae, mse, r2, seconds, peak_mb, prediction_file, model_file,
+                     metrics['RMSE'], metrics['EI'], metrics['Bias'])
+
+
+def run_jobs(model_names, seeds, data, workers=None, params=None, preprocess=None, memory=None):
+    """Run every model x seed; returns the RunResults in completion order.
+
+    ``params`` maps model names to hyperparameters overriding the defaults;
+    ``preprocess`` and ``memory`` are passed on to build_model.
+    """
+    params = params or {}
+    jobs = [(model_name, seed, seed == seeds[0], params.get(model_name), preprocess, memory)
+            for seed in seeds for model_name in model_names]
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or cores, len(jobs)))
+    threads = max(1, cores // workers)
+    print(f"{len(jobs)} jobs on {workers} workers x {threads} threads")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data, threads)) as executor:
+        futures = [executor.submit(fit_job, *job) for job in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+
+def summarize(results):
+    """One row per model with mean/std of the metrics over seeds, fit time and peak memory."""
+    frame = pd.DataFrame(results, columns=RunResult._fields)
+    grouped = frame.groupby('model', sort=False)
+    summary = grouped[['mae', 'mse', 'r2', 'seconds', 'rmse', 'ei', 'bias']].mean()
+    # std over a single seed is NaN; report 0 instead
+    std = grouped[['mae', 'mse', 'r2']].std(ddof=1).fillna(0)
+    summary[['mae_std', 'mse_std', 'r2_std']] = std.to_numpy()
+    summary['peak_mb'] = grouped['peak_mb'].max()
+    summary['seeds'] = grouped['seed'].apply(lambda seeds: ' '.join(str(seed) for seed in sorted(seeds)))
+    return summary
+
+
+def update_performance(performance_file, results):
+    # Replace the per-seed and {model}_mean rows of this run; other rows in the file are kept
+    rows = [[f'{result.model}_random_state_{result.seed}', result.mae, result.mse, result.r2, None, None, None,
+             str(result.seed), result.seconds, result.peak_mb, result.rmse, result.ei, result.bias]
+            for result in results]
+    rows += [[f'{model_name}_mean', row.mae, row.mse, row.r2, row.mae_std, row.mse_std, row.r2_std, row.seeds,
+              row.seconds, row.peak_mb, row.rmse, row.ei, row.bias] for model_name, row in summarize(results).iterrows()]
+    performance_df = pd.DataFrame(rows, columns=PERFORMANCE_COLUMNS)
+    if table_exists(performance_file):
+        existing = read_table(performance_file)
+        existing = existing[~existing['Model'].isin(performance_df['Model'])]
+        performance_df = pd.concat([existing.reindex(columns=PERFORMANCE_COLUMNS), performance_df], ignore_index=True)
+    write_table(performance_df, performance_file)
+
+
+def print_report(results):
+    summary = summarize(results)
+    print(f"\n{'model':>12} {'seeds':>5} {'fit s':>8} {'peak MB':>8} {'MAE':>20} {'MSE':>22} {'R2':>16}")
+    for model_name, row in summary.iterrows():
+        print(f"{model_name:>12} {len(row.seeds.split()):>5} {row.seconds:>8.1f} {row.peak_mb:>8.0f} "
+              f"{row.mae:>10.3f} ± {row.mae_std:<7.3f} {row.mse:>11.2f} ± {row.mse_std:<8.2f} "
+              f"{row.r2:>6.3f} ± {row.r2_std:<6.3f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Train the SSC models and record their test performance.")
+    parser.add_argument('--train', default=TRAIN_FILE, help='Training matchups with an ssc column')
+    parser.add_argument('--test', default=TEST_FILE, help='Test matchups with an ssc column')
+    parser.add_argument('--models', nargs='+', choices=MODEL_NAMES, default=MODEL_NAMES)
+    parser.add_argument('--seeds', nargs='+', type=int, default=[42],
+                        help='Random states; outputs of the first keep the original file names '
+                             '(--incremental updates the seeds of the last full run instead)')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel jobs (default: all cores)')
+    parser.add_argument('--performance-file', default=PERFORMANCE_FILE)
+    parser.add_argument('--search', action='store_true',
+                        help='Search hyperparameters by successive halving before training')
+    parser.add_argument('--params', default=None,
+                        help=f'JSON of best parameters per model, written by --search (default {BEST_PARAMS_FILE})')
+    parser.add_argument('--candidates', type=int, default=27, help='Candidates per model for --search')
+    parser.add_argument('--search-cache', default=SEARCH_CACHE, help='Fold scores cache; reruns resume from it')
+    parser.add_argument('--preprocess', nargs='+', choices=STEPS + ['none'], default=None,
+                        help='Preprocessing of every model (default: scaling for SVR and DNN only)')
+    parser.add_argument('--svr-engine', choices=ENGINES, default='auto',
+                        help='SVR solver; auto uses the exact one up to 20000 training rows')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Update the saved models with rows appended to --train since the last run')
+    parser.add_argument('--manifest', default=MANIFEST_FILE, help='Training rows and model files of the last run')
+    parser.add_argument('--preprocess-cache', default=None,
+                        help=f'Folder caching fitted transformers across seeds and models, e.g. {PREPROCESS_CACHE} '
+                             '(default: no cache; the folder is not cleaned up)')
+    return parser
+
+
+def run_incremental(model_names, seed, data, manifest_file, memory=None):
+    """Update the models of ``manifest_file`` with the appended rows; None when a full fit is needed.
+
+    Every seed recorded for a model is updated, so the ``{model}_mean`` rows
+    keep the seeds of the full run. ``seed`` is the seed of manifests that
+    predate per-seed entries.
+    """
+    X_train, y_train, _, y_test = data
+    manifest = load_manifest(manifest_file)
+    start = appended_rows(manifest, X_train, y_train)
+    if start is None:
+        print(f"Training rows differ from '{manifest_file}' beyond appended rows; fitting from scratch")
+        return None
+    missing = [model_name for model_name in model_names if model_name not in manifest['models']
+               or not all(os.path.exists(entry['model_file'])
+                          for entry in seed_entries(manifest, model_name, seed).values())]
+    if missing:
+        print(f"No saved model for {', '.join(missing)}; fitting from scratch")
+        return None
+    if start == len(X_train):
+        print(f"No new training rows since the last run ({start} rows)")
+        return []
+
+    print(f"{len(X_train) - start} new training rows after {start}")
+    results, entries = [], {}
+    saved = 0.0
+    for model_name in model_names:
+        for model_seed, entry in seed_entries(manifest, model_name, seed).items():
+            model_seed = int(model_seed)
+            model, y_pred, seconds, description, full_fit = timed_update(model_name, entry, data, start, model_seed,
+                                                                         memory)
+            print(f"{model_name} (random_state={model_seed}): {description} in {seconds:.1f}s "
+                  f"(last full fit {entry['full_seconds']:.1f}s)")
+            result = save_run(model, model_name, model_seed, y_test, y_pred, seconds,
+                              None if entry['original_names'] else model_seed)
+            if result.model_file != entry['model_file'] and os.path.exists(entry['model_file']):
+                os.remove(entry['model_file'])
+            saved += entry['full_seconds'] - seconds
+            entries.setdefault(model_name, {})[str(model_seed)] = manifest_entry(
+                result, entry['params'], entry['preprocess'], seconds if full_fit else entry['full_seconds'],
+                entry['original_names'])
+            results.append(result)
+    write_manifest(manifest_file, X_train, y_train, entries, manifest)
+    print(f"Incremental update saved about {saved:.1f}s of fitting compared with a full retrain")
+    return results
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        data = load_split(args.train, args.test)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}")
+        sys.exit(1)
+
+    preprocess = parse_steps(args.preprocess)
+    memory = args.preprocess_cache or None
+    params = load_best_params(args.params)
+    if args.search:
+        X_train, y_train = data[:2]
+        params = search_models(args.models, X_train, y_train, args.params or BEST_PARAMS_FILE,
+                               n_candidates=args.candidates, workers=args.workers, cache_file=args.search_cache,
+                               preprocess=preprocess, memory=memory)
+
+    if args.svr_engine != 'auto':
+        params['SVR'] = {**params.get('SVR', {}), 'engine': args.svr_engine}
+    start_time = time.perf_counter()
+    results = None
+    if args.incremental:
+        results = run_incremental(args.models, args.seeds[0], data, args.manifest, memory)
+        if results == []:
+            return results
+    if results is None:
+        results = run_jobs(args.models, args.seeds, data, args.workers, params, preprocess, memory)
+        X_train, y_train = data[:2]
+        write_manifest(args.manifest, X_train, y_train, entries_for(results, args.seeds[0], params, preprocess),
+                       load_manifest(args.manifest))
+    print_report(results)
+    print(f"Total wall time: {time.perf_counter() - start_time:.1f}s")
+
+    update_performance(args.performance_file, results)
+    print(f"\nAll model performance metrics have been updated and saved to '{args.performance_file}'")
+    return results
@@ -0,0 +1,63 @@
+"""The four SSC regressors of 1-SSC-all-model.py, with their output file names."""
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.neural_network import MLPRegressor
+from xgboost import XGBRegressor
+
+from .preprocess import preprocessing_for, wrap_model
+from .svr import ScalableSVR
+
+MODEL_NAMES = ['RandomForest', 'XGBoost', 'SVR', 'DNN']
+
+PREDICTION_FILES = {
+    'RandomForest': 'RFmodel_prediction_results.parquet',
+    'XGBoost': 'XGBoost_model_prediction_results.parquet',
+    'SVR': 'SVR_model_prediction_results.parquet',
+    'DNN': 'DNN_model_prediction_results.parquet',
+}
+
+
+# Hyperparameters of the original models dict; search.py looks for better ones
+DEFAULT_PARAMS = {
+    'RandomForest': {'n_estimators': 50, 'max_depth': 20, 'min_samples_split': 5},
+    'XGBoost': {'n_estimators': 50, 'max_depth': 20, 'learning_rate': 0.1},
+    'SVR': {'kernel': 'rbf', 'C': 100, 'epsilon': 0.1},
+    'DNN': {'hidden_layer_sizes': (100, 100), 'activation': 'relu', 'solver': 'adam', 'max_iter': 500},
+}
+
+
+def build_model(name, random_state=42, n_jobs=1, preprocess=None, memory=None, **params):
+    """Original hyperparameters, overridden by ``params``, behind the model's preprocessing.
+
+    ``preprocess`` is a list of preprocess.STEPS (``None``: the model's
+    default); ``memory`` a joblib cache folder for the fitted transformers.
+    n_jobs only matters for the tree ensembles.
+    """
+    if name not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown model: {name}")
+    params = {**DEFAULT_PARAMS[name], **params}
+    if name == 'RandomForest':
+        model = RandomForestRegressor(random_state=random_state, n_jobs=n_jobs, **params)
+    elif name == 'XGBoost':
+        model = XGBRegressor(random_state=random_state, verbosity=0, n_jobs=n_jobs, **params)
+    elif name == 'SVR':
+        # Exact libsvm SVR on small data, a kernel approximation above svr.MAX_EXACT_ROWS
+        model = ScalableSVR(random_state=random_state, **params)
+    else:
+        # hidden_layer_sizes comes back from JSON as a list
+        params['hidden_layer_sizes'] = tuple(params['hidden_layer_sizes'])
+        model = MLPRegressor(random_state=random_state, **params)
+    return wrap_model(model, preprocessing_for(name, preprocess), memory)
+
+
+def prediction_filename(name, random_state=None):
+    # The first seed keeps the original names read by 2-draw-all-model.py
+    if random_state is None:
+        return PREDICTION_FILES[name]
+    stem, ext = PREDICTION_FILES[name].rsplit('.', 1)
+    return f"{stem}_seed{random_state}.{ext}"
+
+
+def model_filename(name, r2, random_state=None):
+    if random_state is None:
+        return f'{name}_model_R2_{r2:.2f}.joblib'
+    return f'{name}_seed{random_state}_model_R2_{r2:.2f}.joblib'
@@ -0,0 +1,370 @@
+"""End-to-end benchmarks of the extraction and SSC model code on synthetic data, with regression tracking.
+
+Every case builds its own synthetic inputs with the helpers of the bench_*.py
+scripts in 1-GEE_water_infor and 2-SSC_model:
+
+- extraction: process_fire on synthetic lakes through run_tasks, against the
+  fake ``ee`` with --latency seconds per request (tasks/s and requests per
+  task, per-image and batched);
+- lookup: loading a synthetic reach shapefile, and the per-waterbody lookup
+  and geometry conversion of process_fire (its ``lookup`` and ``geometry``
+  spans);
+- training: fitting each model of ssc_model.zoo (the models of
+  1-SSC-all-model.py) on --sizes rows, with the test R²;
+- prediction: model.predict of every model on one large batch, and
+  predict_dataset over a partitioned Parquet dataset;
+- metrics: compute_metrics (the metrics of 2-draw-all-model.py), grouped
+  metrics and bootstrap resamples;
+- figures: ssc_model.figures and the original 2-draw-all-model.py.
+
+Timings are the best of --repeats runs (as timeit reports them: the
+least disturbed by other load). The results and the machine they
+ran on are written to --output as JSON. With --baseline, every result is
+compared with the stored one and the script exits with status 1 when one is
+worse by more than --tolerance (a fraction; ``--tolerance-for training=0.5``
+sets it for the results whose name starts with a prefix). --save-baseline
+stores the run as the new baseline. Baselines only compare on the machine
+that wrote them, so the script warns when the machine differs.
+
+    python bench_suite.py --quick --save-baseline bench_baseline.json
+    python bench_suite.py --quick --baseline bench_baseline.json --tolerance 0.25 --tolerance-for figures=0.5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(ROOT, '1-GEE_water_infor'), os.path.join(ROOT, '2-SSC_model')]
+
+from hls_extract import fake_ee  # noqa: E402
+
+CASES = ['extraction', 'lookup', 'training', 'prediction', 'metrics', 'figures']
+TOLERANCE = 0.25
+# Machine fields that must match for a baseline comparison to mean anything
+MACHINE_KEYS = ['machine', 'processor', 'cpu_count', 'python', 'numpy', 'sklearn', 'xgboost']
+QUICK = {'lakes': 8, 'reaches': 5000, 'lookups': 100, 'sizes': [500, 2000], 'predict_rows': 10_000,
+         'metric_rows': 20_000, 'figure_rows': 2000, 'repeats': 1}
+
+
+class Results:
+    def __init__(self):
+        self.results = {}
+
+    def record(self, name, value, unit, better):
+        # better: 'higher' for throughputs and scores, 'lower' for times and request counts
+        self.results[name] = {'value': float(value), 'unit': unit, 'better': better}
+        print(f"  {name:<48} {value:>12.4g} {unit}")
+
+
+def timed(function, repeats):
+    """Fewest seconds of ``repeats`` calls of ``function()``, and the last result."""
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start_time)
+    return min(times), result
+
+
+def machine_info():
+    import numpy as np
+    import sklearn
+    import xgboost
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'xgboost': xgboost.__version__,
+        'commit': commit,
+    }
+
+
+def bench_extraction(args, results):
+    from bench_scheduler import synthetic_fires, synthetic_lakes
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import WaterbodyIndex
+    from hls_extract.scheduler import run_tasks
+
+    lakes = synthetic_lakes(args.lakes)
+    waterbodies = WaterbodyIndex(lakes, 'Hylak_id')
+    fires = synthetic_fires(lakes)
+    for mode, batched in (('per_image', False), ('batched', True)):
+        rates = []
+        for _ in range(args.repeats):
+            fake_ee.configure(latency=args.latency)
+            with tempfile.TemporaryDirectory() as folder, contextlib.redirect_stdout(io.StringIO()):
+                tasks = [(hylak_id, folder, start, end) for hylak_id, start, end in fires]
+                report = run_tasks(lambda task: process_fire(task, waterbodies, batched=batched), tasks,
+                                   workers=args.workers)
+            assert report.done == len(tasks) and not report.failed, report
+            rates.append(report.throughput)
+        results.record(f'extraction/{mode}/tasks_per_s', max(rates), 'tasks/s', 'higher')
+        results.record(f'extraction/{mode}/requests_per_task', fake_ee.round_trips() / len(fires), 'requests',
+                       'lower')
+
+
+def bench_lookup(args, results):
+    from bench_geometry_index import synthetic_reaches
+    from hls_extract.adapters import RIVER
+    from hls_extract.extract import process_fire
+    from hls_extract.geometry_index import load_waterbodies
+    from hls_extract.telemetry import Telemetry
+
+    fake_ee.configure()
+    with tempfile.TemporaryDirectory() as folder:
+        shapefile = os.path.join(folder, 'reaches.shp')
+        synthetic_reaches(args.reaches).to_file(shapefile)
+        seconds, waterbodies = timed(lambda: load_waterbodies(shapefile, RIVER), args.repeats)
+        results.record('lookup/shapefile_load_s', seconds, 's', 'lower')
+
+        ids = list(waterbodies.positions)[:args.lookups]
+        per_lookup = []
+        for _ in range(args.repeats):
+            # A new index each time, so every geometry is converted as on a first run
+            index = load_waterbodies(shapefile, RIVER)
+            telemetry = Telemetry()
+            output_folder = tempfile.mkdtemp(dir=folder)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for reach_id in ids:
+                    process_fire((reach_id, output_folder, '2021-06-01', '2021-06-10'), index, RIVER,
+                                 batched=True, telemetry=telemetry)
+            stages = telemetry.summary()['stages']
+            assert stages['lookup']['count'] == len(ids)
+            per_lookup.append((stages['lookup']['sum'] + stages['geometry']['sum']) / len(ids))
+    results.record('lookup/per_waterbody_us', min(per_lookup) * 1e6, 'us', 'lower')
+
+
+def bench_training(args, results, models):
+    from bench_training import synthetic_matchups
+    from sklearn.metrics import r2_score
+    from ssc_model.data import split_features
+    from ssc_model.zoo import MODEL_NAMES, build_model
+
+    X_test, y_test = split_features(synthetic_matchups(1000, seed=2))
+    for rows in sorted(args.sizes):
+        X, y = split_features(synthetic_matchups(rows, seed=1))
+        for name in MODEL_NAMES:
+            seconds, model = timed(lambda: build_model(name, 42).fit(X, y), args.repeats)
+            results.record(f'training/{name}/{rows}/fit_s', seconds, 's', 'lower')
+            results.record(f'training/{name}/{rows}/r2', r2_score(y_test, model.predict(X_test)), 'R2', 'higher')
+            models[name] = model  # Fitted on the largest size, for the prediction case
+
+
+def bench_prediction(args, results, models):
+    import joblib
+    from bench_predict import write_reflectance
+    from bench_training import BANDS, synthetic_matchups
+    from ssc_model.data import split_features
+    from ssc_model.predict import load_model, predict_dataset
+    from ssc_model.zoo import MODEL_NAMES, build_model
+
+    if not models:
+        X, y = split_features(synthetic_matchups(max(args.sizes), seed=1))
+        models.update((name, build_model(name, 42).fit(X, y)) for name in MODEL_NAMES)
+    batch = synthetic_matchups(args.predict_rows, seed=3)[BANDS]
+    for name, model in models.items():
+        seconds, _ = timed(lambda: model.predict(batch), args.repeats)
+        results.record(f'prediction/{name}/rows_per_s', len(batch) / seconds, 'rows/s', 'higher')
+
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = os.path.join(folder, 'RandomForest_model.joblib')
+        joblib.dump(models['RandomForest'], model_path)
+        input_path = os.path.join(folder, 'reflectance')
+        write_reflectance(input_path, args.predict_rows, rows_per_part=max(1, args.predict_rows // 4))
+
+        outputs = iter(range(args.repeats))
+
+        def predict():
+            output_path = os.path.join(folder, f'ssc-{next(outputs)}.parquet')
+            return predict_dataset(load_model(model_path), input_path, output_path, workers=1)
+        seconds, rows = timed(predict, args.repeats)
+        assert rows == args.predict_rows
+    results.record('prediction/predict_dataset/rows_per_s', rows / seconds, 'rows/s', 'higher')
+
+
+def bench_metrics(args, results):
+    import numpy as np
+    import pandas as pd
+    from ssc_model.metrics import bootstrap_metrics, compute_metrics, grouped_metrics
+
+    rng = np.random.default_rng(0)
+    actual = 10 ** rng.uniform(0, 3.5, args.metric_rows)
+    predicted = actual * np.exp(rng.normal(0, 0.5, args.metric_rows))
+    frame = pd.DataFrame({'Actual': actual, 'Predicted': predicted,
+                          'group': rng.integers(0, 200, args.metric_rows)})
+
+    # About a millisecond per call: timed over 20 calls, as in bench_metrics.py
+    seconds, _ = timed(lambda: [compute_metrics(actual, predicted) for _ in range(20)], args.repeats)
+    results.record('metrics/compute_ms', seconds / 20 * 1e3, 'ms', 'lower')
+    seconds, _ = timed(lambda: grouped_metrics(frame, 'group'), args.repeats)
+    results.record('metrics/grouped_200_ms', seconds * 1e3, 'ms', 'lower')
+    sample = slice(0, min(args.metric_rows, 10_000))
+    seconds, _ = timed(lambda: bootstrap_metrics(actual[sample], predicted[sample], 200), args.repeats)
+    results.record('metrics/bootstrap_200_ms', seconds * 1e3, 'ms', 'lower')
+
+
+def bench_figures(args, results):
+    from bench_figures import SCRIPT, run, write_predictions
+    from ssc_model.figures import render_figure
+    from ssc_model.zoo import PREDICTION_FILES
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_predictions(folder, args.figure_rows)
+        files = {name: os.path.join(folder, path) for name, path in PREDICTION_FILES.items()}
+        for density in ('hexbin', 'hist2d'):
+            output = os.path.join(folder, f'figure_{density}.png')
+            seconds, _ = timed(lambda: render_figure(files, output, density, workers=1), args.repeats)
+            results.record(f'figures/{density}_s', seconds, 's', 'lower')
+        # Includes the interpreter start-up and imports, like running the script by hand
+        seconds = min(run([sys.executable, SCRIPT], folder) for _ in range(args.repeats))
+        results.record('figures/2-draw-all-model_s', seconds, 's', 'lower')
+
+
+def parse_tolerances(values):
+    tolerances = {}
+    for value in values:
+        prefix, sep, tolerance = value.partition('=')
+        if not sep:
+            raise ValueError(f"Expected PREFIX=FRACTION, got {value!r}")
+        tolerances[prefix] = float(tolerance)
+    return tolerances
+
+
+def tolerance_for(name, default, tolerances):
+    # The longest matching prefix wins
+    matches = [prefix for prefix in tolerances if name.startswith(prefix)]
+    return tolerances[max(matches, key=len)] if matches else default
+
+
+def compare(current, baseline, default=TOLERANCE, tolerances=None):
+    """Rows of (name, baseline, current, change, tolerance, status), status being 'ok', 'better' or 'REGRESSION'.
+
+    ``change`` is the relative change in the worse direction (positive: slower
+    or less accurate).
+    """
+    rows = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]['value'], result['value']
+        if old == 0:
+            change = 0.0 if new == 0 else float('inf') * (1 if result['better'] == 'lower' else -1)
+        elif result['better'] == 'lower':
+            change = new / old - 1
+        else:
+            change = 1 - new / old
+        tolerance = tolerance_for(name, default, tolerances or {})
+        status = 'REGRESSION' if change > tolerance else 'better' if change < -tolerance else 'ok'
+        rows.append((name, old, new, change, tolerance, status))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extraction, training, prediction, metrics and figures.")
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--quick', action='store_true', help='Small inputs and one repeat (about a minute)')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--lakes', type=int, default=20, help='Extraction tasks')
+    parser.add_argument('--latency', type=float, default=0.01, help='Seconds per getInfo() call of the fake ee')
+    parser.add_argument('--workers', type=int, default=4, help='Extraction threads')
+    parser.add_argument('--reaches', type=int, default=10_000, help='Polygons in the lookup shapefile')
+    parser.add_argument('--lookups', type=int, default=300)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 8000], help='Training rows')
+    parser.add_argument('--predict-rows', type=int, default=50_000)
+    parser.add_argument('--metric-rows', type=int, default=100_000)
+    parser.add_argument('--figure-rows', type=int, default=5000, help='Predictions per model')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', default=None, help='Results JSON to compare with')
+    parser.add_argument('--save-baseline', default=None, help='Also write the results to this baseline file')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='Allowed relative regression before failing (default: %(default)s)')
+    parser.add_argument('--tolerance-for', nargs='+', default=[], metavar='PREFIX=FRACTION',
+                        help='Tolerance for the results whose name starts with PREFIX')
+    args = parser.parse_args(argv)
+    if args.quick:
+        # Only the sizes left at their defaults are reduced
+        for key, value in QUICK.items():
+            if getattr(args, key) == parser.get_default(key):
+                setattr(args, key, value)
+    try:
+        tolerances = parse_tolerances(args.tolerance_for)
+    except ValueError as e:
+        parser.error(str(e))
+
+    fake_ee.install()
+    results = Results()
+    models = {}
+    elapsed = {}
+    for case in CASES:
+        if case not in args.cases:
+            continue
+        print(f"{case}:")
+        start_time = time.perf_counter()
+        if case == 'extraction':
+            bench_extraction(args, results)
+        elif case == 'lookup':
+            bench_lookup(args, results)
+        elif case == 'training':
+            bench_training(args, results, models)
+        elif case == 'prediction':
+            bench_prediction(args, results, models)
+        elif case == 'metrics':
+            bench_metrics(args, results)
+        else:
+            bench_figures(args, results)
+        elapsed[case] = time.perf_counter() - start_time
+
+    config = {key: value for key, value in vars(args).items()
+              if key not in ('output', 'baseline', 'save_baseline', 'tolerance', 'tolerance_for')}
+    document = {'machine': machine_info(), 'config': config, 'elapsed': elapsed, 'results': results.results}
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as file:
+            json.dump(document, file, indent=2)
+    print(f"Wrote {args.output}" + (f" and baseline {args.save_baseline}" if args.save_baseline else ''))
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    differing = [key for key in MACHINE_KEYS if baseline['machine'].get(key) != document['machine'][key]]
+    if differing:
+        print(f"Warning: the baseline ran on a different machine or environment ({', '.join(differing)})")
+    # Throughputs depend on the input sizes, e.g. fixed costs weigh more on a smaller dataset
+    changed = [key for key in config if key != 'cases' and key in baseline['config']
+               and baseline['config'][key] != config[key]]
+    if changed:
+        print(f"Warning: the baseline ran with different settings ({', '.join(changed)})")
+    rows = compare(results.results, baseline['results'], args.tolerance, tolerances)
+    print(f"\n{'result':<48} {'baseline':>11} {'current':>11} {'worse by':>9} {'allowed':>8}")
+    for name, old, new, change, tolerance, status in rows:
+        print(f"{name:<48} {old:>11.4g} {new:>11.4g} {change:>+9.1%} {tolerance:>8.0%}  {status}")
+    regressions = [row for row in rows if row[-1] == 'REGRESSION']
+    missing = sorted(set(baseline['results']) - set(results.results))
+    if missing:
+        print(f"{len(missing)} baseline results not measured in this run")
+    print(f"{len(regressions)} regressions in {len(rows)} results compared")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())